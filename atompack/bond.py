@@ -14,11 +14,13 @@ class Bond(MutableMapping):
 
     Args:
         indices: Index of each atom in the bond.
+        image: Periodic image offset of the second atom in lattice units.
     """
 
-    def __init__(self, indices: Tuple[int, int], **kwargs) -> None:
+    def __init__(self, indices: Tuple[int, int], image: Tuple[int, int, int] = (0, 0, 0), **kwargs) -> None:
         self._attrs = {k: v for k, v in kwargs.items()}
         self._attrs["indices"] = indices
+        self._attrs["image"] = image
 
     ######################
     #    Constructors    #
@@ -41,8 +43,14 @@ class Bond(MutableMapping):
             raise ValueError("`indices` is a required attribute")
         indices = (indices[0], indices[1])
 
+        # process image
+        image = data.pop("image", None)
+        if image is None:
+            image = (0, 0, 0)
+        image = (image[0], image[1], image[2])
+
         # return instance
-        return cls(indices, **data)
+        return cls(indices, image, **data)
 
     #######################################
     #    MutableMapping Implementation    #
@@ -72,6 +80,16 @@ class Bond(MutableMapping):
         """Returns the index of each atom in the bond."""
         return self._attrs["indices"]
 
+    @property
+    def image(self) -> Tuple[int, int, int]:
+        """Returns the periodic image offset of the second atom in the bond."""
+        return self._attrs["image"]
+
+    @property
+    def is_periodic(self) -> bool:
+        """Returns True if the bond crosses a periodic boundary."""
+        return any(self._attrs["image"])
+
     ########################
     #    Public Methods    #
     ########################
@@ -7,3 +7,12 @@ DEG90 = np.pi / 2
 
 DEG120 = 2 * np.pi / 3
 """120 degrees in radians."""
+
+MAX_MEMORY = 2**28
+"""Default memory ceiling in bytes for chunked array operations."""
+
+BOLTZMANN = 8.617333262E-5
+"""Boltzmann constant in eV/K."""
+
+HARMONIC_ENERGY = 1.66053906660E-27 * 1E-20 * (2 * np.pi * 1E12)**2 / 1.602176634E-19
+"""Harmonic energy `m w^2 x^2` in eV of one atomic mass unit oscillating at 1 THz with an amplitude of 1 angstrom."""
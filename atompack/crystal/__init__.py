@@ -1,6 +1,18 @@
 """Abstractions for generating and modifying atomic structures with long range order."""
 
+from atompack.crystal.alloy import AlloyDecorator
+from atompack.crystal.boundary import BicrystalBuilder
 from atompack.crystal.components import Basis, LatticeParameters, LatticeVectors
 from atompack.crystal.crystal import Crystal, UnitCell
+from atompack.crystal.decomposition import DomainDecomposition
+from atompack.crystal.defects import DefectGenerator
+from atompack.crystal.detection import SymmetryAnalyzer
+from atompack.crystal.ensemble import PerturbationEnsemble
+from atompack.crystal.fingerprint import Fingerprint, StructureIndex
+from atompack.crystal.interface import InterfaceMatcher
+from atompack.crystal.mapped import MappedCrystal
+from atompack.crystal.matcher import StructureMatcher
+from atompack.crystal.neighbors import NeighborSearch
 from atompack.crystal.spatial import MillerIndex, Orientation, Plane
+from atompack.crystal.surface import SlabGenerator
 from atompack.crystal.transform import Transform
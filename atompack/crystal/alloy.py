@@ -0,0 +1,210 @@
+"""Random substitutional decoration of the sublattices of crystals."""
+
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from atompack.crystal.crystal import Crystal
+from atompack.crystal.neighbors import NeighborSearch
+
+
+class AlloyDecorator(object):
+    """Decorates a sublattice of a crystal with a random solid solution of a target composition.
+
+    Species are drawn for the whole sublattice at once as a seeded permutation of the exact number
+    of atoms of each specie. Optionally the draw is refined into a special quasirandom structure
+    by Monte Carlo swaps which drive the pair correlations of each neighbor shell towards those
+    of the ideal random alloy. Each swap only recounts the pairs of the two swapped atoms.
+
+    Args:
+        composition: Fraction of the sublattice occupied by each specie.
+        sublattice: Species or (N,) boolean mask of the atoms to decorate. Every atom is decorated by default.
+        seed: Seed of the random number generator which makes every decoration reproducible.
+
+    Example:
+        >>> from atompack.crystal import AlloyDecorator, Basis, Crystal, LatticeParameters, Transform, UnitCell
+        >>> from atompack.symmetry import Spacegroup
+        >>>
+        >>> # supercell of FCC copper
+        >>> unit_cell = UnitCell(Basis.primitive("Cu"), LatticeParameters.cubic(3.6), Spacegroup(225))
+        >>> crystal = Transform().supercell((4, 4, 4)).apply(Crystal(unit_cell))
+        >>>
+        >>> # equiatomic copper nickel solid solution
+        >>> decorator = AlloyDecorator({"Cu": 0.5, "Ni": 0.5}, sublattice="Cu", seed=0)
+        >>> crystal = decorator.apply(crystal)
+        >>> assert list(crystal.species).count("Ni") == 128
+    """
+
+    def __init__(self,
+                 composition: Dict[str, float],
+                 sublattice: Optional[Union[str, Iterable[str], np.ndarray]] = None,
+                 seed: Optional[int] = None) -> None:
+        fractions = np.array(list(composition.values()), dtype=float)
+        if len(fractions) == 0 or np.any(fractions < 0) or not np.isclose(np.sum(fractions), 1):
+            raise ValueError("`composition` must hold non-negative fractions which sum to 1")
+        self.composition = composition
+        self.sublattice = sublattice
+        self.seed = seed
+
+    ########################
+    #    Public Methods    #
+    ########################
+
+    def decorate(self,
+                 crystal: Crystal,
+                 cutoffs: Optional[Sequence[float]] = None,
+                 steps: int = 0,
+                 temperature: float = 0.0) -> np.ndarray:
+        """Returns the species of every atom after decoration without modifying the crystal.
+
+        Args:
+            crystal: The crystal to decorate.
+            cutoffs: Outer radius of each neighbor shell whose pair correlations are optimized.
+            steps: Number of attempted Monte Carlo swaps. No swaps are attempted by default.
+            temperature: Temperature of the Metropolis criterion in units of the squared correlation error.
+                Only swaps which do not increase the error are accepted by default.
+        """
+        rng = np.random.default_rng(self.seed)
+        species = crystal.species.astype(object)
+        sites = np.flatnonzero(self._mask(species))
+
+        # assign the exact count of each specie by largest remainder and shuffle them at once
+        fractions = np.array(list(self.composition.values()), dtype=float)
+        counts = np.floor(fractions * len(sites)).astype(int)
+        remainders = fractions * len(sites) - counts
+        counts[np.argsort(-remainders, kind="stable")[:len(sites) - np.sum(counts)]] += 1
+        types = rng.permutation(np.repeat(np.arange(len(fractions)), counts))
+
+        if cutoffs is not None and steps > 0 and len(sites) > 1:
+            edges, shells = self._edges(crystal, sites, cutoffs)
+            types = _anneal(types, edges, shells, len(cutoffs), len(fractions), steps, temperature, rng)
+        species[sites] = np.array(list(self.composition), dtype=object)[types]
+        return species.astype(str)
+
+    def apply(self,
+              crystal: Crystal,
+              cutoffs: Optional[Sequence[float]] = None,
+              steps: int = 0,
+              temperature: float = 0.0) -> Crystal:
+        """Decorates the crystal in place and returns it.
+
+        Args:
+            crystal: The crystal to decorate.
+            cutoffs: Outer radius of each neighbor shell whose pair correlations are optimized.
+            steps: Number of attempted Monte Carlo swaps. No swaps are attempted by default.
+            temperature: Temperature of the Metropolis criterion in units of the squared correlation error.
+                Only swaps which do not increase the error are accepted by default.
+        """
+        species = self.decorate(crystal, cutoffs, steps, temperature)
+        atoms = crystal.atoms
+        for index in np.flatnonzero(species != crystal.species):
+            atoms[index].specie = str(species[index])
+        return crystal
+
+    def short_range_order(self, crystal: Crystal, cutoffs: Sequence[float]) -> np.ndarray:
+        """Returns the Warren-Cowley parameters of the sublattice in each neighbor shell.
+
+        The parameter of shell `s` and species `a` and `b` is `1 - P(b | a) / x_b` where `P(b | a)`
+        is the probability of finding `b` next to `a` and `x_b` is the fraction of `b`.
+        It vanishes for an ideal random alloy.
+
+        Args:
+            crystal: A crystal whose sublattice only holds the species of the composition.
+            cutoffs: Outer radius of each neighbor shell.
+
+        Returns:
+            (S, K, K) parameters in the order of the species of the composition.
+        """
+        species = crystal.species
+        sites = np.flatnonzero(self._mask(species))
+        names = np.array(list(self.composition))
+        if not np.all(np.isin(species[sites], names)):
+            raise ValueError("the sublattice holds species which are not part of the composition")
+        order = np.argsort(names)
+        types = order[np.searchsorted(names[order], species[sites])]
+        edges, shells = self._edges(crystal, sites, cutoffs)
+        counts = _pair_counts(types, edges, shells, len(cutoffs), len(names))
+
+        # ordered pair counts of each shell
+        ordered = counts + np.transpose(counts, (0, 2, 1))
+        totals = np.sum(ordered, axis=2, keepdims=True)
+        fractions = np.bincount(types, minlength=len(names)) / len(types)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return 1 - ordered / totals / fractions[np.newaxis, np.newaxis, :]
+
+    #########################
+    #    Private Methods    #
+    #########################
+
+    def _mask(self, species: np.ndarray) -> np.ndarray:
+        # boolean mask of the atoms which belong to the sublattice
+        if self.sublattice is None:
+            return np.ones(len(species), dtype=bool)
+        if isinstance(self.sublattice, str):
+            return species == self.sublattice
+        mask = np.asarray(self.sublattice)
+        if mask.dtype == bool:
+            if mask.shape != species.shape:
+                raise ValueError("`sublattice` mask must hold one value per atom")
+            return mask
+        return np.isin(species, mask)
+
+    def _edges(self, crystal: Crystal, sites: np.ndarray, cutoffs: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+        # each undirected neighbor pair of the sublattice in local indices and its shell
+        radii = np.sort(np.asarray(cutoffs, dtype=float))
+        search = NeighborSearch(crystal.positions[sites], crystal.lattice_vectors, float(radii[-1]))
+        edges, shells = [], []
+        for i, j, distances, images in search.iter_pairs():
+            # keep one direction of each pair including the pairs of an atom with its own images
+            leading = images[np.arange(len(images)), np.argmax(images != 0, axis=1)]
+            mask = (i < j) | ((i == j) & (leading > 0))
+            edges.append(np.column_stack((i[mask], j[mask])))
+            shells.append(np.searchsorted(radii, distances[mask]))
+        return np.concatenate(edges), np.concatenate(shells)
+
+
+#########################
+#    Private Helpers    #
+#########################
+
+
+def _pair_counts(types: np.ndarray, edges: np.ndarray, shells: np.ndarray, n_shells: int,
+                 n_types: int) -> np.ndarray:
+    # (S, K, K) number of undirected pairs of each shell with the lower type first
+    a, b = types[edges[:, 0]], types[edges[:, 1]]
+    keys = (shells * n_types + np.minimum(a, b)) * n_types + np.maximum(a, b)
+    return np.bincount(keys, minlength=n_shells * n_types * n_types).reshape(n_shells, n_types, n_types)
+
+
+def _anneal(types: np.ndarray, edges: np.ndarray, shells: np.ndarray, n_shells: int, n_types: int, steps: int,
+            temperature: float, rng: np.random.Generator) -> np.ndarray:
+    # Metropolis swaps which minimize the squared error of the pair correlations
+    types = types.copy()
+    fractions = np.bincount(types, minlength=n_types) / len(types)
+    sizes = np.maximum(np.bincount(shells, minlength=n_shells), 1)
+    target = np.triu(2 * np.outer(fractions, fractions) - np.diag(fractions**2))
+    target = sizes[:, np.newaxis, np.newaxis] * target[np.newaxis, :, :]
+    weights = 1 / sizes[:, np.newaxis, np.newaxis]**2
+    counts = _pair_counts(types, edges, shells, n_shells, n_types)
+
+    # incident edges of every site in compressed sparse row order
+    ends = edges.reshape(-1)
+    incident = np.argsort(ends, kind="stable") // 2
+    pointers = np.concatenate(([0], np.cumsum(np.bincount(ends, minlength=len(types)))))
+
+    proposals = rng.integers(len(types), size=(steps, 2))
+    thresholds = rng.random(steps)
+    for (p, q), threshold in zip(proposals, thresholds):
+        if types[p] == types[q]:
+            continue
+        affected = np.union1d(incident[pointers[p]:pointers[p + 1]], incident[pointers[q]:pointers[q + 1]])
+        before = _pair_counts(types, edges[affected], shells[affected], n_shells, n_types)
+        types[p], types[q] = types[q], types[p]
+        after = _pair_counts(types, edges[affected], shells[affected], n_shells, n_types)
+        updated = counts - before + after
+        change = np.sum(weights * ((updated - target)**2 - (counts - target)**2))
+        if change <= 0 or (temperature > 0 and threshold < np.exp(-change / temperature)):
+            counts = updated
+        else:
+            types[p], types[q] = types[q], types[p]
+    return types
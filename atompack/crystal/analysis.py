@@ -0,0 +1,128 @@
+"""Structural analysis of crystals such as radial distribution functions and coordination numbers.
+
+Per-specie results are indexed in the sorted order of `np.unique(crystal.species)`.
+Every function accumulates neighbor pairs chunk by chunk and accepts an optional
+`concurrent.futures.Executor` to process the chunks in parallel.
+
+Note:
+    Thread pools are usually preferable because the KD-tree queries release the GIL.
+    Process pools pickle the neighbor search once per chunk.
+"""
+
+from concurrent.futures import Executor
+from functools import partial
+from itertools import repeat
+from typing import Callable, Iterable, Optional, Tuple
+
+import numpy as np
+
+from atompack.crystal.crystal import Crystal
+from atompack.crystal.neighbors import CHUNK_SIZE, NeighborSearch
+
+
+def radial_distribution(crystal: Crystal,
+                        cutoff: float,
+                        bins: int = 100,
+                        chunk_size: int = CHUNK_SIZE,
+                        executor: Optional[Executor] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns the radial distribution function of a crystal.
+
+    Args:
+        crystal: The crystal to analyze.
+        cutoff: Maximum radius.
+        bins: Number of histogram bins.
+        chunk_size: Number of central atoms processed per chunk.
+        executor: Optional pool used to process chunks in parallel.
+
+    Returns:
+        The (bins,) radii at each bin center, the (bins,) total g(r)
+        and the (S, S, bins) partial g(r) of each pair of species.
+    """
+    types, counts = _specie_types(crystal)
+    edges = np.linspace(0, cutoff, bins + 1)
+    search = NeighborSearch(crystal.positions, crystal.lattice_vectors, cutoff)
+    function = partial(_pair_histogram, types=types, n_species=len(counts), edges=edges)
+    histogram = sum(_map_chunks(function, search, chunk_size, executor), np.zeros(len(counts)**2 * bins))
+    histogram = histogram.reshape(len(counts), len(counts), bins)
+
+    # normalize by the ideal gas pair density in each spherical shell
+    volume = np.abs(np.linalg.det(crystal.lattice_vectors.vectors))
+    shells = 4 / 3 * np.pi * (edges[1:]**3 - edges[:-1]**3)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        partial_rdf = histogram * volume / (counts[:, np.newaxis, np.newaxis] * counts[np.newaxis, :, np.newaxis] *
+                                            shells)
+        total_rdf = histogram.sum(axis=(0, 1)) * volume / (len(types)**2 * shells)
+    radii = (edges[1:] + edges[:-1]) / 2
+    return radii, np.nan_to_num(total_rdf), np.nan_to_num(partial_rdf)
+
+
+def neighbor_counts(crystal: Crystal,
+                    cutoff: float,
+                    chunk_size: int = CHUNK_SIZE,
+                    executor: Optional[Executor] = None) -> np.ndarray:
+    """Returns the (N, S) number of neighbors of each specie around each atom.
+
+    Args:
+        crystal: The crystal to analyze.
+        cutoff: Maximum neighbor distance.
+        chunk_size: Number of central atoms processed per chunk.
+        executor: Optional pool used to process chunks in parallel.
+    """
+    types, counts = _specie_types(crystal)
+    search = NeighborSearch(crystal.positions, crystal.lattice_vectors, cutoff)
+    function = partial(_specie_counts, types=types, n_species=len(counts))
+    chunks = list(_map_chunks(function, search, chunk_size, executor))
+    if len(chunks) == 0:
+        return np.zeros((0, len(counts)), dtype=int)
+    return np.concatenate(chunks)
+
+
+def coordination_numbers(crystal: Crystal,
+                         cutoff: float,
+                         chunk_size: int = CHUNK_SIZE,
+                         executor: Optional[Executor] = None) -> np.ndarray:
+    """Returns the (N,) number of neighbors around each atom.
+
+    Args:
+        crystal: The crystal to analyze.
+        cutoff: Maximum neighbor distance.
+        chunk_size: Number of central atoms processed per chunk.
+        executor: Optional pool used to process chunks in parallel.
+    """
+    return neighbor_counts(crystal, cutoff, chunk_size, executor).sum(axis=1)
+
+
+#########################
+#    Private Helpers    #
+#########################
+
+
+def _specie_types(crystal: Crystal) -> Tuple[np.ndarray, np.ndarray]:
+    # integer specie type of each atom and the number of atoms of each type
+    _, types, counts = np.unique(crystal.species, return_inverse=True, return_counts=True)
+    return types.reshape(-1), counts
+
+
+def _map_chunks(function: Callable, search: NeighborSearch, chunk_size: int,
+                executor: Optional[Executor]) -> Iterable[np.ndarray]:
+    chunks = [slice(start, min(start + chunk_size, len(search))) for start in range(0, len(search), chunk_size)]
+    if executor is None:
+        return map(function, repeat(search, len(chunks)), chunks)
+    return executor.map(function, repeat(search, len(chunks)), chunks)
+
+
+def _pair_histogram(search: NeighborSearch, rows: slice, types: np.ndarray, n_species: int,
+                    edges: np.ndarray) -> np.ndarray:
+    bins = len(edges) - 1
+    i, j, distances, _ = search.pairs(rows)
+    indices = np.searchsorted(edges, distances, side="right") - 1
+    mask = (indices >= 0) & (indices < bins)
+    keys = (types[i[mask]] * n_species + types[j[mask]]) * bins + indices[mask]
+    return np.bincount(keys, minlength=n_species**2 * bins)
+
+
+def _specie_counts(search: NeighborSearch, rows: slice, types: np.ndarray, n_species: int) -> np.ndarray:
+    size = rows.stop - rows.start
+    i, j, _, _ = search.pairs(rows)
+    keys = (i - rows.start) * n_species + types[j]
+    return np.bincount(keys, minlength=size * n_species).reshape(size, n_species)
@@ -0,0 +1,200 @@
+"""Bicrystals of two rotated grains which meet at a boundary plane."""
+
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+from retworkx import PyGraph
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+from atompack.atom import Atom
+from atompack.constants import MAX_MEMORY
+from atompack.crystal.components import LatticeVectors
+from atompack.crystal.crystal import Crystal
+from atompack.crystal.spatial import Orientation, Plane
+
+MERGE_POLICIES = ("first", "second", "average")
+"""Policies which resolve atoms that are closer than the cutoff."""
+
+
+class BicrystalBuilder(object):
+    """Builds periodic bicrystals within an orthogonal cell.
+
+    Each grain is the bulk crystal rotated by its orientation and tiled over the cell with
+    vectorized lattice translations. The first grain fills the cell below the boundary plane
+    and the second grain fills the cell above it. Pairs of atoms which are closer than the cutoff
+    are found with a periodic KD-tree and resolved by the merge policy.
+
+    Pairs within a single grain only occur at the periodic seams of the cell when `size` is not
+    a period of that rotated lattice. A cell spanned by a coincident site lattice, such as one
+    from `crystal.coincidence.enumerate_csl`, is commensurate with both grains and has no seams.
+
+    Note:
+        Bonds are not carried over to the bicrystal.
+        Each atom is tagged with the index of its grain under the `grain` attribute.
+
+    Args:
+        crystal: The bulk crystal of the first grain.
+        size: Edge lengths of the orthogonal cell.
+        cutoff: Smallest allowed distance between atoms.
+        policy: One of `MERGE_POLICIES`. `first` and `second` keep the atoms of that grain and
+            remove their close neighbors from the other grain, while close pairs within a grain
+            keep their first atom. `average` replaces each cluster of close atoms by a single atom
+            of the lowest index at the centroid of the cluster.
+        other: The bulk crystal of the second grain. Defaults to `crystal`.
+        max_memory: Memory ceiling in bytes for each block of generated lattice translations.
+
+    Example:
+        >>> from atompack.crystal import (Basis, BicrystalBuilder, Crystal, LatticeParameters, MillerIndex,
+        ...                               Orientation, UnitCell)
+        >>> from atompack.symmetry import Spacegroup
+        >>>
+        >>> # FCC copper
+        >>> unit_cell = UnitCell(Basis.primitive("Cu"), LatticeParameters.cubic(3.6), Spacegroup(225))
+        >>> builder = BicrystalBuilder(Crystal(unit_cell), size=(14.4, 14.4, 28.8), cutoff=1.0)
+        >>>
+        >>> # grains of identical orientation form a perfect crystal
+        >>> orientation = Orientation.from_miller_indices(MillerIndex((0, 0, 1)), MillerIndex((1, 0, 0)))
+        >>> bicrystal = builder.build(orientation, orientation)
+        >>> assert len(bicrystal.atoms) == 4 * 4 * 4 * 8
+    """
+
+    def __init__(self,
+                 crystal: Crystal,
+                 size: Tuple[float, float, float],
+                 cutoff: float,
+                 policy: str = "first",
+                 other: Optional[Crystal] = None,
+                 max_memory: int = MAX_MEMORY) -> None:
+        if policy not in MERGE_POLICIES:
+            raise ValueError(f"`policy` must be one of {MERGE_POLICIES}")
+        if cutoff <= 0:
+            raise ValueError("`cutoff` must be positive")
+        self.crystal = crystal
+        self.other = crystal if other is None else other
+        self.size = np.array(size, dtype=float)
+        self.cutoff = cutoff
+        self.policy = policy
+        self.max_memory = max_memory
+
+    ########################
+    #    Public Methods    #
+    ########################
+
+    def build(self,
+              first: Orientation,
+              second: Orientation,
+              plane: Optional[Plane] = None,
+              translation: Optional[np.ndarray] = None) -> Crystal:
+        """Returns the bicrystal of two oriented grains.
+
+        Args:
+            first: Orientation of the first grain.
+            second: Orientation of the second grain.
+            plane: Boundary plane with coplanar points in cartesian coordinates of the cell.
+                The first grain lies on the negative side of its normal.
+                Defaults to the plane normal to z through the center of the cell.
+            translation: Rigid body translation of the second grain in cartesian coordinates.
+        """
+        if plane is None:
+            height = self.size[2] / 2
+            plane = Plane(np.array([[0, 0, height], [0, 1, height], [1, 0, height]], dtype=float))
+        if translation is None:
+            translation = np.zeros(3)
+
+        # generate the sites of both grains on their own side of the boundary
+        indices_a, positions_a = self._grain(self.crystal, first, np.zeros(3))
+        mask = plane.signed_distances(positions_a) < 0
+        indices_a, positions_a = indices_a[mask], positions_a[mask]
+        indices_b, positions_b = self._grain(self.other, second, np.asarray(translation, dtype=float))
+        mask = plane.signed_distances(positions_b) >= 0
+        indices_b, positions_b = indices_b[mask], positions_b[mask]
+
+        # resolve close pairs across every periodic image of the boundary and the seams of the cell
+        grains = np.concatenate((np.zeros(len(indices_a), dtype=int), np.ones(len(indices_b), dtype=int)))
+        indices = np.concatenate((indices_a, indices_b))
+        positions = np.concatenate((positions_a, positions_b))
+        keep, positions = self._merge(positions, grains)
+
+        graph = PyGraph()
+        sources = (self.crystal.atoms, self.other.atoms)
+        atoms = []
+        for grain, index, position in zip(grains[keep], indices[keep], positions[keep]):
+            atom = sources[grain][index]
+            attrs = {key: value for key, value in atom.items() if key not in ("specie", "position")}
+            attrs["grain"] = int(grain)
+            atoms.append(Atom(atom.specie, position, **attrs))
+        graph.add_nodes_from(atoms)
+        return Crystal(self.crystal.unit_cell, LatticeVectors(np.diag(self.size)), graph)
+
+    #########################
+    #    Private Methods    #
+    #########################
+
+    def _grain(self, crystal: Crystal, orientation: Orientation,
+               translation: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # returns the bulk atom index and position of every rotated site within the cell
+        if not orientation.single:
+            raise ValueError("each grain must be oriented by a single orientation")
+        vectors = orientation.apply(crystal.lattice_vectors.vectors)
+        sites = orientation.apply(crystal.positions).reshape(-1, 3) + translation
+        if len(sites) == 0:
+            return np.empty(0, dtype=int), np.empty((0, 3))
+
+        # lattice translations whose sites may fall within the cell
+        low, high = -sites.max(axis=0), self.size - sites.min(axis=0)
+        corners = low + np.array(list(np.ndindex(2, 2, 2))) * (high - low)
+        fractional = np.matmul(corners, np.linalg.inv(vectors))
+        lower = np.floor(fractional.min(axis=0)).astype(int)
+        upper = np.ceil(fractional.max(axis=0)).astype(int)
+
+        indices, positions = [], []
+        for cells in self._cell_blocks(lower, upper, len(sites)):
+            candidates = (np.matmul(cells, vectors)[:, np.newaxis, :] + sites[np.newaxis, :, :]).reshape(-1, 3)
+            mask = np.all((candidates >= 0) & (candidates < self.size), axis=1)
+            indices.append(np.tile(np.arange(len(sites)), len(cells))[mask])
+            positions.append(candidates[mask])
+        return np.concatenate(indices), np.concatenate(positions)
+
+    def _cell_blocks(self, lower: np.ndarray, upper: np.ndarray, n_sites: int) -> Iterator[np.ndarray]:
+        # yields blocks of lattice translations along the first axis within the memory ceiling
+        shape = upper - lower + 1
+        per_slice = int(np.prod(shape[1:])) * n_sites * 3 * 8 * 4
+        step = max(1, self.max_memory // max(1, per_slice))
+        rest = np.array(list(np.ndindex(*shape[1:]))) + lower[1:]
+        for start in range(lower[0], upper[0] + 1, step):
+            first = np.arange(start, min(start + step, upper[0] + 1))
+            yield np.column_stack((np.repeat(first, len(rest)), np.tile(rest, (len(first), 1))))
+
+    def _merge(self, positions: np.ndarray, grains: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # returns a mask of the atoms which survive and their merged positions
+        keep = np.ones(len(positions), dtype=bool)
+        if len(positions) == 0:
+            return keep, positions
+        tree = cKDTree(positions, boxsize=self.size)
+        i, j = tree.query_pairs(self.cutoff, output_type="ndarray").T
+        if self.policy in ("first", "second"):
+            # pairs across the boundary lose the atom of the other grain
+            preferred = MERGE_POLICIES.index(self.policy)
+            across = grains[i] != grains[j]
+            keep[np.where(grains[i] == preferred, j, i)[across]] = False
+            # pairs within a grain across the periodic seams of the cell lose their later atom
+            within = ~across & keep[i] & keep[j]
+            keep[j[within]] = False
+        else:
+            # each connected cluster of close atoms collapses onto its lowest index
+            adjacency = coo_matrix((np.ones(len(i)), (i, j)), shape=(len(positions), len(positions)))
+            _, labels = connected_components(adjacency, directed=False)
+            first = np.full(labels.max() + 1, len(positions))
+            np.minimum.at(first, labels, np.arange(len(positions)))
+            keep[:] = False
+            keep[first] = True
+            # average the minimum image displacements from the kept atom of each cluster
+            displacements = positions - positions[first[labels]]
+            displacements -= self.size * np.round(displacements / self.size)
+            counts = np.bincount(labels)
+            means = np.column_stack([np.bincount(labels, weights=d) for d in displacements.T]) / counts[:, np.newaxis]
+            positions = positions.copy()
+            positions[first] = (positions[first] + means) % self.size
+        return keep, positions
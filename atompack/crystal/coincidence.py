@@ -0,0 +1,209 @@
+"""Enumeration of coincident site lattice misorientations of arbitrary lattices."""
+
+from typing import Iterable, List, NamedTuple, Optional
+
+import numpy as np
+from scipy.spatial.transform import Rotation
+
+from atompack.constants import MAX_MEMORY
+from atompack.crystal.components import LatticeVectors
+from atompack.crystal.reduction import reduce_lattice
+from atompack.crystal.spatial import Orientation
+
+
+class CoincidenceSiteLattice(NamedTuple):
+    """Coincident site lattice of a lattice and a rotated copy of itself.
+
+    Attributes:
+        sigma: Reciprocal density of coincident sites.
+        axis: Integer direction of the rotation axis in lattice units.
+        angle: Rotation angle in radians.
+        orientation: Rotation of the second lattice.
+        matrix: Integer rows of the reduced coincident site lattice vectors in lattice units.
+        vectors: Reduced coincident site lattice vectors in cartesian coordinates.
+    """
+    sigma: int
+    axis: np.ndarray
+    angle: float
+    orientation: Orientation
+    matrix: np.ndarray
+    vectors: np.ndarray
+
+    @property
+    def volume(self) -> float:
+        """Returns the volume of the minimal periodic cell."""
+        return float(np.abs(np.linalg.det(self.vectors)))
+
+
+def enumerate_csl(lattice_vectors: LatticeVectors,
+                  axes: Iterable[Iterable[int]],
+                  max_sigma: int,
+                  max_length: Optional[float] = None,
+                  tol: float = 1E-6,
+                  max_memory: int = MAX_MEMORY) -> List[CoincidenceSiteLattice]:
+    """Returns the coincident site lattices of rotations about each axis sorted by cell size.
+
+    Candidate angles are the rotations which map one lattice vector onto another of equal length
+    and equal projection onto the axis. Every lattice vector within the radius which must contain
+    a coincident site of any rotation with `sigma <= max_sigma` is enumerated and paired at once.
+    All candidates are then tested for rational lattice coordinates in a single vectorized pass
+    and sigma is the index of the intersection of both lattices.
+
+    Note:
+        Angles which are equivalent under the symmetry of the lattice are listed separately.
+
+    Args:
+        lattice_vectors: The lattice.
+        axes: Integer directions of the rotation axes in lattice units.
+        max_sigma: Largest sigma to include.
+        max_length: Largest allowed length of the reduced coincident site lattice vectors.
+        tol: Tolerance of the rational lattice coordinates of the rotation.
+        max_memory: Memory ceiling in bytes for each block of tested candidates.
+
+    Returns:
+        Coincident site lattices sorted by volume, longest reduced vector, axis and angle.
+
+    Example:
+        >>> from atompack.crystal import LatticeVectors
+        >>> from atompack.crystal.coincidence import enumerate_csl
+        >>> import numpy as np
+        >>>
+        >>> # tilt boundaries of a simple cubic lattice about [001]
+        >>> res = enumerate_csl(LatticeVectors(np.identity(3)), [(0, 0, 1)], max_sigma=13)
+        >>> assert [csl.sigma for csl in res] == [5] * 4 + [13] * 4
+        >>> assert np.isclose(np.degrees(res[0].angle), 36.87, atol=1E-2)
+    """
+    vectors = lattice_vectors.vectors
+    volume = np.abs(np.linalg.det(vectors))
+
+    # any coincident site lattice holds two independent vectors within this radius and at most one is along the axis
+    shortest = np.min(np.linalg.norm(np.matmul(reduce_lattice(vectors)[1], vectors), axis=1))
+    radius = np.sqrt(np.sqrt(2) * max_sigma * volume / shortest) + tol
+    bounds = np.ceil(radius * np.linalg.norm(np.linalg.inv(vectors), axis=0)).astype(int)
+    grid = np.array(list(np.ndindex(*(2 * bounds + 1)))) - bounds
+    cartesian = np.matmul(grid, vectors)
+    norms = np.linalg.norm(cartesian, axis=1)
+    grid, cartesian, norms = grid[norms <= radius], cartesian[norms <= radius], norms[norms <= radius]
+
+    res = []
+    seen = set()
+    for axis in axes:
+        axis = np.array(axis, dtype=int)
+        if not np.any(axis):
+            raise ValueError("rotation axes must not be zero")
+        axis //= np.gcd.reduce(axis)
+        if tuple(axis) in seen:
+            continue
+        seen.add(tuple(axis))
+        angles = _candidate_angles(np.matmul(axis, vectors), cartesian, norms, tol)
+        res.extend(_test_candidates(vectors, axis, angles, max_sigma, tol, max_memory))
+
+    if max_length is not None:
+        res = [csl for csl in res if np.max(np.linalg.norm(csl.vectors, axis=1)) <= max_length + tol]
+    return sorted(res, key=lambda csl: (round(csl.volume / tol), np.max(np.linalg.norm(csl.vectors, axis=1)),
+                                        tuple(csl.axis), csl.angle))
+
+
+#########################
+#    Private Helpers    #
+#########################
+
+
+def _candidate_angles(axis: np.ndarray, cartesian: np.ndarray, norms: np.ndarray, tol: float) -> np.ndarray:
+    # angles in (0, pi] which rotate a lattice vector onto another of equal length and equal axial projection
+    axis = axis / np.linalg.norm(axis)
+    heights = np.matmul(cartesian, axis)
+    perpendicular = cartesian - np.outer(heights, axis)
+    mask = np.linalg.norm(perpendicular, axis=1) > tol
+    perpendicular, keys = perpendicular[mask], np.round(np.column_stack((norms[mask], heights[mask])) / tol)
+
+    # angle of each perpendicular component within the plane normal to the axis
+    reference = np.cross(axis, np.identity(3)[np.argmin(np.abs(axis))])
+    reference /= np.linalg.norm(reference)
+    phi = np.arctan2(np.matmul(perpendicular, np.cross(axis, reference)), np.matmul(perpendicular, reference))
+
+    # pair every vector with every other vector of its group
+    _, groups = np.unique(keys, axis=0, return_inverse=True)
+    groups = groups.reshape(-1)
+    order = np.argsort(groups, kind="stable")
+    starts = np.flatnonzero(np.r_[True, np.diff(groups[order]) != 0])
+    sizes = np.diff(np.r_[starts, len(order)])
+    angles = []
+    for start, size in zip(starts[sizes > 1], sizes[sizes > 1]):
+        members = phi[order[start:start + size]]
+        angles.append((members[np.newaxis, :] - members[:, np.newaxis]).reshape(-1))
+    if len(angles) == 0:
+        return np.empty(0)
+    angles = np.mod(np.concatenate(angles), 2 * np.pi)
+    angles = angles[(angles > tol) & (angles <= np.pi + tol)]
+    _, unique = np.unique(np.round(angles / tol), return_index=True)
+    return angles[unique]
+
+
+def _test_candidates(vectors: np.ndarray, axis: np.ndarray, angles: np.ndarray, max_sigma: int, tol: float,
+                     max_memory: int) -> List[CoincidenceSiteLattice]:
+    # keeps the rotations with rational lattice coordinates and builds their coincident site lattices
+    if len(angles) == 0:
+        return []
+    direction = np.matmul(axis, vectors)
+    rotvecs = np.outer(angles, direction / np.linalg.norm(direction))
+    rotations = Rotation.from_rotvec(rotvecs).as_matrix()
+    # rotated lattice points in lattice units are `x @ transforms` for integer rows `x`
+    transforms = np.einsum("ij,nkj,kl->nil", vectors, rotations, np.linalg.inv(vectors))
+
+    # the smallest denominator of every candidate divides its sigma
+    denominators = np.zeros(len(angles), dtype=int)
+    scales = np.arange(1, max_sigma + 1)
+    block = max(1, max_memory // (8 * 9 * 3 * len(scales)))
+    for start in range(0, len(angles), block):
+        scaled = scales[np.newaxis, :, np.newaxis, np.newaxis] * transforms[start:start + block, np.newaxis]
+        integral = np.all(np.abs(scaled - np.round(scaled)) <= tol * scales[np.newaxis, :, np.newaxis, np.newaxis],
+                          axis=(2, 3))
+        denominators[start:start + block] = np.where(np.any(integral, axis=1), np.argmax(integral, axis=1) + 1, 0)
+
+    res = []
+    for index in np.flatnonzero(denominators > 1):
+        matrix = _intersection(transforms[index], tol)
+        sigma = int(round(abs(np.linalg.det(matrix))))
+        if sigma > max_sigma:
+            continue
+        reduced, reduction = reduce_lattice(np.matmul(matrix, vectors))
+        orientation = Orientation(Rotation.from_matrix(rotations[index]).as_quat())
+        res.append(CoincidenceSiteLattice(sigma, axis, float(angles[index]), orientation, np.matmul(reduction, matrix),
+                                          reduced))
+    return res
+
+
+def _intersection(transform: np.ndarray, tol: float) -> np.ndarray:
+    # integer basis of the lattice points shared by the integer lattice and its image under `transform`
+    inverse = np.linalg.inv(transform)
+    denominator = _denominator(inverse, tol)
+    # the dual of the intersection is the sum of both dual lattices
+    generators = np.vstack((denominator * np.identity(3), denominator * inverse.T))
+    dual = _lattice_basis(np.round(generators).astype(np.int64))
+    return np.round(denominator * np.linalg.inv(dual).T).astype(int)
+
+
+def _denominator(matrix: np.ndarray, tol: float) -> int:
+    scale = 1
+    while np.any(np.abs(scale * matrix - np.round(scale * matrix)) > tol * scale):
+        scale += 1
+    return scale
+
+
+def _lattice_basis(rows: np.ndarray) -> np.ndarray:
+    # triangular basis of the lattice generated by integer rows via Euclidean row reduction
+    rows = rows.copy()
+    basis = []
+    for column in range(rows.shape[1]):
+        while True:
+            nonzero = np.flatnonzero(rows[:, column])
+            if len(nonzero) <= 1:
+                break
+            pivot = nonzero[np.argmin(np.abs(rows[nonzero, column]))]
+            others = nonzero[nonzero != pivot]
+            rows[others] -= (rows[others, column] // rows[pivot, column])[:, np.newaxis] * rows[pivot]
+        if len(nonzero) == 1:
+            basis.append(rows[nonzero[0]])
+            rows = np.delete(rows, nonzero[0], axis=0)
+    return np.array(basis)
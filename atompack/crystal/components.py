@@ -7,6 +7,7 @@ import numpy as np
 import orjson
 
 from atompack.constants import DEG90, DEG120
+from atompack.crystal.reduction import delaunay_reduce, niggli_reduce, reduce_lattice
 from atompack.symmetry import Spacegroup
 
 
@@ -88,38 +89,35 @@ class Basis(MutableSequence):
     #    Public Methods    #
     ########################
 
-    def apply_spacegroup(self, spacegroup: Spacegroup) -> List[Tuple[str, np.ndarray]]:
+    def apply_spacegroup(self, spacegroup: Spacegroup, tolerance: float = 1E-6) -> List[Tuple[str, np.ndarray]]:
         """Returns a list of specie/site pairs generated by applying a spacegroup's
-        symmetry operations to the atomic basis."""
-        # search tolerance
-        tolerance = 1E-6
+        symmetry operations to the atomic basis.
 
-        # skip process if no sites exist
-        if len(self) == 0:
-            return []
+        Each site is located on its Wyckoff position and expanded directly into the equivalent
+        sites of that position beginning with the site itself, so no trial expansion is required.
 
-        res = [self._basis[0]]
+        Args:
+            spacegroup: The spacegroup to apply.
+            tolerance: Fractional distance within which sites are considered to coincide.
+        """
+        res: List[Tuple[str, np.ndarray]] = []
+        generated = np.zeros((0, 3))
         # iterate over basis
         for specie, site in self._basis:
-            # iterate through the spacegroup's general position expressions
-            for genpos in spacegroup.genpos:
-                # convert string expressions to arrays
-                genpos = "[{}]".format(genpos)
-                # x, y, and z are created here to be used in the eval statement
-                x, y, z = site[0], site[1], site[2]
-                new_site = np.array(eval(genpos))
-                # wrap all values between 0-1
-                for i in range(len(new_site)):
-                    if new_site[i] < 0:
-                        new_site[i] += 1
-                # check if equivalent site exists
-                is_occupied = False
-                for _, _site in res:
-                    if np.linalg.norm(new_site - _site) < tolerance:
-                        is_occupied = True
-                # store unique sites
-                if not is_occupied:
-                    res.append((specie, new_site))
+            # skip sites which were generated by a previous site
+            if len(generated) > 0:
+                displacements = generated - site
+                displacements -= np.round(displacements)
+                if np.min(np.linalg.norm(displacements, axis=1)) < tolerance:
+                    continue
+            wyckoff, parameters = spacegroup.find_wyckoff(site, tolerance)
+            sites = wyckoff.positions(parameters)
+            # begin with the equivalent site nearest to the given site
+            displacements = sites - site
+            displacements -= np.round(displacements)
+            sites = np.roll(sites, -np.argmin(np.linalg.norm(displacements, axis=1)), axis=0)
+            res.extend((specie, new_site) for new_site in sites)
+            generated = np.vstack((generated, sites))
         return res
 
     def to_json(self) -> str:
@@ -208,6 +206,14 @@ class LatticeParameters(object):
         """Initializes with cubic constraints."""
         return cls(a, a, a, DEG90, DEG90, DEG90)
 
+    @classmethod
+    def from_lattice_vectors(cls, lattice_vectors: 'LatticeVectors') -> 'LatticeParameters':
+        """Initializes from the lengths of and angles between lattice vectors."""
+        a, b, c = lattice_vectors.vectors
+        angle = lambda u, v: float(np.arccos(np.clip(np.dot(u, v) / (np.linalg.norm(u) * np.linalg.norm(v)), -1, 1)))
+        lengths = np.linalg.norm(lattice_vectors.vectors, axis=1)
+        return cls(float(lengths[0]), float(lengths[1]), float(lengths[2]), angle(b, c), angle(a, c), angle(a, b))
+
     @classmethod
     def from_json(cls, s: str) -> 'LatticeParameters':
         """Initializes from a JSON string."""
@@ -266,7 +272,16 @@ class LatticeVectors(object):
 
     @classmethod
     def from_lattice_parameters(cls, lattice_parameters: LatticeParameters) -> 'LatticeVectors':
-        return cls(np.sqrt(np.abs(lattice_parameters.metric_tensor)))
+        """Initializes from lattice parameters with `a` along x and `b` in the xy plane."""
+        a, b, c = lattice_parameters.a, lattice_parameters.b, lattice_parameters.c
+        cos = np.cos([lattice_parameters.alpha, lattice_parameters.beta, lattice_parameters.gamma])
+        # remove floating point noise from right angles
+        cos[np.abs(cos) < 1E-12] = 0
+        sin_gamma = np.sqrt(1 - cos[2]**2)
+        cx = cos[1]
+        cy = (cos[0] - cos[1] * cos[2]) / sin_gamma
+        cz = np.sqrt(1 - cx**2 - cy**2)
+        return cls(np.array([[a, 0, 0], [b * cos[2], b * sin_gamma, 0], [c * cx, c * cy, c * cz]]))
 
     @classmethod
     def from_json(cls, s: str) -> 'LatticeVectors':
@@ -289,6 +304,62 @@ class LatticeVectors(object):
     #    Public Methods    #
     ########################
 
+    def is_orthogonal(self, tol: float = 1E-6) -> bool:
+        """Returns True if all lattice vectors are mutually orthogonal."""
+        metric = np.matmul(self.vectors, self.vectors.T)
+        scale = np.max(np.abs(np.diag(metric)))
+        return np.allclose(metric - np.diag(np.diag(metric)), 0, atol=tol * scale)
+
+    def to_fractional(self, points: np.ndarray) -> np.ndarray:
+        """Converts one or more cartesian points into fractional coordinates."""
+        return np.matmul(points, np.linalg.inv(self.vectors))
+
+    def to_cartesian(self, points: np.ndarray) -> np.ndarray:
+        """Converts one or more fractional points into cartesian coordinates."""
+        return np.matmul(points, self.vectors)
+
+    def minimum_image(self, displacements: np.ndarray) -> np.ndarray:
+        """Returns the shortest periodic image of one or more displacement vectors.
+
+        Note:
+            Skewed lattices are first reduced to a Minkowski basis and the 27 nearest
+            images of the reduced lattice are searched, which is exact for any lattice.
+        """
+        if self.is_orthogonal():
+            fractional = self.to_fractional(displacements)
+            return self.to_cartesian(fractional - np.round(fractional))
+        # wrap the displacements on the reduced lattice which describes the same periodicity
+        vectors, _ = reduce_lattice(self.vectors)
+        fractional = np.matmul(displacements, np.linalg.inv(vectors))
+        res = np.matmul(fractional - np.round(fractional), vectors)
+        # search the neighboring images of the wrapped displacement
+        shifts = np.matmul(np.array(list(np.ndindex(3, 3, 3))) - 1, vectors)
+        candidates = res[..., np.newaxis, :] + shifts
+        nearest = np.argmin(np.einsum("...ij,...ij->...i", candidates, candidates), axis=-1)
+        return np.take_along_axis(candidates, nearest[..., np.newaxis, np.newaxis], axis=-2)[..., 0, :]
+
+    def niggli_reduce(self, tol: float = 1E-5) -> Tuple['LatticeVectors', np.ndarray]:
+        """Returns the Niggli reduced lattice vectors and the integer matrix mapping onto them.
+
+        The reduced vectors satisfy `reduced.vectors = matrix @ self.vectors`.
+
+        Args:
+            tol: Relative tolerance of the metric comparisons.
+        """
+        vectors, matrix = niggli_reduce(self.vectors, tol)
+        return LatticeVectors(vectors), matrix
+
+    def delaunay_reduce(self, tol: float = 1E-5) -> Tuple['LatticeVectors', np.ndarray]:
+        """Returns the Delaunay reduced lattice vectors and the integer matrix mapping onto them.
+
+        The reduced vectors satisfy `reduced.vectors = matrix @ self.vectors`.
+
+        Args:
+            tol: Relative tolerance of the scalar products.
+        """
+        vectors, matrix = delaunay_reduce(self.vectors, tol)
+        return LatticeVectors(vectors), matrix
+
     def contain(self, point: np.ndarray, tol: float = 1E-6) -> bool:
         """Returns True if the point is within the bounding volume."""
         bounds = np.linalg.norm(self.vectors, axis=0)
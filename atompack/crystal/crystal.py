@@ -2,7 +2,7 @@
 Unit cells act as templates to create crystals with arbitrary transformations applied to them."""
 
 import copy
-from typing import Optional
+from typing import Iterator, Optional, Tuple
 
 import numpy as np
 import orjson
@@ -10,7 +10,10 @@ from retworkx import PyGraph
 
 from atompack.atom import Atom
 from atompack.bond import Bond
+from atompack.constants import MAX_MEMORY
 from atompack.crystal.components import Basis, LatticeParameters, LatticeVectors
+from atompack.crystal.ordering import BITS, curve_keys
+from atompack.crystal.reduction import niggli_reduce
 from atompack.symmetry import Spacegroup
 from atompack.topology import Topology
 
@@ -131,7 +134,7 @@ class UnitCell(Topology):
     def _build(self) -> None:
         vectors = LatticeVectors.from_lattice_parameters(self.lattice_parameters).vectors
         for specie, site in self.basis.apply_spacegroup(self.spacegroup):
-            position = site * np.linalg.norm(vectors, axis=0)
+            position = np.matmul(site, vectors)
             self.insert_atoms(Atom(specie, position))
 
 
@@ -145,7 +148,7 @@ class Crystal(Topology):
     def __init__(
         self,
         unit_cell: UnitCell,
-        _lattice_vectors: Optional[np.ndarray] = None,
+        _lattice_vectors: Optional[LatticeVectors] = None,
         _graph: Optional[PyGraph] = None,
     ) -> None:
         # initialize superclass
@@ -209,6 +212,191 @@ class Crystal(Topology):
     #    Public Methods    #
     ########################
 
+    def distances(self, i: np.ndarray, j: np.ndarray, max_memory: int = MAX_MEMORY) -> np.ndarray:
+        """Returns the minimum image distance between each pair of atoms.
+
+        Args:
+            i: Index of the first atom in each pair.
+            j: Index of the second atom in each pair.
+            max_memory: Memory ceiling in bytes for each processed block.
+        """
+        i = np.asarray(i, dtype=int)
+        j = np.asarray(j, dtype=int)
+        if i.shape != j.shape:
+            raise ValueError("`i` and `j` must have the same shape")
+        positions = self.positions
+        res = np.empty(i.shape)
+        for block in self._blocks(len(i), 1, max_memory):
+            displacements = positions[j[block]] - positions[i[block]]
+            res[block] = np.linalg.norm(self.lattice_vectors.minimum_image(displacements), axis=-1)
+        return res
+
+    def distance_matrix(self,
+                        subset: Optional[np.ndarray] = None,
+                        max_memory: int = MAX_MEMORY,
+                        out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Returns the minimum image distance matrix.
+
+        Args:
+            subset: Indices of the atoms to include. All atoms are included by default.
+            max_memory: Memory ceiling in bytes for each processed block.
+            out: Preallocated output array such as a `np.memmap`.
+        """
+        size = len(self.positions) if subset is None else len(subset)
+        if out is None:
+            out = np.empty((size, size))
+        for rows, block in self.iter_distance_matrix(subset, max_memory):
+            out[rows] = block
+        return out
+
+    def iter_distance_matrix(self,
+                             subset: Optional[np.ndarray] = None,
+                             max_memory: int = MAX_MEMORY) -> Iterator[Tuple[slice, np.ndarray]]:
+        """Yields consecutive row blocks of the minimum image distance matrix.
+
+        Args:
+            subset: Indices of the atoms to include. All atoms are included by default.
+            max_memory: Memory ceiling in bytes for each processed block.
+        """
+        positions = self.positions
+        if subset is not None:
+            positions = positions[np.asarray(subset, dtype=int)]
+        for rows in self._blocks(len(positions), len(positions), max_memory):
+            displacements = positions[np.newaxis, :, :] - positions[rows, np.newaxis, :]
+            yield rows, np.linalg.norm(self.lattice_vectors.minimum_image(displacements), axis=-1)
+
+    def angles(self, triplets: np.ndarray, max_memory: int = MAX_MEMORY) -> np.ndarray:
+        """Returns the minimum image angle in radians at the central atom of each triplet.
+
+        Args:
+            triplets: (N, 3) array of atom indices where the second index is the vertex.
+            max_memory: Memory ceiling in bytes for each processed block.
+        """
+        triplets = np.asarray(triplets, dtype=int).reshape(-1, 3)
+        positions = self.positions
+        res = np.empty(len(triplets))
+        for block in self._blocks(len(triplets), 2, max_memory):
+            i, j, k = triplets[block].T
+            a = self.lattice_vectors.minimum_image(positions[i] - positions[j])
+            b = self.lattice_vectors.minimum_image(positions[k] - positions[j])
+            cos = np.einsum("ij,ij->i", a, b) / (np.linalg.norm(a, axis=-1) * np.linalg.norm(b, axis=-1))
+            res[block] = np.arccos(np.clip(cos, -1, 1))
+        return res
+
+    def reorder(self, curve: str = "morton", bits: int = BITS) -> np.ndarray:
+        """Sorts the atoms in place along a space-filling curve through their fractional coordinates.
+
+        Spatially close atoms end up close in memory, which speeds up neighbor searches and the
+        codes which consume the crystal. Atoms keep all of their properties and every bond is
+        remapped onto the new indices with its image unchanged.
+
+        Args:
+            curve: Either 'morton' for the Z-order curve or 'hilbert' for the Hilbert curve.
+            bits: Resolution of the curve in bits per axis between 1 and 21.
+
+        Returns:
+            The permutation such that new atom `k` is old atom `permutation[k]`.
+
+        Example:
+            >>> from atompack.crystal import Transform
+            >>>
+            >>> # supercells are generated image by image
+            >>> unit_cell = UnitCell(Basis.primitive("Cu"), LatticeParameters.cubic(3.6), Spacegroup(225))
+            >>> crystal = Transform().supercell((4, 4, 4)).apply(Crystal(unit_cell))
+            >>> positions = crystal.positions
+            >>>
+            >>> # atoms of the same octant of the supercell become contiguous
+            >>> permutation = crystal.reorder("hilbert")
+            >>> assert np.allclose(crystal.positions, positions[permutation])
+            >>> octants = np.floor(crystal.lattice_vectors.to_fractional(crystal.positions) * 2) @ [4, 2, 1]
+            >>> assert np.count_nonzero(np.diff(octants)) == 7
+        """
+        order = np.argsort(curve_keys(self.lattice_vectors.to_fractional(self.positions), curve, bits), kind="stable")
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(len(order))
+
+        graph = PyGraph()
+        atoms = self.atoms
+        graph.add_nodes_from([atoms[k] for k in order])
+        # bonds keep their orientation and image between the renumbered atoms
+        bonds = self.bonds
+        if len(bonds) > 0:
+            edges = inverse[self._node_positions()[np.array(self._graph.edge_list(), dtype=int).reshape(-1, 2)]]
+            rows = []
+            for bond, (i, j) in zip(bonds, edges.tolist()):
+                bond["indices"] = (i, j)
+                rows.append((i, j, bond))
+            graph.add_edges_from(rows)
+        # a new graph also detaches the crystal from the graph of its unit cell
+        self._graph = graph
+        self._fragment_ids = None
+        return order
+
+    def to_primitive(self, symprec: float = 1E-2) -> Tuple['Crystal', np.ndarray]:
+        """Returns the equivalent crystal on a Niggli reduced primitive lattice.
+
+        Atoms are copied from the first translated copy of each primitive site
+        and periodic bonds are remapped onto the primitive lattice.
+
+        Args:
+            symprec: Distance tolerance between translated copies of each atom.
+
+        Returns:
+            The primitive crystal and the integer matrix which maps its lattice vectors
+            back onto the lattice vectors of this crystal as `matrix @ primitive.lattice_vectors.vectors`.
+
+        Example:
+            >>> from atompack.crystal import Transform
+            >>>
+            >>> # supercell of a conventional FCC cell
+            >>> unit_cell = UnitCell(Basis.primitive("Cu"), LatticeParameters.cubic(3.6), Spacegroup(225))
+            >>> crystal = Transform().supercell((2, 2, 2)).apply(Crystal(unit_cell))
+            >>> assert len(crystal.atoms) == 32
+            >>>
+            >>> # the primitive cell holds a single atom
+            >>> primitive, matrix = crystal.to_primitive()
+            >>> assert len(primitive.atoms) == 1
+            >>> assert round(np.linalg.det(matrix)) == 32
+        """
+        # avoid a circular import
+        from atompack.crystal.detection import find_primitive
+
+        vectors = self.lattice_vectors.vectors
+        positions = self.positions
+        _, types = np.unique(self.species, return_inverse=True)
+        matrix, labels = find_primitive(vectors, self.lattice_vectors.to_fractional(positions), types, symprec)
+        primitive, reduction = niggli_reduce(np.matmul(matrix, vectors))
+        lattice_vectors = LatticeVectors(primitive)
+        _, first = np.unique(labels, return_index=True)
+
+        graph = PyGraph()
+        atoms = self.atoms
+        graph.add_nodes_from([copy.deepcopy(atoms[k]) for k in first])
+
+        # remap each bond onto the primitive sites and deduplicate the translated copies
+        bonds = self.bonds
+        if len(bonds) > 0:
+            edges = self._node_positions()[np.array(self._graph.edge_list(), dtype=int).reshape(-1, 2)]
+            images = np.array([bond.image for bond in bonds], dtype=int)
+            i, j = labels[edges[:, 0]], labels[edges[:, 1]]
+            displacements = positions[edges[:, 1]] + np.matmul(images, vectors) - positions[edges[:, 0]]
+            offsets = displacements - (positions[first[j]] - positions[first[i]])
+            images = np.round(lattice_vectors.to_fractional(offsets)).astype(int)
+            # orient each bond from the lower to the higher index
+            leading = images[np.arange(len(images)), np.argmax(images != 0, axis=1)]
+            flip = (i > j) | ((i == j) & (leading < 0))
+            i, j = np.where(flip, j, i), np.where(flip, i, j)
+            images = np.where(flip[:, np.newaxis], -images, images)
+            _, unique = np.unique(np.column_stack((i, j, images)), axis=0, return_index=True)
+            for k in np.sort(unique):
+                attrs = {key: value for key, value in bonds[k].items() if key not in ("indices", "image")}
+                image = (int(images[k, 0]), int(images[k, 1]), int(images[k, 2]))
+                graph.add_edge(int(i[k]), int(j[k]), Bond((int(i[k]), int(j[k])), image, **attrs))
+
+        crystal = Crystal(self._unit_cell, lattice_vectors, graph)
+        inverse = np.round(np.linalg.inv(np.matmul(reduction, matrix))).astype(int)
+        return crystal, inverse
+
     def to_json(self) -> str:
         """Returns the JSON serialized representation."""
         return orjson.dumps(
@@ -219,3 +407,15 @@ class Crystal(Topology):
                 "lattice_vectors": orjson.loads(self.lattice_vectors.to_json()),
             },
             option=orjson.OPT_SERIALIZE_NUMPY)
+
+    #########################
+    #    Private Methods    #
+    #########################
+
+    def _blocks(self, rows: int, columns: int, max_memory: int) -> Iterator[slice]:
+        # estimate the bytes used per pair by displacements, periodic image candidates and norms
+        images = 1 if self.lattice_vectors.is_orthogonal() else 27
+        itemsize = 8 * (4 + 4 * images)
+        size = max(1, max_memory // max(1, columns * itemsize))
+        for start in range(0, rows, size):
+            yield slice(start, min(start + size, rows))
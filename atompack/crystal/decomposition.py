@@ -0,0 +1,197 @@
+"""Spatial decomposition of crystals into subdomains with halos of ghost atoms."""
+
+import os
+from concurrent.futures import Executor
+from functools import partial
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from atompack.crystal.crystal import Crystal
+from atompack.crystal.neighbors import CHUNK_SIZE, NeighborSearch
+
+FORMATS = ("xyz", "lammps")
+"""File formats of the exported subdomains."""
+
+
+class DomainDecomposition(object):
+    """Splits a crystal into a P x Q x R grid of subdomains along its lattice vectors.
+
+    Every atom is owned by the subdomain which holds its wrapped fractional coordinates. The halo
+    of a subdomain holds the ghost atoms within `cutoff` of any of its owned atoms, including periodic
+    images, as pairs of an atom index and the integer image such that the position of a ghost is
+    `positions[index] + image @ vectors`. Subdomains are numbered in the order of `np.ndindex(*grid)`.
+
+    Args:
+        crystal: The crystal to decompose.
+        grid: Number of subdomains along each lattice vector.
+        cutoff: Width of the halos.
+        chunk_size: Number of central atoms processed per chunk of the neighbor search.
+        executor: Optional pool used to search chunks in parallel.
+
+    Example:
+        >>> from atompack.crystal import Basis, Crystal, DomainDecomposition, LatticeParameters, Transform, UnitCell
+        >>> from atompack.symmetry import Spacegroup
+        >>>
+        >>> # 2 x 2 x 1 subdomains of a supercell of FCC copper
+        >>> unit_cell = UnitCell(Basis.primitive("Cu"), LatticeParameters.cubic(3.6), Spacegroup(225))
+        >>> crystal = Transform().supercell((4, 4, 4)).apply(Crystal(unit_cell))
+        >>> decomposition = DomainDecomposition(crystal, (2, 2, 1), cutoff=2.6)
+        >>> assert len(decomposition) == 4
+        >>> assert len(decomposition.owned(0)) == 64
+        >>>
+        >>> # the halo holds the nearest neighbors across each subdomain boundary
+        >>> indices, images = decomposition.ghosts(0)
+        >>> assert not np.any(np.isin(indices[np.all(images == 0, axis=1)], decomposition.owned(0)))
+    """
+
+    def __init__(self,
+                 crystal: Crystal,
+                 grid: Tuple[int, int, int],
+                 cutoff: float,
+                 chunk_size: int = CHUNK_SIZE,
+                 executor: Optional[Executor] = None) -> None:
+        if len(grid) != 3 or any(int(n) < 1 for n in grid):
+            raise ValueError("`grid` must hold 3 positive numbers of subdomains")
+        self._grid = (int(grid[0]), int(grid[1]), int(grid[2]))
+        self._cutoff = cutoff
+        self._positions = crystal.positions
+        self._species = crystal.species
+        self._vectors = np.array(crystal.lattice_vectors.vectors, dtype=float)
+
+        # bin the wrapped fractional coordinates against the grid at once
+        fractional = crystal.lattice_vectors.to_fractional(self._positions)
+        fractional -= np.floor(fractional)
+        bins = np.minimum(np.floor(fractional * self._grid).astype(int), np.array(self._grid) - 1)
+        self._domain_ids = np.ravel_multi_index(bins.T, self._grid) if len(bins) > 0 else np.empty(0, dtype=int)
+
+        # owned atoms of every subdomain in compressed sparse row order
+        self._owned = np.argsort(self._domain_ids, kind="stable")
+        self._owned_pointers = _pointers(self._domain_ids, len(self))
+
+        # every neighbor of an owned atom which is either owned elsewhere or a periodic image is a ghost
+        search = NeighborSearch(self._positions, crystal.lattice_vectors, cutoff)
+        chunks = [slice(start, min(start + chunk_size, len(search))) for start in range(0, len(search), chunk_size)]
+        function = partial(_halo_keys, search, domain_ids=self._domain_ids)
+        keys = list(map(function, chunks) if executor is None else executor.map(function, chunks))
+        keys = np.unique(np.concatenate(keys), axis=0) if len(keys) > 0 else np.empty((0, 5), dtype=int)
+        self._ghosts = keys[:, 1]
+        self._ghost_images = keys[:, 2:]
+        self._ghost_pointers = _pointers(keys[:, 0], len(self))
+
+    ####################
+    #    Properties    #
+    ####################
+
+    @property
+    def grid(self) -> Tuple[int, int, int]:
+        """Returns the number of subdomains along each lattice vector."""
+        return self._grid
+
+    @property
+    def cutoff(self) -> float:
+        """Returns the width of the halos."""
+        return self._cutoff
+
+    @property
+    def domain_ids(self) -> np.ndarray:
+        """Returns the (N,) subdomain which owns each atom."""
+        return self._domain_ids
+
+    ########################
+    #    Public Methods    #
+    ########################
+
+    def owned(self, domain: int) -> np.ndarray:
+        """Returns the indices of the atoms owned by a subdomain in ascending order.
+
+        Args:
+            domain: Index of the subdomain.
+        """
+        return self._owned[self._owned_pointers[domain]:self._owned_pointers[domain + 1]]
+
+    def ghosts(self, domain: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the (G,) atom indices and (G, 3) images of the ghost atoms of a subdomain.
+
+        Args:
+            domain: Index of the subdomain.
+        """
+        rows = slice(self._ghost_pointers[domain], self._ghost_pointers[domain + 1])
+        return self._ghosts[rows], self._ghost_images[rows]
+
+    def domain_atoms(self, domain: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the species and cartesian positions of the owned atoms followed by the ghost atoms.
+
+        Args:
+            domain: Index of the subdomain.
+        """
+        owned = self.owned(domain)
+        ghosts, images = self.ghosts(domain)
+        species = np.concatenate((self._species[owned], self._species[ghosts]))
+        positions = np.concatenate((self._positions[owned], self._positions[ghosts] + np.matmul(images, self._vectors)))
+        return species, positions
+
+    def export(self, directory: str, file_format: str = "xyz", executor: Optional[Executor] = None) -> List[str]:
+        """Writes one file per subdomain and returns their paths.
+
+        Each file holds the owned atoms followed by the ghost atoms and the lattice vectors of the
+        whole crystal. The number of owned atoms is recorded in the comment of each file and LAMMPS
+        atom types follow the sorted species of the whole crystal in every file.
+
+        Args:
+            directory: Directory of the files which is created if necessary.
+            file_format: Either 'xyz' or 'lammps'.
+            executor: Optional pool used to write the files in parallel.
+
+        Note:
+            Formatting holds the GIL, so process pools write in parallel while thread pools mostly overlap I/O.
+            Process pools pickle the decomposition once per subdomain.
+        """
+        if file_format not in FORMATS:
+            raise ValueError(f"`file_format` must be one of {FORMATS}")
+        os.makedirs(directory, exist_ok=True)
+        extension = {"xyz": "xyz", "lammps": "data"}[file_format]
+        paths = [os.path.join(directory, f"domain_{domain}.{extension}") for domain in range(len(self))]
+        function = partial(_export_domain, self, file_format=file_format)
+        domains = range(len(self))
+        list(map(function, domains, paths) if executor is None else executor.map(function, domains, paths))
+        return paths
+
+    #########################
+    #    Special Methods    #
+    #########################
+
+    def __len__(self) -> int:
+        return int(np.prod(self._grid))
+
+
+#########################
+#    Private Helpers    #
+#########################
+
+
+def _pointers(labels: np.ndarray, size: int) -> np.ndarray:
+    # offsets of each label in the sorted labels
+    return np.concatenate(([0], np.cumsum(np.bincount(labels, minlength=size))))
+
+
+def _halo_keys(search: NeighborSearch, rows: slice, domain_ids: np.ndarray) -> np.ndarray:
+    # unique (domain, atom, image) rows of the ghosts found around a chunk of atoms
+    i, j, _, images = search.pairs(rows)
+    mask = (domain_ids[i] != domain_ids[j]) | np.any(images != 0, axis=1)
+    keys = np.column_stack((domain_ids[i[mask]], j[mask], images[mask]))
+    return np.unique(keys, axis=0)
+
+
+def _export_domain(decomposition: DomainDecomposition, domain: int, path: str, file_format: str) -> None:
+    # avoid a circular import
+    from atompack.io.writers import iter_blocks, write_lammps_data, write_xyz
+
+    species, positions = decomposition.domain_atoms(domain)
+    comment = f"domain={domain} owned={len(decomposition.owned(domain))}"
+    vectors = decomposition._vectors
+    if file_format == "xyz":
+        write_xyz(path, iter_blocks(species, positions), vectors, comment=comment)
+    else:
+        order = [str(specie) for specie in np.unique(decomposition._species)]
+        write_lammps_data(path, iter_blocks(species, positions), vectors, species_order=order, comment=comment)
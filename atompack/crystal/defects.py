@@ -0,0 +1,296 @@
+"""Ensembles of point defects described as deltas against a shared base crystal."""
+
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+from retworkx import PyGraph
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from atompack.atom import Atom
+from atompack.bond import Bond
+from atompack.crystal.components import LatticeVectors
+from atompack.crystal.crystal import Crystal
+from atompack.crystal.neighbors import NeighborSearch
+
+DEFECT_KINDS = ("vacancy", "substitution", "interstitial", "frenkel")
+"""Kinds of point defects built by `DefectGenerator`."""
+
+
+class Defect(NamedTuple):
+    """Point defect variant of a base crystal stored as the difference from that crystal.
+
+    Attributes:
+        kind: One of `DEFECT_KINDS`.
+        removed: Indices of the base atoms which are removed.
+        replaced: Indices of the base atoms whose specie is replaced.
+        replacements: New specie of each replaced atom.
+        added_species: Specie of each added atom.
+        added_positions: (K, 3) cartesian position of each added atom.
+    """
+    kind: str
+    removed: np.ndarray
+    replaced: np.ndarray
+    replacements: np.ndarray
+    added_species: np.ndarray
+    added_positions: np.ndarray
+
+    @property
+    def nbytes(self) -> int:
+        """Returns the number of bytes held by the arrays of the delta."""
+        return sum(array.nbytes for array in self[1:])
+
+
+class DefectGenerator(object):
+    """Generates symmetry distinct point defects of a crystal without copying it.
+
+    Every variant is a small `Defect` delta against the crystal, whose positions and species are
+    extracted once into read-only arrays and shared by all variants. A variant becomes a crystal
+    only when it is materialized, so the memory of an ensemble stays close to one copy of the base.
+
+    Atoms are labeled by their orbit under the operations of the spacegroup of the unit cell which
+    map the lattice of the crystal onto itself, so the sites of a supercell with a lower symmetry
+    than its unit cell are split accordingly. Only the first atom of each orbit hosts a defect.
+
+    Args:
+        crystal: The base crystal whose atoms must lie on the sites of its unit cell.
+        symprec: Distance tolerance between symmetry equivalent sites.
+
+    Example:
+        >>> from atompack.crystal import Basis, Crystal, DefectGenerator, LatticeParameters, Transform, UnitCell
+        >>> from atompack.symmetry import Spacegroup
+        >>>
+        >>> # supercell of FCC copper
+        >>> unit_cell = UnitCell(Basis.primitive("Cu"), LatticeParameters.cubic(3.6), Spacegroup(225))
+        >>> crystal = Transform().supercell((2, 2, 2)).apply(Crystal(unit_cell))
+        >>>
+        >>> # every site is equivalent so a single vacancy is distinct
+        >>> generator = DefectGenerator(crystal)
+        >>> vacancies = generator.vacancies()
+        >>> assert len(vacancies) == 1
+        >>> assert len(generator.materialize(vacancies[0]).atoms) == 31
+    """
+
+    def __init__(self, crystal: Crystal, symprec: float = 1E-2) -> None:
+        self._crystal = crystal
+        self._symprec = symprec
+        self._positions = crystal.positions
+        self._positions.setflags(write=False)
+        self._species = crystal.species
+        self._species.setflags(write=False)
+
+        # operations of the unit cell which are also symmetries of the periodic crystal
+        unit_cell = crystal.unit_cell
+        self._unit_vectors = LatticeVectors.from_lattice_parameters(unit_cell.lattice_parameters)
+        rotations, translations = unit_cell.spacegroup.rotations, unit_cell.spacegroup.translations
+        matrix = np.matmul(crystal.lattice_vectors.vectors, np.linalg.inv(self._unit_vectors.vectors))
+        mapped = np.einsum("ij,nkj,kl->nil", matrix, rotations, np.linalg.inv(matrix))
+        preserved = np.all(np.abs(mapped - np.round(mapped)) <= 1E-6, axis=(1, 2))
+        self._rotations, self._translations = rotations[preserved], translations[preserved]
+
+        # label the sites of the unit cell and then every atom by the site it occupies
+        basis = unit_cell.basis.apply_spacegroup(unit_cell.spacegroup)
+        sites = np.array([site for _, site in basis], dtype=float).reshape(-1, 3)
+        site_species, types = np.unique([specie for specie, _ in basis], return_inverse=True)
+        site_labels = self._orbit_labels(sites, types.reshape(-1))
+        search = NeighborSearch(self._unit_vectors.to_cartesian(sites), self._unit_vectors, symprec)
+        point, j, _, _ = search.query(self._positions)
+        occupied = np.full(len(self._positions), -1)
+        occupied[point] = j
+        if np.any(occupied < 0) or np.any(site_species[types.reshape(-1)[occupied]] != self._species):
+            raise ValueError("every atom must occupy a site of the unit cell in its setting")
+        # renumber the orbits in order of their first atom
+        _, first, inverse = np.unique(site_labels[occupied], return_index=True, return_inverse=True)
+        rank = np.empty(len(first), dtype=int)
+        rank[np.argsort(first)] = np.arange(len(first))
+        self._labels = rank[inverse.reshape(-1)]
+        self._labels.setflags(write=False)
+
+    ####################
+    #    Properties    #
+    ####################
+
+    @property
+    def crystal(self) -> Crystal:
+        """Returns the shared base crystal."""
+        return self._crystal
+
+    @property
+    def positions(self) -> np.ndarray:
+        """Returns the read-only (N, 3) positions of the base crystal."""
+        return self._positions
+
+    @property
+    def species(self) -> np.ndarray:
+        """Returns the read-only (N,) species of the base crystal."""
+        return self._species
+
+    @property
+    def site_labels(self) -> np.ndarray:
+        """Returns the symmetry orbit of each atom numbered in order of the first atom of each orbit."""
+        return self._labels
+
+    @property
+    def distinct_sites(self) -> np.ndarray:
+        """Returns the index of the first atom of each symmetry orbit."""
+        _, first = np.unique(self._labels, return_index=True)
+        return np.sort(first)
+
+    ########################
+    #    Public Methods    #
+    ########################
+
+    def vacancies(self, species: Optional[Iterable[str]] = None) -> List[Defect]:
+        """Returns a vacancy at each symmetry distinct site.
+
+        Args:
+            species: Species of the removed atoms. Every specie is included by default.
+        """
+        sites = self._select_sites(species)
+        return [self._defect("vacancy", removed=np.array([k])) for k in sites]
+
+    def substitutions(self, dopants: Iterable[str], species: Optional[Iterable[str]] = None) -> List[Defect]:
+        """Returns a substitution of each dopant at each symmetry distinct site of another specie.
+
+        Args:
+            dopants: Species which replace the atom of a site.
+            species: Species of the replaced atoms. Every specie is included by default.
+        """
+        dopants = list(dopants)
+        res = []
+        for k in self._select_sites(species):
+            for dopant in dopants:
+                if dopant == self._species[k]:
+                    continue
+                res.append(self._defect("substitution", replaced=np.array([k]), replacements=np.array([dopant])))
+        return res
+
+    def interstitials(self, specie: str, positions: np.ndarray) -> List[Defect]:
+        """Returns an interstitial atom at each symmetry distinct candidate position.
+
+        Args:
+            specie: Specie of the added atom.
+            positions: (M, 3) cartesian candidate positions such as the voids of the unit cell.
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        distinct = self._distinct_positions(positions)
+        return [
+            self._defect("interstitial", added_species=np.array([specie]), added_positions=positions[[k]])
+            for k in distinct
+        ]
+
+    def frenkel_pairs(self,
+                      positions: np.ndarray,
+                      species: Optional[Iterable[str]] = None,
+                      max_distance: Optional[float] = None) -> List[Defect]:
+        """Returns Frenkel pairs which move the atom of each distinct site onto each distinct interstitial.
+
+        The interstitial is placed at the symmetry equivalent image of each candidate position
+        which is nearest to the vacancy.
+
+        Args:
+            positions: (M, 3) cartesian candidate positions of the displaced atom.
+            species: Species of the displaced atoms. Every specie is included by default.
+            max_distance: Largest allowed distance between the vacancy and the interstitial.
+        """
+        positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+        candidates = positions[self._distinct_positions(positions)]
+        fractional = self._unit_vectors.to_fractional(candidates)
+        images = np.einsum("kij,nj->nki", self._rotations, fractional) + self._translations
+
+        res = []
+        for k in self._select_sites(species):
+            # nearest equivalent image of every candidate in lattice units of the unit cell
+            displacements = images - self._unit_vectors.to_fractional(self._positions[k])
+            displacements = self._unit_vectors.to_cartesian(displacements - np.round(displacements))
+            lengths = np.linalg.norm(displacements, axis=-1)
+            nearest = np.argmin(lengths, axis=1)
+            for n in range(len(candidates)):
+                if max_distance is not None and lengths[n, nearest[n]] > max_distance:
+                    continue
+                position = self._positions[k] + displacements[n, nearest[n]]
+                res.append(
+                    self._defect("frenkel",
+                                 removed=np.array([k]),
+                                 added_species=np.array([self._species[k]]),
+                                 added_positions=position[np.newaxis, :]))
+        return res
+
+    def materialize(self, defect: Defect) -> Crystal:
+        """Returns a new crystal with the defect applied to a copy of the base crystal.
+
+        Note:
+            Bonds to removed atoms are dropped and the remaining bonds are reindexed.
+        """
+        atoms = self._crystal.atoms
+        keep = np.ones(len(atoms), dtype=bool)
+        keep[defect.removed] = False
+        species = self._species.astype(object)
+        species[defect.replaced] = defect.replacements
+
+        graph = PyGraph()
+        new_atoms = []
+        for k in np.flatnonzero(keep):
+            atom = atoms[k]
+            attrs = {key: value for key, value in atom.items() if key not in ("specie", "position")}
+            new_atoms.append(Atom(str(species[k]), self._positions[k].copy(), **attrs))
+        new_atoms.extend(Atom(str(specie), np.array(position, dtype=float))
+                         for specie, position in zip(defect.added_species, defect.added_positions))
+        graph.add_nodes_from(new_atoms)
+
+        # reindex the bonds between the remaining atoms
+        bonds = self._crystal.bonds
+        if len(bonds) > 0:
+            edges = np.array(self._crystal._graph.edge_list(), dtype=int).reshape(-1, 2)
+            edges = self._crystal._node_positions()[edges]
+            indices = np.cumsum(keep) - 1
+            for m in np.flatnonzero(np.all(keep[edges], axis=1)):
+                i, j = int(indices[edges[m, 0]]), int(indices[edges[m, 1]])
+                attrs = {key: value for key, value in bonds[m].items() if key not in ("indices", "image")}
+                graph.add_edge(i, j, Bond((i, j), bonds[m].image, **attrs))
+
+        lattice_vectors = LatticeVectors(self._crystal.lattice_vectors.vectors.copy())
+        return Crystal(self._crystal.unit_cell, lattice_vectors, graph)
+
+    def iter_materialize(self, defects: Iterable[Defect]) -> Iterator[Crystal]:
+        """Yields the crystal of each defect one at a time."""
+        for defect in defects:
+            yield self.materialize(defect)
+
+    #########################
+    #    Private Methods    #
+    #########################
+
+    def _defect(self, kind: str, **kwargs: np.ndarray) -> Defect:
+        # empty arrays for every part of the delta which is not given
+        return Defect(kind, kwargs.get("removed", np.empty(0, dtype=int)),
+                      kwargs.get("replaced", np.empty(0, dtype=int)),
+                      kwargs.get("replacements", np.empty(0, dtype=str)),
+                      kwargs.get("added_species", np.empty(0, dtype=str)),
+                      kwargs.get("added_positions", np.empty((0, 3))))
+
+    def _select_sites(self, species: Optional[Iterable[str]]) -> np.ndarray:
+        sites = self.distinct_sites
+        if species is not None:
+            sites = sites[np.isin(self._species[sites], list(species))]
+        return sites
+
+    def _distinct_positions(self, positions: np.ndarray) -> np.ndarray:
+        # index of the first candidate of each symmetry orbit
+        if len(positions) == 0:
+            return np.empty(0, dtype=int)
+        labels = self._orbit_labels(self._unit_vectors.to_fractional(positions), np.zeros(len(positions), dtype=int))
+        _, first = np.unique(labels, return_index=True)
+        return np.sort(first)
+
+    def _orbit_labels(self, sites: np.ndarray, types: np.ndarray) -> np.ndarray:
+        # connect each site to its images under the operations and label the connected orbits
+        vectors = self._unit_vectors.vectors
+        search = NeighborSearch(np.matmul(sites, vectors), self._unit_vectors, 2 * self._symprec)
+        images = np.einsum("kij,nj->kni", self._rotations, sites) + self._translations[:, np.newaxis, :]
+        point, j, _, _ = search.query(np.matmul(images.reshape(-1, 3), vectors))
+        i = point % len(sites)
+        mask = types[i] == types[j]
+        graph = coo_matrix((np.ones(np.count_nonzero(mask)), (i[mask], j[mask])), shape=(len(sites), len(sites)))
+        _, labels = connected_components(graph, directed=False)
+        return labels
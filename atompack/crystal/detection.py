@@ -0,0 +1,504 @@
+"""Detection of the spacegroup and asymmetric unit of arbitrary crystals."""
+
+from itertools import permutations, product
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+from atompack.crystal.components import Basis, LatticeParameters, LatticeVectors
+from atompack.crystal.crystal import Crystal
+from atompack.crystal.neighbors import NeighborSearch
+from atompack.crystal.reduction import lattice_points, reduce_lattice
+from atompack.symmetry import Spacegroup
+
+SAMPLE_SITES = 16
+"""Number of sites used to prune candidate operations before every site is tested."""
+
+CANDIDATE_BATCH = 256
+"""Number of candidate translations pruned at once while searching for a primitive cell."""
+
+LATTICE_SYSTEMS = {
+    "triclinic": ("triclinic",),
+    "monoclinic": ("monoclinic",),
+    "orthorhombic": ("orthorhombic",),
+    "tetragonal": ("tetragonal",),
+    "trigonal": ("trigonal", "rhombohedral"),
+    "hexagonal": ("hexagonal",),
+    "cubic": ("cubic",),
+}
+"""Bravais lattice names of the spacegroups in each crystal system."""
+
+
+class SymmetryAnalyzer(object):
+    """Detects the spacegroup and asymmetric unit of a crystal.
+
+    The crystal is first reduced to its primitive cell so that the cost of detection
+    does not scale with the size of a supercell. Symmetry operations are drawn from the
+    point group of the reduced lattice and tested against every site with a spatial index.
+    The operations are then expressed in each candidate conventional setting and compared
+    against the tabulated spacegroups up to an origin shift.
+
+    Args:
+        crystal: The crystal to analyze.
+        symprec: Distance tolerance between symmetry equivalent sites.
+
+    Example:
+        >>> from atompack.crystal import Basis, Crystal, LatticeParameters, SymmetryAnalyzer, Transform, UnitCell
+        >>> from atompack.symmetry import Spacegroup
+        >>>
+        >>> # supercell of BCC iron
+        >>> unit_cell = UnitCell(Basis.primitive("Fe"), LatticeParameters.cubic(2.85), Spacegroup(229))
+        >>> crystal = Transform().supercell((2, 2, 2)).apply(Crystal(unit_cell))
+        >>>
+        >>> # recover the spacegroup and the single iron site
+        >>> analyzer = SymmetryAnalyzer(crystal)
+        >>> assert analyzer.spacegroup == Spacegroup("I m -3 m")
+        >>> assert len(analyzer.asymmetric_unit) == 1
+    """
+
+    def __init__(self, crystal: Crystal, symprec: float = 1E-2) -> None:
+        if len(crystal.species) == 0:
+            raise ValueError("cannot detect the symmetry of an empty crystal")
+        self._symprec = symprec
+        species, types = np.unique(crystal.species, return_inverse=True)
+        self._species = species
+        vectors = np.asarray(crystal.lattice_vectors.vectors, dtype=float)
+        fractional = crystal.lattice_vectors.to_fractional(crystal.positions)
+
+        # reduce to a primitive cell with short lattice vectors
+        vectors, matrix = reduce_lattice(vectors)
+        fractional = np.matmul(fractional, np.linalg.inv(matrix))
+        matrix, labels = find_primitive(vectors, fractional, types, symprec)
+        _, first = np.unique(labels, return_index=True)
+        fractional = np.matmul(fractional[first], np.linalg.inv(matrix))
+        types = types.reshape(-1)[first]
+        vectors, matrix = reduce_lattice(np.matmul(matrix, vectors))
+        fractional = np.matmul(fractional, np.linalg.inv(matrix)) % 1
+        self._primitive_vectors = vectors
+        self._fractional = fractional
+        self._types = types
+
+        # find the operations of the structure and identify the spacegroup
+        rotations, translations = _structure_operations(vectors, fractional, types, symprec)
+        self._spacegroup, self._transformation, shifts = _identify(rotations, translations, vectors, symprec)
+
+        # prefer the origin nearest to the first site
+        offsets = np.matmul(fractional[0], np.linalg.inv(self._transformation)) + shifts
+        offsets -= np.round(offsets)
+        distances = np.linalg.norm(np.matmul(offsets, np.matmul(self._transformation, vectors)), axis=1)
+        self._origin_shift = shifts[np.argmin(distances)]
+        self._asymmetric_unit = self._reduce_sites()
+
+    ####################
+    #    Properties    #
+    ####################
+
+    @property
+    def spacegroup(self) -> Spacegroup:
+        """Returns the detected spacegroup."""
+        return self._spacegroup
+
+    @property
+    def asymmetric_unit(self) -> Basis:
+        """Returns one site of each symmetry equivalent orbit in the conventional setting."""
+        return self._asymmetric_unit
+
+    @property
+    def primitive_vectors(self) -> LatticeVectors:
+        """Returns the reduced primitive lattice vectors."""
+        return LatticeVectors(self._primitive_vectors.copy())
+
+    @property
+    def conventional_vectors(self) -> LatticeVectors:
+        """Returns the lattice vectors of the conventional setting of the spacegroup."""
+        return LatticeVectors(np.matmul(self._transformation, self._primitive_vectors))
+
+    @property
+    def lattice_parameters(self) -> LatticeParameters:
+        """Returns the lattice parameters of the conventional setting of the spacegroup."""
+        return LatticeParameters.from_lattice_vectors(self.conventional_vectors)
+
+    #########################
+    #    Private Methods    #
+    #########################
+
+    def _reduce_sites(self) -> Basis:
+        # expand the primitive sites into the conventional cell at the standard origin
+        centering = lattice_points(self._transformation)
+        sites = np.matmul(self._fractional, np.linalg.inv(self._transformation)) + self._origin_shift
+        sites = (sites[np.newaxis, :, :] + centering[:, np.newaxis, :]).reshape(-1, 3) % 1
+        types = np.tile(self._types, len(centering))
+
+        # connect each site to its images under the spacegroup operations
+        vectors = np.matmul(self._transformation, self._primitive_vectors)
+        search = NeighborSearch(np.matmul(sites, vectors), LatticeVectors(vectors), 2 * self._symprec)
+        rotations, translations = self._spacegroup.rotations, self._spacegroup.translations
+        images = np.einsum("kij,nj->kni", rotations, sites) + translations[:, np.newaxis, :]
+        point, j, _, _ = search.query(np.matmul(images.reshape(-1, 3), vectors))
+        i = point % len(sites)
+        mask = types[i] == types[j]
+        graph = coo_matrix((np.ones(np.count_nonzero(mask)), (i[mask], j[mask])), shape=(len(sites), len(sites)))
+        _, labels = connected_components(graph, directed=False)
+
+        # keep the first site of each orbit
+        _, representatives = np.unique(labels, return_index=True)
+        representatives = np.sort(representatives)
+        sites = np.where(sites > 1 - self._symprec / np.linalg.norm(vectors, axis=1), sites - 1, sites)
+        return Basis([(str(self._species[types[k]]), sites[k]) for k in representatives])
+
+
+def find_primitive(vectors: np.ndarray, fractional: np.ndarray, types: np.ndarray,
+                   symprec: float = 1E-2) -> Tuple[np.ndarray, np.ndarray]:
+    """Finds the pure translations of a periodic structure which define its primitive cell.
+
+    Candidate translations between sites of the rarest specie are visited from shortest
+    to longest and pruned against a sample of sites in vectorized batches. Only the three
+    shortest independent translations are verified against every site.
+
+    Args:
+        vectors: Row-major matrix of lattice vectors.
+        fractional: (N, 3) array of fractional coordinates.
+        types: (N,) array of integer specie types.
+        symprec: Distance tolerance between translated sites.
+
+    Returns:
+        The (3, 3) rational matrix whose rows are primitive lattice vectors in units of `vectors`
+        and the (N,) index of the primitive site which each site is a translated copy of.
+    """
+    fractional = np.asarray(fractional, dtype=float) % 1
+    types = np.asarray(types, dtype=int).reshape(-1)
+    if len(types) == 0:
+        raise ValueError("cannot find the primitive cell of an empty structure")
+    search = NeighborSearch(np.matmul(fractional, vectors), LatticeVectors(vectors), symprec)
+
+    # shortest image of each candidate translation and of each lattice vector
+    shifts = np.array(list(np.ndindex(3, 3, 3))) - 1
+    translations = _candidate_translations(fractional, types)
+    translations = translations - np.round(translations)
+    images = translations[:, np.newaxis, :] + shifts[np.newaxis, :, :]
+    nearest = np.argmin(np.linalg.norm(np.matmul(images, vectors), axis=-1), axis=1)
+    candidates = np.vstack((images[np.arange(len(images)), nearest], np.identity(3)))
+    norms = np.linalg.norm(np.matmul(candidates, vectors), axis=1)
+    candidates = candidates[np.argsort(norms, kind="stable")][np.sort(norms) > 1E-8]
+
+    # the three shortest independent pure translations form a basis of the translation lattice
+    basis: List[np.ndarray] = []
+    everything = np.arange(len(types))
+    identity = np.identity(3, dtype=int)[np.newaxis]
+    for start in range(0, len(candidates), CANDIDATE_BATCH):
+        batch = candidates[start:start + CANDIDATE_BATCH]
+        rotations = np.broadcast_to(identity, (len(batch), 3, 3))
+        for candidate in batch[_prune_operations(search, fractional, types, vectors, rotations, batch)]:
+            if not _is_independent(np.matmul(candidate, vectors), np.matmul(np.reshape(basis, (-1, 3)), vectors),
+                                   10 * symprec):
+                continue
+            if np.allclose(candidate, np.round(candidate)) or _test_operations(
+                    search, fractional, types, vectors, identity, candidate[np.newaxis], everything)[0]:
+                basis.append(candidate)
+            if len(basis) == 3:
+                break
+        if len(basis) == 3:
+            break
+    matrix = np.array(basis)
+    if np.linalg.det(matrix) < 0:
+        matrix[0] = -matrix[0]
+    multiplicity = int(np.round(1 / abs(np.linalg.det(matrix))))
+    if multiplicity == 1:
+        return np.identity(3), np.arange(len(types))
+    # the translations are multiples of 1 / multiplicity in an exactly commensurate cell
+    matrix = np.round(matrix * multiplicity) / multiplicity
+
+    # group the translated copies of each site
+    fractional = np.matmul(fractional, np.linalg.inv(matrix)) % 1
+    tolerance = symprec / np.min(np.linalg.norm(np.matmul(matrix, vectors), axis=1))
+    keys = np.round(fractional / tolerance).astype(int) % int(np.ceil(1 / tolerance))
+    keys = np.column_stack((keys, types))
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    # merge groups which were split by the quantization of nearby coordinates
+    tree = cKDTree(fractional[first] % 1, boxsize=1)
+    pairs = np.array([(i, j) for i, j in tree.query_pairs(tolerance) if types[first[i]] == types[first[j]]],
+                     dtype=int).reshape(-1, 2)
+    graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(len(first), len(first)))
+    _, groups = connected_components(graph, directed=False)
+    labels = groups[inverse.reshape(-1)]
+    # number the primitive sites in order of first appearance
+    _, order = np.unique(labels, return_index=True)
+    renumber = np.empty(len(order), dtype=int)
+    renumber[np.argsort(order)] = np.arange(len(order))
+    labels = renumber[labels]
+    if len(order) * multiplicity != len(types) or np.any(np.bincount(labels) != multiplicity):
+        raise ValueError("translational symmetry is inconsistent within `symprec`")
+    return matrix, labels
+
+
+#########################
+#    Private Helpers    #
+#########################
+
+
+def _test_operations(search: NeighborSearch, fractional: np.ndarray, types: np.ndarray, vectors: np.ndarray,
+                     rotations: np.ndarray, translations: np.ndarray, sites: np.ndarray) -> np.ndarray:
+    # returns a mask of the operations which map each of `sites` onto a site of the same specie
+    images = np.einsum("kij,nj->kni", rotations, fractional[sites]) + translations[:, np.newaxis, :]
+    point, j, _, _ = search.query(np.matmul(images.reshape(-1, 3), vectors))
+    expected = np.tile(types[sites], len(rotations))
+    matched = np.zeros(len(expected), dtype=bool)
+    matched[point[types[j] == expected[point]]] = True
+    return np.all(matched.reshape(len(rotations), len(sites)), axis=1)
+
+
+def _prune_operations(search: NeighborSearch, fractional: np.ndarray, types: np.ndarray, vectors: np.ndarray,
+                      rotations: np.ndarray, translations: np.ndarray) -> np.ndarray:
+    # returns a mask of the operations which pass a sample of sites spread over every specie
+    sample = np.unique(np.concatenate([
+        np.flatnonzero(types == t)[:SAMPLE_SITES] for t in np.unique(types)
+    ] + [np.linspace(0, len(types) - 1, min(len(types), SAMPLE_SITES)).astype(int)]))
+    return _test_operations(search, fractional, types, vectors, rotations, translations, sample)
+
+
+def _candidate_translations(fractional: np.ndarray, types: np.ndarray) -> np.ndarray:
+    # translations which move the first site of the rarest specie onto each site of that specie
+    counts = np.bincount(types)
+    rarest = np.argmin(np.where(counts > 0, counts, np.iinfo(int).max))
+    sites = fractional[types == rarest]
+    return sites - sites[0]
+
+
+def _is_independent(vector: np.ndarray, basis: np.ndarray, tolerance: float) -> bool:
+    # True if the component of `vector` orthogonal to the span of `basis` exceeds the tolerance
+    if len(basis) > 0:
+        coefficients = np.linalg.lstsq(basis.T, vector, rcond=None)[0]
+        vector = vector - np.matmul(coefficients, basis)
+    return bool(np.linalg.norm(vector) > tolerance)
+
+
+def _lattice_point_group(vectors: np.ndarray, symprec: float) -> np.ndarray:
+    # integer matrices in fractional coordinates which preserve the lattice metric
+    metric = np.matmul(vectors, vectors.T)
+    lengths = np.linalg.norm(vectors, axis=1)
+    tolerance = symprec * (lengths[:, np.newaxis] + lengths[np.newaxis, :])
+    candidates = np.array(list(np.ndindex(*([3] * 9)))).reshape(-1, 3, 3) - 1
+    candidates = candidates[np.abs(np.round(np.linalg.det(candidates))) == 1]
+    transformed = np.einsum("kji,jl,klm->kim", candidates, metric, candidates)
+    return candidates[np.all(np.abs(transformed - metric) <= tolerance, axis=(1, 2))]
+
+
+def _structure_operations(vectors: np.ndarray, fractional: np.ndarray, types: np.ndarray,
+                          symprec: float) -> Tuple[np.ndarray, np.ndarray]:
+    # rotations and translations in fractional coordinates which map the structure onto itself
+    search = NeighborSearch(np.matmul(fractional, vectors), LatticeVectors(vectors), symprec)
+    lattice = _lattice_point_group(vectors, symprec)
+    counts = np.bincount(types)
+    rarest = np.argmin(np.where(counts > 0, counts, np.iinfo(int).max))
+    anchor = fractional[np.flatnonzero(types == rarest)[0]]
+    sites = fractional[types == rarest]
+
+    # move the anchor onto each site of its specie after rotation
+    rotations = np.repeat(lattice, len(sites), axis=0)
+    translations = (anchor - np.einsum("kij,nj->kni", lattice, sites)).reshape(-1, 3)
+    translations %= 1
+    mask = _prune_operations(search, fractional, types, vectors, rotations, translations)
+    rotations, translations = rotations[mask], translations[mask]
+    mask = _test_operations(search, fractional, types, vectors, rotations, translations, np.arange(len(types)))
+    rotations, translations = rotations[mask], translations[mask]
+
+    # keep a single translation for each rotation
+    _, first = np.unique(rotations.reshape(-1, 9), axis=0, return_index=True)
+    return rotations[first], translations[first]
+
+
+def _rotation_orders(rotations: np.ndarray) -> np.ndarray:
+    # order of the proper part of each rotation
+    proper = rotations * np.round(np.linalg.det(rotations)).astype(int)[:, np.newaxis, np.newaxis]
+    orders = np.zeros(len(rotations), dtype=int)
+    power = np.broadcast_to(np.identity(3, dtype=int), proper.shape).copy()
+    for order in range(1, 7):
+        power = np.matmul(power, proper)
+        orders[(orders == 0) & np.all(power == np.identity(3, dtype=int), axis=(1, 2))] = order
+    return orders
+
+
+def _crystal_system(orders: np.ndarray) -> str:
+    if np.count_nonzero(orders == 3) >= 8:
+        return "cubic"
+    if np.any(orders == 6):
+        return "hexagonal"
+    if np.any(orders == 3):
+        return "trigonal"
+    if np.any(orders == 4):
+        return "tetragonal"
+    if np.count_nonzero(orders == 2) >= 3:
+        return "orthorhombic"
+    if np.any(orders == 2):
+        return "monoclinic"
+    return "triclinic"
+
+
+def _axis(rotation: np.ndarray) -> np.ndarray:
+    # shortest lattice vector along the axis of the proper part of a rotation
+    proper = rotation * int(np.round(np.linalg.det(rotation))) - np.identity(3, dtype=int)
+    crosses = [np.cross(proper[i], proper[j]) for i, j in ((0, 1), (0, 2), (1, 2))]
+    axis = max(crosses, key=lambda x: np.abs(x).sum())
+    axis = axis // np.gcd.reduce(axis)
+    return -axis if axis[np.flatnonzero(axis)[0]] < 0 else axis
+
+
+def _axes(rotations: np.ndarray, orders: np.ndarray, order: int) -> List[np.ndarray]:
+    # unique axes of the rotations whose proper part has the given order
+    axes = {tuple(_axis(rotation)) for rotation in rotations[orders == order]}
+    return [np.array(axis) for axis in sorted(axes)]
+
+
+def _plane_vectors(vectors: np.ndarray, axis: np.ndarray, symprec: float, count: int = 4) -> List[np.ndarray]:
+    # shortest lattice vectors perpendicular to an axis
+    grid = np.array(list(np.ndindex(7, 7, 7))) - 3
+    direction = np.matmul(axis, vectors)
+    direction /= np.linalg.norm(direction)
+    cartesian = np.matmul(grid, vectors)
+    norms = np.linalg.norm(cartesian, axis=1)
+    mask = (np.abs(np.matmul(cartesian, direction)) <= symprec) & (norms > 1E-8)
+    grid, norms = grid[mask], norms[mask]
+    return [grid[k] for k in np.argsort(norms, kind="stable")[:count]]
+
+
+def _right_handed(matrix: np.ndarray, flip: int = 2) -> np.ndarray:
+    matrix = np.array(matrix)
+    if np.linalg.det(matrix) < 0:
+        matrix[flip] = -matrix[flip]
+    return matrix
+
+
+def _conventional_bases(system: str, rotations: np.ndarray, orders: np.ndarray, vectors: np.ndarray,
+                        symprec: float) -> Iterator[np.ndarray]:
+    # candidate conventional bases as integer rows in units of the primitive vectors
+    if system == "triclinic":
+        yield np.identity(3, dtype=int)
+    elif system == "monoclinic":
+        b = _axes(rotations, orders, 2)[0]
+        plane = _plane_vectors(vectors, b, symprec, count=6)
+        for a, c in permutations(plane, 2):
+            for sign in (1, -1):
+                matrix = np.array([a, b, sign * c])
+                if abs(np.round(np.linalg.det(matrix))) > 0:
+                    yield _right_handed(matrix, flip=0)
+    elif system in ("orthorhombic", "cubic"):
+        axes = _axes(rotations, orders, 4) if system == "cubic" else []
+        if len(axes) == 0:
+            axes = _axes(rotations, orders, 2)
+        for ordered in permutations(axes[:3]):
+            for signs in ((1, 1, 1), (-1, -1, 1), (-1, 1, -1), (1, -1, -1)):
+                yield _right_handed(np.array(ordered) * np.array(signs)[:, np.newaxis])
+    else:
+        principal = {"tetragonal": 4, "trigonal": 3, "hexagonal": 6}[system]
+        index = np.flatnonzero(orders == principal)[0]
+        proper = rotations[index] * int(np.round(np.linalg.det(rotations[index])))
+        if principal == 6:
+            proper = np.matmul(proper, proper)
+        # rotations in both senses about the principal axis
+        senses = (proper, np.round(np.linalg.inv(proper)).astype(int))
+        c = _axis(rotations[index])
+        direction = np.matmul(c, vectors)
+        candidates = [
+            axis for axis in _axes(rotations, orders, 2)
+            if abs(np.dot(np.matmul(axis, vectors), direction)) <= symprec * np.linalg.norm(direction)
+        ]
+        candidates += _plane_vectors(vectors, c, symprec)
+        for a, sign, rotation in product(candidates, (1, -1), senses):
+            yield _right_handed(np.array([sign * a, np.matmul(rotation, sign * a), c]))
+
+
+def _candidate_spacegroups(system: str, order: int) -> List[Spacegroup]:
+    res = []
+    for number in range(1, 231):
+        spacegroup = Spacegroup(number)
+        if spacegroup.bravais_lattice not in LATTICE_SYSTEMS[system]:
+            continue
+        if len(spacegroup.genpos) == order * len(spacegroup.centering):
+            res.append(spacegroup)
+    return res
+
+
+def _identify(rotations: np.ndarray, translations: np.ndarray, vectors: np.ndarray,
+              symprec: float) -> Tuple[Spacegroup, np.ndarray, np.ndarray]:
+    # returns the spacegroup, the conventional basis and the origin shifts matching the operations
+    orders = _rotation_orders(rotations)
+    system = _crystal_system(orders)
+    spacegroups = _candidate_spacegroups(system, len(rotations))
+    for matrix in _conventional_bases(system, rotations, orders, vectors, symprec):
+        # express the operations in the candidate setting
+        inverse = np.linalg.inv(matrix.T)
+        _rotations = np.einsum("ij,kjl,lm->kim", inverse, rotations, matrix.T)
+        if not np.allclose(_rotations, np.round(_rotations), atol=1E-6):
+            continue
+        _rotations = np.round(_rotations).astype(int)
+        _translations = np.matmul(translations, inverse.T) % 1
+        centering = _sorted_points(lattice_points(matrix))
+        conventional = np.matmul(matrix, vectors)
+        for spacegroup in spacegroups:
+            if len(spacegroup.centering) != len(centering):
+                continue
+            if not np.allclose(_sorted_points(spacegroup.centering), centering, atol=1E-6):
+                continue
+            shifts = _origin_shifts(_rotations, _translations, spacegroup, conventional, symprec)
+            if len(shifts) > 0:
+                return spacegroup, matrix, shifts
+    raise ValueError("unable to identify the spacegroup within `symprec`")
+
+
+def _sorted_points(points: np.ndarray) -> np.ndarray:
+    points = np.round(points % 1, 6) % 1
+    return points[np.lexsort(points.T[::-1])]
+
+
+def _origin_shifts(rotations: np.ndarray, translations: np.ndarray, spacegroup: Spacegroup, vectors: np.ndarray,
+                   symprec: float) -> np.ndarray:
+    # origin shifts `s` such that `t + (I - W) s` matches the tabulated translation of each rotation `W`
+    tabulated: Dict[bytes, np.ndarray] = {}
+    for rotation, translation in zip(spacegroup.rotations, spacegroup.translations):
+        tabulated.setdefault(rotation.astype(int).tobytes(), translation)
+    if len(tabulated) != len(rotations):
+        return np.empty((0, 3))
+    targets = []
+    for rotation in rotations:
+        if rotation.astype(int).tobytes() not in tabulated:
+            return np.empty((0, 3))
+        targets.append(tabulated[rotation.astype(int).tobytes()])
+    differences = (np.array(targets) - translations) % 1
+    matrices = np.identity(3) - rotations
+    centering = spacegroup.centering
+
+    # choose generators which constrain every direction the operations constrain
+    rank = np.linalg.matrix_rank(matrices.reshape(-1, 3))
+    generators: List[int] = []
+    constrained = 0
+    while constrained < rank:
+        generators.append(
+            max(range(len(rotations)),
+                key=lambda k: np.linalg.matrix_rank(matrices[generators + [k]].reshape(-1, 3))))
+        constrained = np.linalg.matrix_rank(matrices[generators].reshape(-1, 3))
+
+    # enumerate the lattice offsets of each generator equation with the shift inside the unit cell
+    choices = []
+    for k in generators:
+        lower = np.ceil(np.minimum(matrices[k], 0).sum(axis=1) - 1 - 1E-6).astype(int)
+        upper = np.floor(np.maximum(matrices[k], 0).sum(axis=1) + 1E-6).astype(int)
+        offsets = np.array(list(np.ndindex(*(upper - lower + 1)))) + lower
+        choices.append((offsets[np.newaxis, :, :] + differences[k] + centering[:, np.newaxis, :]).reshape(-1, 3))
+    shifts = np.zeros((1, 3))
+    if len(generators) > 0:
+        system = matrices[generators].reshape(-1, 3)
+        rhs = np.array([np.concatenate(x) for x in product(*choices)])
+        shifts = np.matmul(rhs, np.linalg.pinv(system).T)
+        residuals = np.matmul(shifts, system.T) - rhs
+        shifts = shifts[np.max(np.abs(residuals), axis=1) <= 1E-2]
+
+    # verify every operation up to a centering translation
+    errors = (translations[np.newaxis, :, :] + np.einsum("kij,nj->nki", matrices, shifts) -
+              np.array(targets)[np.newaxis, :, :])
+    errors = errors[:, :, np.newaxis, :] - centering[np.newaxis, np.newaxis, :, :]
+    errors -= np.round(errors)
+    distances = np.min(np.linalg.norm(np.matmul(errors, vectors), axis=-1), axis=-1)
+    return shifts[np.all(distances <= 3 * symprec, axis=1)] % 1
@@ -0,0 +1,141 @@
+"""Ensembles of randomly displaced and strained copies of a crystal."""
+
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+import numpy as np
+
+from atompack.constants import BOLTZMANN, HARMONIC_ENERGY, MAX_MEMORY
+from atompack.crystal.crystal import Crystal
+
+
+class PerturbationEnsemble(object):
+    """Generates randomly perturbed copies of a crystal as arrays.
+
+    Each member displaces every atom by a Gaussian with a standard deviation per specie and
+    deforms the positions and the lattice vectors by a random symmetric strain. All members of a
+    block are drawn at once into a (members, N, 3) array without building any atoms.
+    Displacements and strains are drawn from separate streams of the seed, so the members are
+    identical whether they are generated at once or streamed in blocks of any size.
+
+    Args:
+        crystal: The crystal to perturb.
+        amplitudes: Standard deviation of each cartesian displacement as a single value or per specie.
+            See `thermal_amplitudes` for Maxwell-Boltzmann amplitudes of harmonic oscillators.
+        strain: Standard deviation of each independent component of the strain tensor.
+        seed: Seed of the random number generator which makes every ensemble reproducible.
+
+    Example:
+        >>> from atompack.crystal import Basis, Crystal, LatticeParameters, PerturbationEnsemble, UnitCell
+        >>> from atompack.symmetry import Spacegroup
+        >>>
+        >>> # FCC copper
+        >>> unit_cell = UnitCell(Basis.primitive("Cu"), LatticeParameters.cubic(3.6), Spacegroup(225))
+        >>> ensemble = PerturbationEnsemble(Crystal(unit_cell), amplitudes=0.05, strain=0.01, seed=0)
+        >>>
+        >>> # 100 perturbed copies at once
+        >>> positions, vectors = ensemble.generate(100)
+        >>> assert positions.shape == (100, 4, 3)
+        >>> assert vectors.shape == (100, 3, 3)
+    """
+
+    def __init__(self,
+                 crystal: Crystal,
+                 amplitudes: Union[float, Dict[str, float]] = 0.0,
+                 strain: float = 0.0,
+                 seed: Optional[int] = None) -> None:
+        if strain < 0:
+            raise ValueError("`strain` must not be negative")
+        self._positions = crystal.positions
+        self._vectors = np.array(crystal.lattice_vectors.vectors, dtype=float)
+        self._species = crystal.species
+        if isinstance(amplitudes, dict):
+            missing = set(self._species) - set(amplitudes)
+            if missing:
+                raise ValueError(f"`amplitudes` is missing the species {sorted(missing)}")
+            self._amplitudes = np.array([amplitudes[specie] for specie in self._species], dtype=float)
+        else:
+            self._amplitudes = np.full(len(self._species), amplitudes, dtype=float)
+        if np.any(self._amplitudes < 0):
+            raise ValueError("`amplitudes` must not be negative")
+        self._strain = strain
+        self._seed = seed
+
+    ####################
+    #    Properties    #
+    ####################
+
+    @property
+    def species(self) -> np.ndarray:
+        """Returns the (N,) species shared by every member."""
+        return self._species
+
+    @property
+    def amplitudes(self) -> np.ndarray:
+        """Returns the (N,) standard deviation of the displacements of each atom."""
+        return self._amplitudes
+
+    ########################
+    #    Public Methods    #
+    ########################
+
+    def generate(self, members: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the (members, N, 3) positions and (members, 3, 3) lattice vectors of every member.
+
+        Args:
+            members: Number of perturbed copies.
+        """
+        positions = np.empty((members, len(self._positions), 3))
+        vectors = np.empty((members, 3, 3))
+        start = 0
+        for _positions, _vectors in self.iter_members(members):
+            positions[start:start + len(_positions)] = _positions
+            vectors[start:start + len(_vectors)] = _vectors
+            start += len(_positions)
+        return positions, vectors
+
+    def iter_members(self, members: int, max_memory: int = MAX_MEMORY) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Lazily yields blocks of the positions and lattice vectors of consecutive members.
+
+        Args:
+            members: Number of perturbed copies.
+            max_memory: Memory ceiling in bytes of the positions of each block.
+        """
+        strain_rng, displacement_rng = [np.random.default_rng(s) for s in np.random.SeedSequence(self._seed).spawn(2)]
+        block = max(1, max_memory // max(1, 8 * 3 * len(self._positions)))
+        for start in range(0, members, block):
+            count = min(block, members - start)
+            # random symmetric strains in Voigt order deform the positions and the lattice vectors together
+            components = self._strain * strain_rng.standard_normal((count, 6))
+            deformations = np.tile(np.identity(3), (count, 1, 1))
+            deformations[:, [0, 1, 2, 1, 0, 0], [0, 1, 2, 2, 2, 1]] += components
+            deformations[:, [2, 2, 1], [1, 0, 0]] += components[:, 3:]
+            positions = np.matmul(self._positions[np.newaxis, :, :], deformations)
+            displacements = displacement_rng.standard_normal(positions.shape)
+            positions += self._amplitudes[np.newaxis, :, np.newaxis] * displacements
+            yield positions, np.matmul(self._vectors[np.newaxis, :, :], deformations)
+
+
+def thermal_amplitudes(temperature: float, masses: Dict[str, float], frequency: float) -> Dict[str, float]:
+    """Returns the Maxwell-Boltzmann displacement amplitude of each specie.
+
+    Every atom is treated as an independent harmonic oscillator, such that the standard deviation
+    of each cartesian displacement is `sqrt(k_B T / (m w^2))` in angstroms.
+
+    Args:
+        temperature: Temperature in kelvin.
+        masses: Atomic mass of each specie in atomic mass units.
+        frequency: Oscillator frequency in terahertz.
+
+    Example:
+        >>> from atompack.crystal.ensemble import thermal_amplitudes
+        >>>
+        >>> # lighter atoms vibrate with larger amplitudes
+        >>> amplitudes = thermal_amplitudes(300, {"Cu": 63.546, "O": 15.999}, frequency=5.0)
+        >>> assert amplitudes["O"] > amplitudes["Cu"]
+    """
+    if temperature < 0 or frequency <= 0:
+        raise ValueError("`temperature` must not be negative and `frequency` must be positive")
+    return {
+        specie: float(np.sqrt(BOLTZMANN * temperature / (mass * frequency**2 * HARMONIC_ENERGY)))
+        for specie, mass in masses.items()
+    }
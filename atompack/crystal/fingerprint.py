@@ -0,0 +1,298 @@
+"""Canonical structure fingerprints and a hash index for deduplicating crystals."""
+
+import hashlib
+from itertools import product
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.special import erf
+
+from atompack.crystal.crystal import Crystal
+from atompack.crystal.matcher import StructureMatcher
+from atompack.crystal.neighbors import CHUNK_SIZE, NeighborSearch
+
+CUTOFF_SCALE = 2.5
+"""Default fingerprint cutoff in multiples of the cube root of the volume per atom."""
+
+GRID_DIMENSIONS = 6
+"""Number of evenly spaced neighbor counts which are quantized by `Fingerprint.grid_key` besides the volume."""
+
+
+class Fingerprint(object):
+    """Description of a periodic structure which is invariant to atom ordering, translation, rotation and cell choice.
+
+    The vector holds the smoothed cumulative number of neighbors of each specie
+    around an average atom of each specie at evenly spaced radii.
+
+    Note:
+        End users should construct Fingerprint objects with `Fingerprint.from_crystal`.
+
+    Args:
+        species: Sorted unique species.
+        composition: Reduced number of atoms of each specie.
+        volume: Volume per atom.
+        vector: Flattened (S, S, bins) cumulative neighbor counts.
+
+    Example:
+        >>> from atompack.crystal import Basis, Crystal, Fingerprint, LatticeParameters, Transform, UnitCell
+        >>> from atompack.symmetry import Spacegroup
+        >>>
+        >>> # conventional FCC cell and a supercell of it
+        >>> build = lambda: Crystal(UnitCell(Basis.primitive("Cu"), LatticeParameters.cubic(3.6), Spacegroup(225)))
+        >>> crystal = build()
+        >>> supercell = Transform().supercell((2, 1, 1)).apply(build())
+        >>>
+        >>> # both describe the same structure
+        >>> a = Fingerprint.from_crystal(crystal)
+        >>> b = Fingerprint.from_crystal(supercell)
+        >>> assert a.key == b.key
+        >>> assert a.isclose(b)
+    """
+
+    def __init__(self, species: Tuple[str, ...], composition: Tuple[int, ...], volume: float,
+                 vector: np.ndarray) -> None:
+        self._species = species
+        self._composition = composition
+        self._volume = volume
+        self._vector = vector
+
+    ######################
+    #    Constructors    #
+    ######################
+
+    @classmethod
+    def from_crystal(cls,
+                     crystal: Crystal,
+                     cutoff: Optional[float] = None,
+                     bins: int = 32,
+                     chunk_size: int = CHUNK_SIZE) -> 'Fingerprint':
+        """Initializes from a crystal.
+
+        Args:
+            crystal: The crystal to describe.
+            cutoff: Maximum neighbor distance. Defaults to a multiple of the cube root of the volume per atom.
+            bins: Number of radii at which neighbors are counted.
+            chunk_size: Number of central atoms processed per chunk.
+        """
+        unique, types, counts = np.unique(crystal.species, return_inverse=True, return_counts=True)
+        types = types.reshape(-1)
+        volume = np.abs(np.linalg.det(crystal.lattice_vectors.vectors)) / len(types)
+        if cutoff is None:
+            cutoff = CUTOFF_SCALE * volume**(1 / 3)
+        radii = np.linspace(0, cutoff, bins + 1)[1:]
+        sigma = cutoff / bins
+
+        # accumulate smoothed cumulative neighbor counts for each pair of species
+        n_pairs = len(unique)**2
+        res = np.zeros((n_pairs, bins))
+        search = NeighborSearch(crystal.positions, crystal.lattice_vectors, cutoff + 3 * sigma)
+        for i, j, distances, _ in search.iter_pairs(chunk_size):
+            weights = 0.5 * (1 + erf((radii - distances[:, np.newaxis]) / (np.sqrt(2) * sigma)))
+            keys = types[i] * len(unique) + types[j]
+            onehot = coo_matrix((np.ones(len(keys)), (keys, np.arange(len(keys)))), shape=(n_pairs, len(keys)))
+            res += onehot.dot(weights)
+        res = res.reshape(len(unique), len(unique), bins) / counts[:, np.newaxis, np.newaxis]
+
+        composition = counts // np.gcd.reduce(counts) if len(counts) > 0 else counts
+        return cls(tuple(str(x) for x in unique), tuple(int(x) for x in composition), float(volume), res.reshape(-1))
+
+    ####################
+    #    Properties    #
+    ####################
+
+    @property
+    def species(self) -> Tuple[str, ...]:
+        """Returns the sorted unique species."""
+        return self._species
+
+    @property
+    def composition(self) -> Tuple[int, ...]:
+        """Returns the reduced number of atoms of each specie."""
+        return self._composition
+
+    @property
+    def volume(self) -> float:
+        """Returns the volume per atom."""
+        return self._volume
+
+    @property
+    def vector(self) -> np.ndarray:
+        """Returns the flattened cumulative neighbor counts."""
+        return self._vector
+
+    @property
+    def key(self) -> str:
+        """Returns a coarse hash which is usually shared by equivalent structures.
+
+        Note:
+            Quantization may split fingerprints which are close within tolerance,
+            so the key is suited to bulk grouping but not to exact deduplication.
+        """
+        return self.coarse_key()
+
+    ########################
+    #    Public Methods    #
+    ########################
+
+    def coarse_key(self, resolution: float = 0.5, volume_tolerance: float = 0.05) -> str:
+        """Returns a hash of the fingerprint quantized to a resolution.
+
+        Args:
+            resolution: Quantization step of the neighbor counts.
+            volume_tolerance: Relative quantization step of the volume per atom.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(repr((self._species, self._composition)).encode())
+        digest.update(repr(int(np.round(np.log(self._volume) / np.log1p(volume_tolerance)))).encode())
+        digest.update(np.round(self._vector / resolution).astype(np.int64).tobytes())
+        return digest.hexdigest()
+
+    def grid_key(self, tol: float = 0.1, volume_tolerance: float = 0.02) -> Tuple[int, ...]:
+        """Returns the cell of a coarse grid which holds the fingerprint.
+
+        The grid quantizes the logarithm of the volume per atom and `GRID_DIMENSIONS` evenly spaced
+        neighbor counts in steps of twice their tolerance. See `grid_neighbors`.
+
+        Args:
+            tol: Absolute tolerance of the neighbor counts.
+            volume_tolerance: Relative tolerance of the volume per atom.
+        """
+        return tuple(int(x) for x in np.floor(self._grid_coordinates(tol, volume_tolerance)))
+
+    def grid_neighbors(self, tol: float = 0.1, volume_tolerance: float = 0.02) -> List[Tuple[int, ...]]:
+        """Returns every grid cell which may hold a fingerprint that is close within tolerance.
+
+        Values within tolerance of each other differ by at most half a step, so along each axis
+        only the own cell and the adjacent cell on the nearer side need to be probed.
+
+        Args:
+            tol: Absolute tolerance of the neighbor counts.
+            volume_tolerance: Relative tolerance of the volume per atom.
+        """
+        coordinates = self._grid_coordinates(tol, volume_tolerance)
+        cell = np.floor(coordinates).astype(int)
+        sides = np.where(coordinates - cell < 0.5, -1, 1)
+        return [tuple(int(x) for x in cell + sides * np.array(mask)) for mask in product((0, 1), repeat=len(cell))]
+
+    def isclose(self, other: 'Fingerprint', tol: float = 0.1, volume_tolerance: float = 0.02) -> bool:
+        """Returns True if the fingerprints match within tolerance.
+
+        Args:
+            other: The fingerprint to compare against.
+            tol: Absolute tolerance of the neighbor counts.
+            volume_tolerance: Relative tolerance of the volume per atom.
+        """
+        if self._species != other._species or self._composition != other._composition:
+            return False
+        if abs(self._volume - other._volume) > volume_tolerance * max(self._volume, other._volume):
+            return False
+        if self._vector.shape != other._vector.shape:
+            return False
+        return bool(np.max(np.abs(self._vector - other._vector), initial=0) <= tol)
+
+    #########################
+    #    Private Methods    #
+    #########################
+
+    def _grid_coordinates(self, tol: float, volume_tolerance: float) -> np.ndarray:
+        # volume and evenly spaced neighbor counts in units of the grid steps
+        size = len(self._vector)
+        indices = np.unique(np.linspace(0, size - 1, GRID_DIMENSIONS + 2).round().astype(int)[1:-1]) if size > 0 else []
+        volume = np.log(self._volume) / (-2 * np.log1p(-volume_tolerance))
+        return np.concatenate(([volume], self._vector[indices] / (2 * tol)))
+
+
+# fingerprint/crystal entries of each grid cell keyed by species, composition and cell
+_Bucket = List[Tuple[Fingerprint, Crystal]]
+_BucketKey = Tuple[Tuple[str, ...], Tuple[int, ...], Tuple[int, ...]]
+
+
+class StructureIndex(object):
+    """Hash index which deduplicates streams of crystals.
+
+    Crystals are hashed by their sorted species, reduced composition and `Fingerprint.grid_key`.
+    A lookup probes the cells of `Fingerprint.grid_neighbors`, which hold every fingerprint
+    within tolerance, compares the candidates of those buckets by fingerprint and only then by an
+    exact comparison. Each addition therefore costs a constant number of dictionary lookups
+    plus the comparisons against the structures which share its neighborhood.
+
+    Args:
+        comparator: Exact structural comparison applied to matching fingerprints.
+            Defaults to `StructureMatcher.fit` with default tolerances.
+        cutoff: Fingerprint cutoff.
+        bins: Number of fingerprint radii.
+        volume_tolerance: Relative tolerance of the volume per atom.
+        tol: Absolute tolerance of the neighbor counts of matching fingerprints.
+    """
+
+    def __init__(self,
+                 comparator: Optional[Callable[[Crystal, Crystal], bool]] = None,
+                 cutoff: Optional[float] = None,
+                 bins: int = 32,
+                 volume_tolerance: float = 0.02,
+                 tol: float = 0.1) -> None:
+        if comparator is None:
+            comparator = StructureMatcher().fit
+        self._comparator = comparator
+        self._cutoff = cutoff
+        self._bins = bins
+        self._volume_tolerance = volume_tolerance
+        self._tol = tol
+        self._buckets: Dict[_BucketKey, _Bucket] = {}
+        self._size = 0
+
+    ########################
+    #    Public Methods    #
+    ########################
+
+    def add(self, crystal: Crystal) -> bool:
+        """Adds a crystal to the index and returns True if it was not already present."""
+        fingerprint = Fingerprint.from_crystal(crystal, self._cutoff, self._bins)
+        if self._find(fingerprint, crystal) is not None:
+            return False
+        key = (fingerprint.species, fingerprint.composition, fingerprint.grid_key(self._tol, self._volume_tolerance))
+        self._buckets.setdefault(key, []).append((fingerprint, crystal))
+        self._size += 1
+        return True
+
+    def find(self, crystal: Crystal) -> Optional[Crystal]:
+        """Returns the indexed crystal equivalent to `crystal` if one exists."""
+        fingerprint = Fingerprint.from_crystal(crystal, self._cutoff, self._bins)
+        return self._find(fingerprint, crystal)
+
+    def deduplicate(self, crystals: Iterable[Crystal]) -> Iterator[Crystal]:
+        """Adds each crystal to the index and yields those which were not already present."""
+        for crystal in crystals:
+            if self.add(crystal):
+                yield crystal
+
+    #########################
+    #    Special Methods    #
+    #########################
+
+    def __contains__(self, crystal: Crystal) -> bool:
+        return self.find(crystal) is not None
+
+    def __iter__(self) -> Iterator[Crystal]:
+        for entries in self._buckets.values():
+            for _, crystal in entries:
+                yield crystal
+
+    def __len__(self) -> int:
+        return self._size
+
+    #########################
+    #    Private Methods    #
+    #########################
+
+    def _find(self, fingerprint: Fingerprint, crystal: Crystal) -> Optional[Crystal]:
+        # fingerprints within tolerance lie in the same cell or an adjacent cell on the nearer side of each axis
+        for cell in fingerprint.grid_neighbors(self._tol, self._volume_tolerance):
+            key = (fingerprint.species, fingerprint.composition, cell)
+            for _fingerprint, _crystal in self._buckets.get(key, []):
+                if not fingerprint.isclose(_fingerprint, self._tol, self._volume_tolerance):
+                    continue
+                if self._comparator(crystal, _crystal):
+                    return _crystal
+        return None
@@ -0,0 +1,222 @@
+"""Lattice matching of epitaxial interfaces between two crystals."""
+
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+from scipy.spatial.transform import Rotation
+
+from atompack.crystal.components import LatticeVectors
+from atompack.crystal.reduction import reduce_miller_indices, surface_matrix
+from atompack.crystal.spatial import MillerIndex, Orientation
+
+SUPERLATTICES: Dict[int, np.ndarray] = {}
+"""Cache of the (K, 2, 2) Hermite normal forms of every planar superlattice of each index."""
+
+
+class InterfaceMatch(NamedTuple):
+    """Pair of planar supercells of a film and a substrate which match within tolerance.
+
+    The first two rows of each matrix are the matched supercell vectors within the interface plane
+    and the third row is the shortest lattice vector between adjacent planes. Each orientation
+    rotates the first matched vector of its lattice onto x and the interface normal onto z,
+    such that `Transform().orient(orientation)` aligns both crystals for stacking along z.
+
+    Attributes:
+        film_matrix: (3, 3) integer rows of the film supercell in film lattice units.
+        substrate_matrix: (3, 3) integer rows of the substrate supercell in substrate lattice units.
+        area: Area of the substrate supercell.
+        strain: (2, 2) Green-Lagrange strain which maps the film supercell onto the substrate supercell.
+        film_orientation: Rotation which aligns the film with the interface frame.
+        substrate_orientation: Rotation which aligns the substrate with the interface frame.
+    """
+    film_matrix: np.ndarray
+    substrate_matrix: np.ndarray
+    area: float
+    strain: np.ndarray
+    film_orientation: Orientation
+    substrate_orientation: Orientation
+
+    @property
+    def max_strain(self) -> float:
+        """Returns the largest absolute principal strain."""
+        return float(np.max(np.abs(np.linalg.eigvalsh(self.strain))))
+
+
+class InterfaceMatcher(object):
+    """Zur-McGill search for commensurate planar supercells of two lattices.
+
+    Supercell areas of the film and the substrate are paired first and only pairs within the
+    area tolerance are expanded into superlattices. Every superlattice of an index is taken from
+    a cache of integer Hermite normal forms, reduced in a vectorized Gauss reduction and compared
+    against all superlattices of the other crystal at once by vector lengths and angles.
+    Reduced supercells keep the handedness of the interface plane, so mirror images are never
+    matched, and matches of equal lengths and angles within a pair of areas are listed once.
+
+    Args:
+        max_area: Largest supercell area to search.
+        area_tol: Relative tolerance of the supercell areas.
+        length_tol: Relative tolerance of the supercell vector lengths.
+        angle_tol: Tolerance of the angle between the supercell vectors in radians.
+
+    Example:
+        >>> from atompack.crystal import InterfaceMatcher, LatticeParameters, LatticeVectors, MillerIndex
+        >>>
+        >>> # square lattices whose lengths are commensurate in a 2 by 2 and 3 by 3 ratio
+        >>> film = LatticeVectors.from_lattice_parameters(LatticeParameters.cubic(3.0))
+        >>> substrate = LatticeVectors.from_lattice_parameters(LatticeParameters.cubic(2.0))
+        >>> index = MillerIndex((0, 0, 1))
+        >>> matches = InterfaceMatcher(max_area=40).match(film, index, substrate, index)
+        >>> assert round(matches[0].area) == 36
+        >>> assert round(np.linalg.det(matches[0].film_matrix[:2, :2])) == 4
+        >>> assert matches[0].max_strain < 1E-9
+    """
+
+    def __init__(self,
+                 max_area: float = 400.0,
+                 area_tol: float = 0.09,
+                 length_tol: float = 0.03,
+                 angle_tol: float = 0.01) -> None:
+        self.max_area = max_area
+        self.area_tol = area_tol
+        self.length_tol = length_tol
+        self.angle_tol = angle_tol
+
+    ########################
+    #    Public Methods    #
+    ########################
+
+    def match(self, film: LatticeVectors, film_index: MillerIndex, substrate: LatticeVectors,
+              substrate_index: MillerIndex) -> List[InterfaceMatch]:
+        """Returns every match within tolerance sorted by area and then by strain.
+
+        Args:
+            film: Lattice of the film.
+            film_index: Indices of the interface plane relative to the film lattice.
+            substrate: Lattice of the substrate.
+            substrate_index: Indices of the interface plane relative to the substrate lattice.
+        """
+        film_surface, film_basis = _planar_basis(film.vectors, film_index)
+        substrate_surface, substrate_basis = _planar_basis(substrate.vectors, substrate_index)
+        film_area = abs(np.linalg.det(film_basis))
+        substrate_area = abs(np.linalg.det(substrate_basis))
+
+        # prune by area before any superlattice is built
+        film_counts = np.arange(1, int(self.max_area / film_area) + 1)
+        substrate_counts = np.arange(1, int(self.max_area / substrate_area) + 1)
+        areas = np.outer(film_counts * film_area, np.ones(len(substrate_counts)))
+        ratios = np.abs(areas / (substrate_counts * substrate_area) - 1)
+        pairs = np.argwhere(ratios <= self.area_tol)
+
+        res = []
+        reduced: Dict[Tuple[int, int], Tuple[np.ndarray, np.ndarray]] = {}
+        for i, j in pairs:
+            n, m = int(film_counts[i]), int(substrate_counts[j])
+            if (0, n) not in reduced:
+                reduced[(0, n)] = _reduced_superlattices(film_basis, n)
+            if (1, m) not in reduced:
+                reduced[(1, m)] = _reduced_superlattices(substrate_basis, m)
+            res.extend(self._match_superlattices(reduced[(0, n)], reduced[(1, m)], film, film_surface, substrate,
+                                                 substrate_surface))
+        return sorted(res, key=lambda match: (round(match.area, 6), match.max_strain))
+
+    #########################
+    #    Private Methods    #
+    #########################
+
+    def _match_superlattices(self, film: Tuple[np.ndarray, np.ndarray], substrate: Tuple[np.ndarray, np.ndarray],
+                             film_vectors: LatticeVectors, film_surface: np.ndarray, substrate_vectors: LatticeVectors,
+                             substrate_surface: np.ndarray) -> List[InterfaceMatch]:
+        film_matrices, film_cartesian = film
+        substrate_matrices, substrate_cartesian = substrate
+
+        # compare the lengths and angles of every pair of reduced superlattices at once
+        film_features = _features(film_cartesian)
+        substrate_features = _features(substrate_cartesian)
+        lengths = np.abs(film_features[:, np.newaxis, :2] / substrate_features[np.newaxis, :, :2] - 1)
+        angles = np.abs(film_features[:, np.newaxis, 2] - substrate_features[np.newaxis, :, 2])
+        mask = np.all(lengths <= self.length_tol, axis=-1) & (angles <= self.angle_tol)
+
+        # superlattices of equal shape are related by the symmetry of the plane and are listed once
+        pairs = np.argwhere(mask)
+        if len(pairs) == 0:
+            return []
+        keys = np.round(np.hstack((film_features[pairs[:, 0]], substrate_features[pairs[:, 1]])) / 1E-8)
+        _, unique = np.unique(keys, axis=0, return_index=True)
+
+        res = []
+        for i, j in pairs[np.sort(unique)]:
+            # deformation of the film supercell onto the substrate supercell in the interface frame
+            deformation = np.linalg.solve(film_cartesian[i], substrate_cartesian[j])
+            strain = (np.matmul(deformation, deformation.T) - np.identity(2)) / 2
+            film_matrix = np.vstack((np.matmul(film_matrices[i], film_surface[:2]), film_surface[2]))
+            substrate_matrix = np.vstack((np.matmul(substrate_matrices[j], substrate_surface[:2]),
+                                          substrate_surface[2]))
+            res.append(
+                InterfaceMatch(film_matrix, substrate_matrix, float(abs(np.linalg.det(substrate_cartesian[j]))),
+                               strain, _orientation(np.matmul(film_matrix, film_vectors.vectors)),
+                               _orientation(np.matmul(substrate_matrix, substrate_vectors.vectors))))
+        return res
+
+
+#########################
+#    Private Helpers    #
+#########################
+
+
+def _planar_basis(vectors: np.ndarray, miller_index: MillerIndex) -> Tuple[np.ndarray, np.ndarray]:
+    # integer surface cell and the (2, 2) in-plane basis in a frame with the first vector along x
+    surface = surface_matrix(np.array(reduce_miller_indices(miller_index.hkl)), vectors)
+    cartesian = np.matmul(surface[:2], vectors)
+    x = cartesian[0] / np.linalg.norm(cartesian[0])
+    normal = np.cross(cartesian[0], cartesian[1])
+    y = np.cross(normal / np.linalg.norm(normal), x)
+    return surface, np.matmul(cartesian, np.column_stack((x, y)))
+
+
+def _superlattices(n: int) -> np.ndarray:
+    # upper triangular Hermite normal forms [[a, b], [0, c]] with a * c = n and 0 <= b < c
+    if n not in SUPERLATTICES:
+        matrices = [[[a, b], [0, n // a]] for a in range(1, n + 1) if n % a == 0 for b in range(n // a)]
+        SUPERLATTICES[n] = np.array(matrices, dtype=int)
+    return SUPERLATTICES[n]
+
+
+def _reduced_superlattices(basis: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Gauss reduction of every superlattice of index `n` at once which preserves handedness
+    matrices = _superlattices(n).copy()
+    while True:
+        cartesian = np.matmul(matrices, basis)
+        u, v = cartesian[:, 0], cartesian[:, 1]
+        ratios = np.einsum("ij,ij->i", u, v) / np.einsum("ij,ij->i", u, u)
+        # ties at a half are left alone such that the reduction terminates
+        mu = np.where(np.abs(ratios) > 0.5 + 1E-10, np.round(ratios), 0).astype(int)
+        matrices[:, 1] -= mu[:, np.newaxis] * matrices[:, 0]
+        cartesian = np.matmul(matrices, basis)
+        swap = np.linalg.norm(cartesian[:, 1], axis=1) < np.linalg.norm(cartesian[:, 0], axis=1) - 1E-10
+        if not np.any(swap) and not np.any(mu):
+            break
+        matrices[swap] = _rotate(matrices[swap])
+    # choose an acute angle between the reduced vectors
+    obtuse = np.einsum("ij,ij->i", cartesian[:, 0], cartesian[:, 1]) < 0
+    matrices[obtuse] = _rotate(matrices[obtuse])
+    return matrices, np.matmul(matrices, basis)
+
+
+def _rotate(matrices: np.ndarray) -> np.ndarray:
+    # maps each basis (u, v) onto (v, -u) which spans the same lattice with the same handedness
+    return np.stack((matrices[:, 1], -matrices[:, 0]), axis=1)
+
+
+def _features(cartesian: np.ndarray) -> np.ndarray:
+    # (K, 3) lengths of both vectors and the angle between them
+    lengths = np.linalg.norm(cartesian, axis=-1)
+    cos = np.einsum("ij,ij->i", cartesian[:, 0], cartesian[:, 1]) / np.prod(lengths, axis=1)
+    return np.column_stack((lengths, np.arccos(np.clip(cos, -1, 1))))
+
+
+def _orientation(supercell: np.ndarray) -> Orientation:
+    # rotation of the first in-plane vector onto x and the interface normal onto z
+    x = supercell[0] / np.linalg.norm(supercell[0])
+    z = np.cross(supercell[0], supercell[1])
+    z /= np.linalg.norm(z)
+    return Orientation(Rotation.from_matrix(np.vstack((x, np.cross(z, x), z))).as_quat())
@@ -0,0 +1,237 @@
+"""Crystals whose atoms are stored out of core in memory mapped files."""
+
+import os
+from typing import TYPE_CHECKING, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import orjson
+from retworkx import PyGraph
+
+from atompack.atom import Atom
+from atompack.bond import Bond
+from atompack.constants import MAX_MEMORY
+from atompack.crystal.components import LatticeVectors
+from atompack.crystal.crystal import Crystal, UnitCell
+
+if TYPE_CHECKING:
+    from atompack.molecule import Molecule
+
+METADATA = "crystal.json"
+"""Name of the file which holds the unit cell, the lattice vectors and the specie names."""
+
+POSITIONS = "positions.npy"
+"""Name of the (N, 3) float64 array of cartesian positions."""
+
+SPECIES = "species.npy"
+"""Name of the (N,) uint16 array of specie codes."""
+
+UNSUPPORTED = "a mapped crystal holds no atom or bond objects, load a selection of atoms with `load`"
+"""Message of the TypeError raised by the graph based accessors of mapped crystals."""
+
+
+class MappedCrystal(Crystal):
+    """Crystal whose positions and species live in memory mapped `.npy` files of a directory.
+
+    The atoms are never held as `Atom` objects, such that supercells far larger than the available
+    memory can be generated by `Transform.supercell`, queried by region and exported by the
+    writers of `atompack.io` one block at a time. Species are stored as codes into `species_names`.
+
+    Args:
+        directory: Directory of the files written by `MappedCrystal.create`.
+        mode: Memory map mode which is either read only 'r' or read and write 'r+'.
+
+    Example:
+        >>> from atompack.crystal import Basis, Crystal, LatticeParameters, MappedCrystal, Transform, UnitCell
+        >>> from atompack.symmetry import Spacegroup
+        >>> import tempfile
+        >>>
+        >>> # FCC copper supercell written to disk chunk by chunk
+        >>> unit_cell = UnitCell(Basis.primitive("Cu"), LatticeParameters.cubic(3.6), Spacegroup(225))
+        >>> directory = tempfile.mkdtemp()
+        >>> crystal = Transform().supercell((10, 10, 10), directory=directory).apply(Crystal(unit_cell))
+        >>> assert crystal.positions.shape == (4000, 3)
+        >>>
+        >>> # reopen the files and load a corner of the supercell into memory
+        >>> crystal = MappedCrystal(directory)
+        >>> corner = crystal.load(crystal.select_region(np.zeros(3), np.full(3, 3.6)))
+        >>> assert len(corner.atoms) == 4
+    """
+
+    def __init__(self, directory: str, mode: str = "r") -> None:
+        if mode not in ("r", "r+"):
+            raise ValueError("`mode` must be either 'r' or 'r+'")
+        with open(os.path.join(directory, METADATA), "rb") as f:
+            data = orjson.loads(f.read())
+
+        # validate type
+        _type = data.pop("type")
+        if _type != type(self).__name__:
+            raise TypeError(f"cannot deserialize from type `{_type}`")
+
+        unit_cell = UnitCell.from_json(orjson.dumps(data["unit_cell"]).decode())
+        lattice_vectors = LatticeVectors.from_json(orjson.dumps(data["lattice_vectors"]).decode())
+        # the graph stays empty and the unit cell is never modified
+        super().__init__(unit_cell, lattice_vectors, PyGraph())
+        self._directory = directory
+        self._species_names = np.array(data["species"], dtype=str)
+        self._positions = np.load(os.path.join(directory, POSITIONS), mmap_mode=mode)
+        self._codes = np.load(os.path.join(directory, SPECIES), mmap_mode=mode)
+
+    ######################
+    #    Constructors    #
+    ######################
+
+    @classmethod
+    def create(cls, directory: str, unit_cell: UnitCell, lattice_vectors: LatticeVectors, species: Sequence[str],
+               size: int) -> 'MappedCrystal':
+        """Allocates the files of `size` atoms and returns a writable crystal on top of them.
+
+        Args:
+            directory: Directory of the files which is created if necessary.
+            unit_cell: Unit cell of the crystal.
+            lattice_vectors: Lattice vectors of the crystal.
+            species: Specie name of each code.
+            size: Number of atoms.
+        """
+        if len(species) > np.iinfo(np.uint16).max + 1:
+            raise ValueError("a mapped crystal holds at most 65536 distinct species")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, METADATA), "wb") as f:
+            f.write(
+                orjson.dumps({
+                    "type": cls.__name__,
+                    "unit_cell": orjson.loads(unit_cell.to_json()),
+                    "lattice_vectors": orjson.loads(lattice_vectors.to_json()),
+                    "species": [str(specie) for specie in species],
+                }))
+        # allocating sparse files does not write any data
+        for name, shape, dtype in ((POSITIONS, (size, 3), np.float64), (SPECIES, (size,), np.uint16)):
+            array = np.lib.format.open_memmap(os.path.join(directory, name), mode="w+", dtype=dtype, shape=shape)
+            del array
+        return cls(directory, mode="r+")
+
+    ####################
+    #    Properties    #
+    ####################
+
+    @property
+    def atoms(self) -> List[Atom]:
+        """Raises a TypeError since a mapped crystal holds no atom objects. See `load`."""
+        raise TypeError(UNSUPPORTED)
+
+    @property
+    def bonds(self) -> List[Bond]:
+        """Raises a TypeError since a mapped crystal holds no bond objects."""
+        raise TypeError(UNSUPPORTED)
+
+    @property
+    def fragment_ids(self) -> np.ndarray:
+        """Raises a TypeError since fragments are defined by bonds."""
+        raise TypeError(UNSUPPORTED)
+
+    @property
+    def fragment_count(self) -> int:
+        """Raises a TypeError since fragments are defined by bonds."""
+        raise TypeError(UNSUPPORTED)
+
+    @property
+    def directory(self) -> str:
+        """Returns the directory of the files."""
+        return self._directory
+
+    @property
+    def positions(self) -> np.ndarray:
+        """Returns the (N, 3) memory mapped position of each atom."""
+        return self._positions
+
+    @property
+    def species(self) -> np.ndarray:
+        """Returns the specie of each atom as an (N,) array.
+
+        Note:
+            The names are decoded in memory. Prefer `codes` or `iter_blocks` for large crystals.
+        """
+        return self._species_names[self._codes]
+
+    @property
+    def codes(self) -> np.ndarray:
+        """Returns the (N,) memory mapped index of the specie of each atom into `species_names`."""
+        return self._codes
+
+    @property
+    def species_names(self) -> np.ndarray:
+        """Returns the specie name of each code."""
+        return self._species_names
+
+    ########################
+    #    Public Methods    #
+    ########################
+
+    def extract_fragments(self) -> List['Molecule']:
+        """Raises a TypeError since fragments are defined by bonds."""
+        raise TypeError(UNSUPPORTED)
+
+    def flush(self) -> None:
+        """Writes any pending changes of the memory maps to disk."""
+        for array in (self._positions, self._codes):
+            if isinstance(array, np.memmap):
+                array.flush()
+
+    def iter_blocks(self, max_memory: int = MAX_MEMORY) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Yields the species and positions of consecutive atoms in blocks which fit in memory.
+
+        The blocks are accepted by every writer of `atompack.io`.
+
+        Args:
+            max_memory: Memory ceiling in bytes of each block.
+        """
+        itemsize = 3 * 8 + self._species_names.itemsize
+        for rows in self._rows(itemsize, max_memory):
+            yield self._species_names[self._codes[rows]], np.array(self._positions[rows])
+
+    def select_region(self, lower: np.ndarray, upper: np.ndarray, max_memory: int = MAX_MEMORY) -> np.ndarray:
+        """Returns the indices of the atoms inside an axis aligned box.
+
+        Args:
+            lower: Inclusive lower cartesian corner of the box.
+            upper: Exclusive upper cartesian corner of the box.
+            max_memory: Memory ceiling in bytes of each scanned block.
+        """
+        lower = np.asarray(lower, dtype=float).reshape(1, 3)
+        upper = np.asarray(upper, dtype=float).reshape(1, 3)
+        res = []
+        for rows in self._rows(2 * 3 * 8, max_memory):
+            positions = self._positions[rows]
+            inside = np.all((positions >= lower) & (positions < upper), axis=1)
+            res.append(rows.start + np.flatnonzero(inside))
+        return np.concatenate(res) if len(res) > 0 else np.empty(0, dtype=int)
+
+    def load(self, indices: Optional[np.ndarray] = None) -> Crystal:
+        """Returns an in-memory crystal with a copy of a selection of atoms.
+
+        Args:
+            indices: Indices of the atoms to load in order. Every atom is loaded by default.
+        """
+        if indices is None:
+            indices = np.arange(len(self._positions))
+        indices = np.asarray(indices, dtype=int)
+        species = self._species_names[self._codes[indices]]
+        positions = np.array(self._positions[indices])
+        graph = PyGraph()
+        graph.add_nodes_from([Atom(specie, position) for specie, position in zip(species.tolist(), positions)])
+        return Crystal(self._unit_cell, LatticeVectors(np.array(self._lattice_vectors.vectors)), graph)
+
+    def to_json(self) -> str:
+        """Raises a TypeError since the atoms only live in the files of `directory`."""
+        raise TypeError(UNSUPPORTED)
+
+    #########################
+    #    Private Methods    #
+    #########################
+
+    def _rows(self, itemsize: int, max_memory: int) -> Iterator[slice]:
+        # consecutive row blocks of at most `max_memory` bytes
+        size = len(self._positions)
+        block = max(1, max_memory // itemsize)
+        for start in range(0, size, block):
+            yield slice(start, min(start + block, size))
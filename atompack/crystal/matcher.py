@@ -0,0 +1,228 @@
+"""Structural equivalence of crystals under lattice choice, origin shift, rotation and atom permutation."""
+
+from typing import Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+
+from atompack.constants import MAX_MEMORY
+from atompack.crystal.crystal import Crystal
+from atompack.crystal.detection import find_primitive
+from atompack.crystal.reduction import lattice_points, reduce_lattice
+
+PRUNE_SITES = 4
+"""Number of sites of each specie used to prune origin shifts before every site is tested."""
+
+
+class _Reduced(NamedTuple):
+    # precomputed representation of a crystal on its reduced lattice
+    vectors: np.ndarray
+    fractional: np.ndarray
+    types: np.ndarray
+    species: Tuple[str, ...]
+    composition: Tuple[int, ...]
+    volume: float
+
+
+class StructureMatcher(object):
+    """Decides whether crystals describe the same structure.
+
+    Both crystals are reduced to their primitive cells and compared on reduced lattices, such that
+    supercells of any size describe the same structure. Candidate lattice mappings are pruned by
+    composition, volume per atom and lattice vector lengths and angles before the remaining
+    origin shifts are tested with vectorized periodic distance checks.
+
+    Args:
+        ltol: Relative tolerance of lattice vector lengths.
+        angle_tol: Tolerance of lattice angles in radians.
+        stol: Site tolerance in multiples of the cube root of the volume per atom.
+        max_memory: Memory ceiling in bytes for each block of tested origin shifts.
+        symprec: Distance tolerance of the primitive cell search.
+
+    Example:
+        >>> from atompack.crystal import Basis, Crystal, LatticeParameters, StructureMatcher, Transform, UnitCell
+        >>> from atompack.symmetry import Spacegroup
+        >>> import numpy as np
+        >>>
+        >>> # CsCl structures which differ by origin and cell size
+        >>> build = lambda origin: Crystal(UnitCell(
+        ...     Basis([("Cs", origin), ("Cl", origin + 0.5)]), LatticeParameters.cubic(4.1), Spacegroup(1)))
+        >>> a = build(np.zeros(3))
+        >>> b = Transform().supercell((2, 1, 1)).apply(build(np.full(3, 0.2)))
+        >>> assert StructureMatcher().fit(a, b)
+    """
+
+    def __init__(self,
+                 ltol: float = 0.2,
+                 angle_tol: float = 5 * np.pi / 180,
+                 stol: float = 0.3,
+                 max_memory: int = MAX_MEMORY,
+                 symprec: float = 1E-2) -> None:
+        self.ltol = ltol
+        self.angle_tol = angle_tol
+        self.stol = stol
+        self.max_memory = max_memory
+        self.symprec = symprec
+
+    ########################
+    #    Public Methods    #
+    ########################
+
+    def fit(self, a: Crystal, b: Crystal) -> bool:
+        """Returns True if both crystals describe the same structure."""
+        return self._fit(self._reduce(a), self._reduce(b))
+
+    def fit_many(self, reference: Crystal, candidates: Iterable[Crystal]) -> np.ndarray:
+        """Returns a boolean array indicating which candidates match the reference.
+
+        The reference is reduced once and reused for every candidate.
+        """
+        reduced = self._reduce(reference)
+        return np.array([self._fit(reduced, self._reduce(candidate)) for candidate in candidates], dtype=bool)
+
+    def group(self, crystals: List[Crystal]) -> List[List[int]]:
+        """Groups equivalent crystals and returns the indices of each group."""
+        reduced = [self._reduce(crystal) for crystal in crystals]
+        groups: List[List[int]] = []
+        for index, candidate in enumerate(reduced):
+            for group in groups:
+                if self._fit(reduced[group[0]], candidate):
+                    group.append(index)
+                    break
+            else:
+                groups.append([index])
+        return groups
+
+    #########################
+    #    Private Methods    #
+    #########################
+
+    def _reduce(self, crystal: Crystal) -> _Reduced:
+        species, types = np.unique(crystal.species, return_inverse=True)
+        types = types.reshape(-1)
+        vectors = crystal.lattice_vectors.vectors
+        fractional = crystal.lattice_vectors.to_fractional(crystal.positions)
+        # keep one translated copy of each primitive site
+        if len(types) > 0:
+            try:
+                matrix, labels = find_primitive(vectors, fractional, types, self.symprec)
+            except ValueError:
+                matrix, labels = np.identity(3), np.arange(len(types))
+            _, first = np.unique(labels, return_index=True)
+            fractional = np.matmul(fractional[first], np.linalg.inv(matrix))
+            vectors, types = np.matmul(matrix, vectors), types[first]
+        counts = np.bincount(types, minlength=len(species))
+        vectors, reduction = reduce_lattice(vectors)
+        fractional = np.matmul(fractional, np.linalg.inv(reduction))
+        fractional -= np.floor(fractional)
+        composition = counts // np.gcd.reduce(counts) if len(counts) > 0 else counts
+        volume = np.abs(np.linalg.det(vectors)) / max(1, len(types))
+        return _Reduced(vectors, fractional, types.reshape(-1), tuple(species), tuple(composition), volume)
+
+    def _fit(self, a: _Reduced, b: _Reduced) -> bool:
+        # prune by composition and volume per atom
+        if a.species != b.species or a.composition != b.composition:
+            return False
+        if abs(a.volume - b.volume) > self.ltol * max(a.volume, b.volume):
+            return False
+        if len(a.types) < len(b.types):
+            a, b = b, a
+        if len(a.types) % len(b.types) != 0:
+            return False
+        ratio = len(a.types) // len(b.types)
+
+        # test each supercell of `b` whose lattice matches the lattice of `a`
+        for matrix in self._lattice_mappings(a.vectors, b.vectors, ratio):
+            fractional, types = _supercell_sites(b.fractional, b.types, matrix)
+            if self._fit_sites(a, fractional, types):
+                return True
+        return False
+
+    def _lattice_mappings(self, target: np.ndarray, vectors: np.ndarray, ratio: int) -> Iterable[np.ndarray]:
+        # integer matrices which map `vectors` onto a lattice with the metric of `target`
+        lengths = np.linalg.norm(target, axis=1)
+        bounds = np.ceil(np.max(lengths) * (1 + self.ltol) * np.linalg.norm(np.linalg.inv(vectors), axis=0))
+        bounds = bounds.astype(int)
+        grid = np.array(list(np.ndindex(*(2 * bounds + 1)))) - bounds
+        cartesian = np.matmul(grid, vectors)
+        norms = np.linalg.norm(cartesian, axis=1)
+        candidates = [np.flatnonzero(np.abs(norms - length) <= self.ltol * length) for length in lengths]
+        if any(len(candidate) == 0 for candidate in candidates):
+            return
+
+        # prune pairs of vectors by the angle between them
+        target_angles = _angles(target)
+
+        def angle_mask(i, j, k):
+            cos = np.matmul(cartesian[i], cartesian[j].T) / np.outer(norms[i], norms[j])
+            return np.abs(np.arccos(np.clip(cos, -1, 1)) - target_angles[k]) <= self.angle_tol
+
+        ab = np.argwhere(angle_mask(candidates[0], candidates[1], 2))
+        for i, j in ab:
+            first, second = candidates[0][i], candidates[1][j]
+            mask = angle_mask(candidates[2], np.array([first]), 1)[:, 0]
+            mask &= angle_mask(candidates[2], np.array([second]), 0)[:, 0]
+            for third in candidates[2][mask]:
+                matrix = grid[[first, second, third]]
+                if abs(round(np.linalg.det(matrix))) == ratio:
+                    yield matrix
+
+    def _fit_sites(self, a: _Reduced, fractional: np.ndarray, types: np.ndarray) -> bool:
+        tolerance = self.stol * a.volume**(1 / 3)
+
+        # anchor the rarest specie of `a` onto each site of that specie in `b`
+        counts = np.bincount(a.types, minlength=len(a.species))
+        if not np.array_equal(counts, np.bincount(types, minlength=len(a.species))):
+            return False
+        rarest = np.argmin(np.where(counts > 0, counts, np.iinfo(int).max))
+        anchor = a.fractional[np.flatnonzero(a.types == rarest)[0]]
+        shifts = anchor - fractional[types == rarest]
+
+        # prune shifts with a few sites of each specie before testing every site
+        blocks = [(a.fractional[a.types == t], fractional[types == t]) for t in np.flatnonzero(counts)]
+        for sample in (PRUNE_SITES, None):
+            for sites_a, sites_b in blocks:
+                mask = self._test_shifts(shifts, sites_b[:sample], sites_a, a.vectors, tolerance, sample is None)
+                shifts = shifts[mask]
+                if len(shifts) == 0:
+                    return False
+        return True
+
+    def _test_shifts(self, shifts: np.ndarray, sites: np.ndarray, targets: np.ndarray, vectors: np.ndarray,
+                     tolerance: float, bijective: bool) -> np.ndarray:
+        # returns a mask of the shifts which move every site onto a target within tolerance
+        res = np.empty(len(shifts), dtype=bool)
+        block = max(1, self.max_memory // (8 * 8 * len(sites) * len(targets)))
+        for start in range(0, len(shifts), block):
+            block_shifts = shifts[start:start + block, np.newaxis, np.newaxis, :]
+            displacements = sites[np.newaxis, :, np.newaxis, :] + block_shifts - targets[np.newaxis, np.newaxis, :, :]
+            displacements -= np.round(displacements)
+            distances = np.sum(np.matmul(displacements, vectors)**2, axis=-1)
+            nearest = np.argmin(distances, axis=-1)
+            within = np.take_along_axis(distances, nearest[..., np.newaxis], axis=-1)[..., 0] <= tolerance**2
+            valid = np.all(within, axis=-1)
+            if bijective:
+                nearest = np.sort(nearest, axis=-1)
+                valid &= np.all(nearest[:, 1:] != nearest[:, :-1], axis=-1)
+            res[start:start + block] = valid
+        return res
+
+
+#########################
+#    Private Helpers    #
+#########################
+
+
+def _angles(vectors: np.ndarray) -> np.ndarray:
+    # alpha, beta and gamma of row-major lattice vectors
+    a, b, c = vectors
+    cos = lambda u, v: np.dot(u, v) / (np.linalg.norm(u) * np.linalg.norm(v))
+    return np.arccos(np.clip([cos(b, c), cos(a, c), cos(a, b)], -1, 1))
+
+
+def _supercell_sites(fractional: np.ndarray, types: np.ndarray,
+                     matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # fractional coordinates of every site within the supercell spanned by the rows of `matrix`
+    points = lattice_points(matrix)
+    sites = np.matmul(fractional, np.linalg.inv(matrix))[np.newaxis, :, :] + points[:, np.newaxis, :]
+    sites -= np.floor(sites)
+    return sites.reshape(-1, 3), np.tile(types, len(points))
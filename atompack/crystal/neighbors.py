@@ -0,0 +1,137 @@
+"""Periodic neighbor search over atoms and their nearby images."""
+
+from typing import Iterator, Optional, Tuple, Union
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+from atompack.crystal.components import LatticeVectors
+
+CHUNK_SIZE = 4096
+"""Default number of central atoms processed per chunk."""
+
+
+class NeighborSearch(object):
+    """Spatial index of atoms and the periodic images within a cutoff of the cell.
+
+    Image offsets are reported relative to the original positions such that the
+    displacement from atom `i` to its neighbor is `positions[j] + image @ vectors - positions[i]`.
+
+    Args:
+        positions: (N, 3) array of cartesian positions.
+        lattice_vectors: Periodic lattice vectors.
+        cutoff: Search radius.
+
+    Example:
+        >>> from atompack.crystal import LatticeVectors, NeighborSearch
+        >>> import numpy as np
+        >>>
+        >>> # single atom in a simple cubic lattice
+        >>> vectors = LatticeVectors(np.identity(3))
+        >>> search = NeighborSearch(np.zeros((1, 3)), vectors, cutoff=1.1)
+        >>>
+        >>> # the atom neighbors 6 of its own periodic images
+        >>> i, j, distances, images = search.pairs()
+        >>> assert len(i) == 6
+        >>> assert np.allclose(distances, 1)
+    """
+
+    def __init__(self, positions: np.ndarray, lattice_vectors: LatticeVectors, cutoff: float) -> None:
+        if cutoff <= 0:
+            raise ValueError("`cutoff` must be positive")
+        self._cutoff = cutoff
+        self._lattice_vectors = lattice_vectors
+
+        # wrap positions into the cell and remember the applied translations
+        fractional = lattice_vectors.to_fractional(np.asarray(positions, dtype=float).reshape(-1, 3))
+        wraps = -np.floor(fractional).astype(int)
+        fractional += wraps
+        self._wraps = wraps
+        self._positions = lattice_vectors.to_cartesian(fractional)
+
+        # find every image within `cutoff` of the cell faces
+        spacings = 1 / np.linalg.norm(np.linalg.inv(lattice_vectors.vectors).T, axis=1)
+        margins = cutoff / spacings
+        repeats = np.ceil(margins).astype(int)
+        indices = []
+        shifts = []
+        for shift in np.ndindex(*(2 * repeats + 1)):
+            shift = np.array(shift) - repeats
+            shifted = fractional + shift
+            mask = np.all((shifted >= -margins) & (shifted <= 1 + margins), axis=1)
+            indices.append(np.flatnonzero(mask))
+            shifts.append(np.broadcast_to(shift, (len(indices[-1]), 3)))
+        self._image_indices = np.concatenate(indices) if indices else np.empty(0, dtype=int)
+        self._image_shifts = np.concatenate(shifts) if shifts else np.empty((0, 3), dtype=int)
+        self._tree = cKDTree(self._positions[self._image_indices] +
+                             lattice_vectors.to_cartesian(self._image_shifts))
+
+    ####################
+    #    Properties    #
+    ####################
+
+    @property
+    def cutoff(self) -> float:
+        """Returns the search radius."""
+        return self._cutoff
+
+    @property
+    def lattice_vectors(self) -> LatticeVectors:
+        """Returns the periodic lattice vectors."""
+        return self._lattice_vectors
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    ########################
+    #    Public Methods    #
+    ########################
+
+    def pairs(self,
+              rows: Optional[Union[slice, np.ndarray]] = None
+             ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Returns every neighbor pair within the cutoff as `i`, `j`, `distances` and `images` arrays.
+
+        Args:
+            rows: Central atoms to search around. All atoms are searched by default.
+        """
+        centers = np.arange(len(self))
+        if rows is not None:
+            centers = centers[rows]
+        tree = cKDTree(self._positions[centers])
+        res = tree.sparse_distance_matrix(self._tree, self._cutoff, output_type="ndarray")
+        i = centers[res["i"]]
+        j = self._image_indices[res["j"]]
+        images = self._image_shifts[res["j"]] + self._wraps[j] - self._wraps[i]
+        # exclude each atom from its own neighbors
+        mask = (i != j) | np.any(images != 0, axis=1)
+        order = np.lexsort((j[mask], i[mask]))
+        return i[mask][order], j[mask][order], res["v"][mask][order], images[mask][order]
+
+    def iter_pairs(self,
+                   chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """Yields neighbor pairs in chunks of `chunk_size` central atoms."""
+        for start in range(0, len(self), chunk_size):
+            yield self.pairs(slice(start, start + chunk_size))
+
+    def query(self, points: np.ndarray,
+              cutoff: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the atoms within a cutoff of arbitrary points as `point`, `j`, `distances` and `images` arrays.
+
+        Args:
+            points: (M, 3) array of cartesian points.
+            cutoff: Search radius which may not exceed the cutoff of the index.
+        """
+        if cutoff is None:
+            cutoff = self._cutoff
+        if cutoff > self._cutoff:
+            raise ValueError("`cutoff` may not exceed the cutoff of the index")
+        # wrap points into the cell and remember the applied translations
+        fractional = self._lattice_vectors.to_fractional(np.asarray(points, dtype=float).reshape(-1, 3))
+        wraps = -np.floor(fractional).astype(int)
+        tree = cKDTree(self._lattice_vectors.to_cartesian(fractional + wraps))
+        res = tree.sparse_distance_matrix(self._tree, cutoff, output_type="ndarray")
+        j = self._image_indices[res["j"]]
+        images = self._image_shifts[res["j"]] + self._wraps[j] - wraps[res["i"]]
+        order = np.lexsort((j, res["i"]))
+        return res["i"][order], j[order], res["v"][order], images[order]
@@ -0,0 +1,85 @@
+"""Space-filling curve keys of fractional coordinates for cache friendly atom orders."""
+
+import numpy as np
+
+CURVES = ("morton", "hilbert")
+"""Supported space-filling curves."""
+
+BITS = 21
+"""Default resolution in bits per axis, which is the largest that fits 3 axes into a 64 bit key."""
+
+
+def curve_keys(fractional: np.ndarray, curve: str = "morton", bits: int = BITS) -> np.ndarray:
+    """Returns the (N,) key of each point along a space-filling curve through the unit cell.
+
+    Points are wrapped into the unit cell, such that periodic images share a key.
+
+    Args:
+        fractional: (N, 3) fractional coordinates.
+        curve: Either 'morton' for the Z-order curve or 'hilbert' for the Hilbert curve.
+        bits: Resolution in bits per axis between 1 and 21.
+
+    Example:
+        >>> from atompack.crystal.ordering import curve_keys
+        >>> import numpy as np
+        >>>
+        >>> # the corners of the first octant come first along both curves
+        >>> points = np.array([[0.75, 0.75, 0.75], [0.1, 0.2, 0.3]])
+        >>> assert np.all(np.argsort(curve_keys(points, "morton")) == [1, 0])
+        >>> assert np.all(np.argsort(curve_keys(points, "hilbert")) == [1, 0])
+    """
+    if curve not in CURVES:
+        raise ValueError(f"`curve` must be one of {CURVES}")
+    if not 1 <= bits <= BITS:
+        raise ValueError(f"`bits` must be between 1 and {BITS}")
+    coordinates = _quantize(fractional, bits)
+    if curve == "hilbert":
+        coordinates = _hilbert_transpose(coordinates, bits)
+    return _interleave(coordinates, bits)
+
+
+#########################
+#    Private Helpers    #
+#########################
+
+
+def _quantize(fractional: np.ndarray, bits: int) -> np.ndarray:
+    # (3, N) integer grid coordinates of the wrapped points
+    fractional = np.asarray(fractional, dtype=float).reshape(-1, 3)
+    fractional = fractional - np.floor(fractional)
+    coordinates = np.floor(fractional * 2**bits).astype(np.uint64)
+    return np.minimum(coordinates, np.uint64(2**bits - 1)).T.copy()
+
+
+def _interleave(coordinates: np.ndarray, bits: int) -> np.ndarray:
+    # bits of each axis interleaved from the most significant bit with the first axis leading
+    keys = np.zeros(coordinates.shape[1], dtype=np.uint64)
+    for bit in range(bits - 1, -1, -1):
+        for axis in range(3):
+            keys = (keys << np.uint64(1)) | ((coordinates[axis] >> np.uint64(bit)) & np.uint64(1))
+    return keys
+
+
+def _hilbert_transpose(coordinates: np.ndarray, bits: int) -> np.ndarray:
+    # Skilling's transform of grid coordinates into the transposed Hilbert index, vectorized over points
+    x = coordinates.copy()
+    # inverse undo of the rotations and reflections
+    q = 1 << (bits - 1)
+    while q > 1:
+        p = np.uint64(q - 1)
+        for axis in range(3):
+            mask = (x[axis] & np.uint64(q)) != 0
+            x[0] = np.where(mask, x[0] ^ p, x[0])
+            t = np.where(mask, np.uint64(0), (x[0] ^ x[axis]) & p)
+            x[0] ^= t
+            x[axis] ^= t
+        q >>= 1
+    # gray encode
+    for axis in range(1, 3):
+        x[axis] ^= x[axis - 1]
+    t = np.zeros_like(x[0])
+    q = 1 << (bits - 1)
+    while q > 1:
+        t = np.where((x[2] & np.uint64(q)) != 0, t ^ np.uint64(q - 1), t)
+        q >>= 1
+    return x ^ t[np.newaxis, :]
@@ -0,0 +1,256 @@
+"""Lattice reduction algorithms operating on row-major lattice vectors."""
+
+from itertools import combinations
+from typing import Iterable, Tuple
+
+import numpy as np
+
+
+def reduce_lattice(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns a basis of short, nearly orthogonal lattice vectors and the integer matrix mapping onto it.
+
+    The reduced vectors satisfy `reduced = matrix @ vectors`. The basis is LLL reduced and
+    then greedily shortened against all combinations of the other two vectors, which yields
+    a Minkowski reduced basis in three dimensions. The handedness of the input is preserved.
+
+    Args:
+        vectors: Row-major matrix of lattice vectors.
+    """
+    vectors = np.asarray(vectors, dtype=float)
+    matrix = _lll(vectors)
+    matrix = _greedy(vectors, matrix)
+    if np.linalg.det(matrix) < 0:
+        matrix = -matrix
+    return np.matmul(matrix, vectors), matrix
+
+
+def niggli_reduce(vectors: np.ndarray,
+                  tol: float = 1E-5,
+                  max_iterations: int = 1000) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the Niggli reduced basis of a lattice and the integer matrix mapping onto it.
+
+    Implements the Krivy-Gruber algorithm with the epsilon comparisons of Grosse-Kunstleve et al.
+    The reduced vectors satisfy `reduced = matrix @ vectors` and the handedness of the input is preserved.
+
+    Args:
+        vectors: Row-major matrix of lattice vectors.
+        tol: Relative tolerance of the metric comparisons.
+        max_iterations: Maximum number of reduction steps.
+    """
+    vectors = np.asarray(vectors, dtype=float)
+    eps = tol * np.abs(np.linalg.det(vectors))**(2 / 3)
+    matrix = np.identity(3, dtype=int)
+    sign = lambda x: int(np.sign(x))
+    for _ in range(max_iterations):
+        reduced = np.matmul(matrix, vectors)
+        metric = np.matmul(reduced, reduced.T)
+        a, b, c = np.diag(metric)
+        xi, eta, zeta = 2 * metric[1, 2], 2 * metric[0, 2], 2 * metric[0, 1]
+        # A1: order a and b
+        if a > b + eps or (abs(a - b) <= eps and abs(xi) > abs(eta) + eps):
+            matrix = np.matmul([[0, -1, 0], [-1, 0, 0], [0, 0, -1]], matrix)
+            continue
+        # A2: order b and c
+        if b > c + eps or (abs(b - c) <= eps and abs(eta) > abs(zeta) + eps):
+            matrix = np.matmul([[-1, 0, 0], [0, 0, -1], [0, -1, 0]], matrix)
+            continue
+        # A3 and A4: make the off diagonal terms all positive or all non-positive
+        signs = [1 if x > eps else -1 if x < -eps else 0 for x in (xi, eta, zeta)]
+        if signs[0] * signs[1] * signs[2] == 1:
+            flips = [-1 if x == -1 else 1 for x in signs]
+        else:
+            flips = [-1 if x == 1 else 1 for x in signs]
+            if flips[0] * flips[1] * flips[2] < 0:
+                flips[signs.index(0)] *= -1
+        matrix = np.matmul(np.diag(flips), matrix)
+        reduced = np.matmul(matrix, vectors)
+        metric = np.matmul(reduced, reduced.T)
+        xi, eta, zeta = 2 * metric[1, 2], 2 * metric[0, 2], 2 * metric[0, 1]
+        # A5 through A8: shorten vectors by combinations of the others
+        if abs(xi) > b + eps or (abs(xi - b) <= eps and 2 * eta < zeta - eps) or (abs(xi + b) <= eps and zeta < -eps):
+            matrix[2] -= sign(xi) * matrix[1]
+        elif abs(eta) > a + eps or (abs(eta - a) <= eps and 2 * xi < zeta - eps) or (abs(eta + a) <= eps and
+                                                                                      zeta < -eps):
+            matrix[2] -= sign(eta) * matrix[0]
+        elif abs(zeta) > a + eps or (abs(zeta - a) <= eps and 2 * xi < eta - eps) or (abs(zeta + a) <= eps and
+                                                                                        eta < -eps):
+            matrix[1] -= sign(zeta) * matrix[0]
+        elif xi + eta + zeta + a + b < -eps or (abs(xi + eta + zeta + a + b) <= eps and 2 * (a + eta) + zeta > eps):
+            matrix[2] += matrix[0] + matrix[1]
+        else:
+            if np.linalg.det(matrix) < 0:
+                matrix = -matrix
+            return np.matmul(matrix, vectors), matrix
+    raise RuntimeError("Niggli reduction did not converge")
+
+
+def delaunay_reduce(vectors: np.ndarray,
+                    tol: float = 1E-5,
+                    max_iterations: int = 1000) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the Delaunay reduced basis of a lattice and the integer matrix mapping onto it.
+
+    Implements Selling reduction of the superbase `a, b, c, -(a + b + c)` followed by the
+    choice of the three shortest independent vectors of the reduced superbase.
+    The reduced vectors satisfy `reduced = matrix @ vectors` and the handedness of the input is preserved.
+
+    Args:
+        vectors: Row-major matrix of lattice vectors.
+        tol: Relative tolerance of the scalar products.
+        max_iterations: Maximum number of reduction steps.
+    """
+    vectors = np.asarray(vectors, dtype=float)
+    eps = tol * np.abs(np.linalg.det(vectors))**(2 / 3)
+    superbase = np.vstack((np.identity(3, dtype=int), -np.ones((1, 3), dtype=int)))
+    pairs = [(i, j) for i in range(4) for j in range(i + 1, 4)]
+    for _ in range(max_iterations):
+        cartesian = np.matmul(superbase, vectors)
+        products = np.array([np.dot(cartesian[i], cartesian[j]) for i, j in pairs])
+        k = int(np.argmax(products))
+        if products[k] <= eps:
+            break
+        # negate one vector of the offending pair and add it to the other two
+        i, j = pairs[k]
+        others = [x for x in range(4) if x not in (i, j)]
+        superbase[others] += superbase[i]
+        superbase[i] = -superbase[i]
+    else:
+        raise RuntimeError("Delaunay reduction did not converge")
+
+    # choose the shortest basis among the superbase and its pairwise sums
+    candidates = np.vstack((superbase, [superbase[i] + superbase[j] for i, j in pairs[:3]]))
+    triplets = np.array(list(combinations(range(len(candidates)), 3)))
+    matrices = candidates[triplets]
+    lengths = np.linalg.norm(np.matmul(matrices, vectors), axis=-1).sum(axis=1)
+    lengths[np.abs(np.round(np.linalg.det(matrices))) != 1] = np.inf
+    matrix = matrices[np.argmin(lengths)]
+    matrix = matrix[np.argsort(np.linalg.norm(np.matmul(matrix, vectors), axis=1), kind="stable")]
+    if np.linalg.det(matrix) < 0:
+        matrix = -matrix
+    return np.matmul(matrix, vectors), matrix
+
+
+def lattice_points(matrix: np.ndarray, tol: float = 1E-8) -> np.ndarray:
+    """Returns the fractional coordinates of every lattice point within the supercell spanned by `matrix`.
+
+    Points are sorted lexicographically such that the origin comes first.
+
+    Args:
+        matrix: Integer rows of the supercell vectors in units of the original lattice vectors.
+    """
+    matrix = np.asarray(matrix)
+    corners = np.matmul(np.array(list(np.ndindex(2, 2, 2))), matrix)
+    lower = corners.min(axis=0)
+    upper = corners.max(axis=0)
+    points = np.array(list(np.ndindex(*(upper - lower + 1)))) + lower
+    points = np.matmul(points, np.linalg.inv(matrix))
+    points = points[np.all((points >= -tol) & (points < 1 - tol), axis=1)] % 1
+    points[points > 1 - tol] = 0
+    return points[np.lexsort(points.T[::-1])]
+
+
+def reduce_miller_indices(hkl: Iterable[int]) -> Tuple[int, int, int]:
+    """Returns Miller indices divided by their greatest common divisor.
+
+    Args:
+        hkl: Integer Miller indices which must not all be zero.
+    """
+    hkl = np.array(hkl, dtype=int)
+    if not np.any(hkl):
+        raise ValueError("Miller indices must not be zero")
+    hkl //= np.gcd.reduce(hkl)
+    return (int(hkl[0]), int(hkl[1]), int(hkl[2]))
+
+
+def surface_matrix(hkl: np.ndarray, vectors: np.ndarray) -> np.ndarray:
+    """Returns the integer rows of a right-handed unit cell adapted to a lattice plane.
+
+    The first two rows are a Gauss reduced basis of the lattice points within the plane and
+    the third row is the vector between adjacent planes with the smallest in-plane component,
+    such that `hkl @ rows[2] == 1` and the matrix is unimodular.
+
+    Args:
+        hkl: Reduced Miller indices of the plane relative to `vectors`.
+        vectors: Row-major matrix of lattice vectors.
+    """
+    bound = int(np.max(np.abs(hkl))) + 1
+    grid = np.array(list(np.ndindex(*(2 * bound + 1,) * 3))) - bound
+    lengths = np.linalg.norm(np.matmul(grid, vectors), axis=1)
+    dots = np.matmul(grid, hkl)
+    in_plane = grid[(dots == 0) & np.any(grid != 0, axis=1)]
+    in_plane = in_plane[np.argsort(lengths[(dots == 0) & np.any(grid != 0, axis=1)], kind="stable")]
+
+    # the two in-plane vectors must span every lattice point of the plane
+    a = in_plane[0]
+    crosses = np.cross(a, in_plane)
+    b = in_plane[np.flatnonzero(np.all(crosses == hkl, axis=1) | np.all(crosses == -hkl, axis=1))[0]]
+    # Gauss reduction of the in-plane basis
+    while True:
+        _a, _b = np.matmul(a, vectors), np.matmul(b, vectors)
+        b = b - int(np.round(np.dot(_a, _b) / np.dot(_a, _a))) * a
+        if np.linalg.norm(np.matmul(b, vectors)) < np.linalg.norm(_a) - 1E-10:
+            a, b = b, a
+        else:
+            break
+    if np.dot(np.cross(a, b), hkl) < 0:
+        b = -b
+
+    # the stacking vector with the smallest in-plane component
+    stacking = grid[dots == 1]
+    cartesian = np.matmul(stacking, vectors)
+    normal = np.cross(np.matmul(a, vectors), np.matmul(b, vectors))
+    normal /= np.linalg.norm(normal)
+    lateral = np.linalg.norm(cartesian - np.outer(np.matmul(cartesian, normal), normal), axis=1)
+    c = stacking[np.argmin(lateral)]
+    return np.array([a, b, c])
+
+
+#########################
+#    Private Helpers    #
+#########################
+
+
+def _lll(vectors: np.ndarray, delta: float = 0.75) -> np.ndarray:
+    # Lenstra-Lenstra-Lovasz reduction tracked as an integer transformation matrix
+    matrix = np.identity(3, dtype=int)
+    k = 1
+    while k < 3:
+        for j in range(k - 1, -1, -1):
+            orthogonal, norms = _gram_schmidt(np.matmul(matrix, vectors))
+            mu = np.dot(np.matmul(matrix[k], vectors), orthogonal[j]) / norms[j]
+            if abs(mu) > 0.5:
+                matrix[k] -= int(np.round(mu)) * matrix[j]
+        orthogonal, norms = _gram_schmidt(np.matmul(matrix, vectors))
+        mu = np.dot(np.matmul(matrix[k], vectors), orthogonal[k - 1]) / norms[k - 1]
+        if norms[k] >= (delta - mu**2) * norms[k - 1]:
+            k += 1
+        else:
+            matrix[[k - 1, k]] = matrix[[k, k - 1]]
+            k = max(k - 1, 1)
+    return matrix
+
+
+def _greedy(vectors: np.ndarray, matrix: np.ndarray, tol: float = 1E-10) -> np.ndarray:
+    # shorten each vector by the other two until no combination improves the basis
+    coefficients = np.array(list(np.ndindex(3, 3))) - 1
+    matrix = matrix.copy()
+    improved = True
+    while improved:
+        improved = False
+        matrix = matrix[np.argsort(np.linalg.norm(np.matmul(matrix, vectors), axis=1), kind="stable")]
+        for k in range(3):
+            others = matrix[[i for i in range(3) if i != k]]
+            candidates = matrix[k] + np.matmul(coefficients, others)
+            norms = np.linalg.norm(np.matmul(candidates, vectors), axis=1)
+            best = np.argmin(norms)
+            if norms[best] < np.linalg.norm(np.matmul(matrix[k], vectors)) - tol:
+                matrix[k] = candidates[best]
+                improved = True
+    return matrix
+
+
+def _gram_schmidt(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    res = np.array(vectors, dtype=float)
+    for i in range(1, len(res)):
+        for j in range(i):
+            res[i] -= np.dot(vectors[i], res[j]) / np.dot(res[j], res[j]) * res[j]
+    return res, np.einsum("ij,ij->i", res, res)
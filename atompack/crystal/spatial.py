@@ -1,10 +1,15 @@
 """Data types that represent spatial features or transformations."""
 
-from typing import Tuple
+from typing import Dict, List, Tuple
 
 import numpy as np
 from scipy.spatial.transform import Rotation
 
+from atompack.crystal.components import LatticeVectors
+from atompack.symmetry import Spacegroup
+
+FAMILIES: Dict[Tuple[int, Tuple[int, int, int], bool], np.ndarray] = {}
+
 
 class MillerIndex(object):
     """Representation of a Miller index for describing crystallographic planes and directions."""
@@ -44,6 +49,28 @@ class MillerIndex(object):
                 res.append(_min / x)
         return np.array(res)
 
+    ########################
+    #    Public Methods    #
+    ########################
+
+    def family(self, spacegroup: Spacegroup, direction: bool = False) -> List['MillerIndex']:
+        """Returns the symmetry equivalent indices in descending lexicographic order.
+
+        Args:
+            spacegroup: Spacegroup whose rotations generate the family.
+            direction: Treats the indices as a direction `<uvw>` rather than a plane `{hkl}`.
+
+        Example:
+            >>> from atompack.crystal import MillerIndex
+            >>> from atompack.symmetry import Spacegroup
+            >>>
+            >>> family = MillerIndex((1, 1, 0)).family(Spacegroup("F m -3 m"))
+            >>> assert len(family) == 12
+            >>> assert family[0] == MillerIndex((1, 1, 0))
+        """
+        family = miller_families(np.array([self.hkl]), spacegroup, direction)[0]
+        return [MillerIndex((int(h), int(k), int(l))) for h, k, l in family]
+
     #########################
     #    Special Methods    #
     #########################
@@ -54,10 +81,71 @@ class MillerIndex(object):
         return self.hkl == other.hkl
 
 
+def miller_families(indices: np.ndarray, spacegroup: Spacegroup, direction: bool = False) -> List[np.ndarray]:
+    """Returns the symmetry equivalent indices of each row in descending lexicographic order.
+
+    The first row of each family is its canonical representative. Families are cached
+    per spacegroup and index so repeated enumeration only applies the rotations once.
+
+    Args:
+        indices: (N, 3) integer plane or direction indices.
+        spacegroup: Spacegroup whose rotations generate the families.
+        direction: Treats the indices as directions `<uvw>` rather than planes `{hkl}`.
+    """
+    indices = np.atleast_2d(np.asarray(indices, dtype=int))
+    keys = [(spacegroup.international_number, (int(h), int(k), int(l)), direction) for h, k, l in indices]
+    missing = sorted({key[1] for key in keys if key not in FAMILIES})
+    if len(missing) > 0:
+        for key, family in zip(missing, _enumerate_families(np.array(missing), spacegroup, direction)):
+            FAMILIES[(spacegroup.international_number, key, direction)] = family
+    return [FAMILIES[key] for key in keys]
+
+
+def unique_miller_indices(indices: np.ndarray, spacegroup: Spacegroup, direction: bool = False) -> np.ndarray:
+    """Returns the canonical representative of each distinct family in order of first appearance.
+
+    Args:
+        indices: (N, 3) integer plane or direction indices.
+        spacegroup: Spacegroup whose rotations generate the families.
+        direction: Treats the indices as directions `<uvw>` rather than planes `{hkl}`.
+
+    Example:
+        >>> from atompack.crystal.spatial import unique_miller_indices
+        >>> from atompack.symmetry import Spacegroup
+        >>> import numpy as np
+        >>>
+        >>> # every low index surface of a cubic crystal
+        >>> indices = np.array(list(np.ndindex(3, 3, 3))) - 1
+        >>> indices = indices[np.any(indices != 0, axis=1)]
+        >>> res = unique_miller_indices(indices, Spacegroup("P m -3 m"))
+        >>> assert res.tolist() == [[1, 1, 1], [1, 1, 0], [1, 0, 0]]
+    """
+    canonical = np.array([family[0] for family in miller_families(indices, spacegroup, direction)]).reshape(-1, 3)
+    _, first = np.unique(canonical, axis=0, return_index=True)
+    return canonical[np.sort(first)]
+
+
 class Orientation(Rotation):
     """Representation of a crystallographic orientation.
     This class inherits from scipy's Rotation class for 
     efficient conversion between possible representations.
+
+    The rotation maps a direction onto the x axis and the normal of a plane onto the z axis.
+    Indices are interpreted in an orthonormal lattice basis.
+
+    Example:
+        >>> from atompack.crystal import Orientation
+        >>> import numpy as np
+        >>>
+        >>> # sweep of orientations sharing the (001) plane
+        >>> hkl = np.tile([0, 0, 1], (3, 1))
+        >>> uvw = np.array([[1, 0, 0], [1, 1, 0], [1, 2, 0]])
+        >>> orientations = Orientation.from_miller_arrays(hkl, uvw)
+        >>> assert len(orientations) == 3
+        >>>
+        >>> res_hkl, res_uvw = orientations.as_miller_arrays()
+        >>> assert np.array_equal(res_hkl, hkl)
+        >>> assert np.array_equal(res_uvw, uvw)
     """
 
     ######################
@@ -70,32 +158,48 @@ class Orientation(Rotation):
         
         Args:
             plane: Indices of the plane.
-            direction: Indices of the direction.
+            direction: Indices of the direction within the plane.
         """
-        hkl = np.array(plane.hkl)
-        uvw = np.array(direction.hkl)
-        b_hat = uvw / np.linalg.norm(uvw)
-        n_hat = hkl / np.linalg.norm(hkl)
-        n_cross_b = np.cross(n_hat, b_hat)
-        t_hat = n_cross_b / np.linalg.norm(n_cross_b)
-        matrix = np.vstack((b_hat, t_hat))
-        matrix = np.vstack((matrix, n_hat))
-        return super().from_rotvec(matrix.T)
+        matrices = _orientation_matrices(np.array([plane.hkl]), np.array([direction.hkl]))
+        return cls(Rotation.from_matrix(matrices[0]).as_quat())
+
+    @classmethod
+    def from_miller_arrays(cls, hkl: np.ndarray, uvw: np.ndarray, tol: float = 1E-6) -> 'Orientation':
+        """Initialize a stack of orientations from arrays of Miller Indices.
+
+        Args:
+            hkl: (N, 3) indices of each plane.
+            uvw: (N, 3) indices of each direction within its plane.
+            tol: Tolerance of the cosine between each plane normal and direction.
+        """
+        matrices = _orientation_matrices(np.atleast_2d(hkl), np.atleast_2d(uvw), tol)
+        return cls(Rotation.from_matrix(matrices).as_quat())
 
     ########################
     #    Public Methods    #
     ########################
 
-    def as_miller_indices(self, tol: float = 1E-6) -> Tuple[MillerIndex, MillerIndex]:
-        """Represent as Miller Indices."""
-        matrix = self.as_rotvec()
-        hkl = matrix[:, 2]
-        uvw = matrix[:, 0]
-        min_nonzero = lambda arr: np.min(arr[np.abs(arr) > tol])
-        normalize = lambda arr: np.array([x / min_nonzero(arr) for x in arr])
-        hkl = tuple(np.round(normalize(hkl)).astype(int))
-        uvw = tuple(np.round(normalize(uvw)).astype(int))
-        return MillerIndex(hkl), MillerIndex(uvw)
+    def as_miller_indices(self, tol: float = 1E-6, max_index: int = 24) -> Tuple[MillerIndex, MillerIndex]:
+        """Represent as Miller Indices.
+
+        Args:
+            tol: Tolerance of each index before it is rounded to an integer.
+            max_index: Largest multiplier tried while searching for integer indices.
+        """
+        hkl, uvw = self.as_miller_arrays(tol, max_index)
+        plane = MillerIndex((int(hkl[0, 0]), int(hkl[0, 1]), int(hkl[0, 2])))
+        direction = MillerIndex((int(uvw[0, 0]), int(uvw[0, 1]), int(uvw[0, 2])))
+        return plane, direction
+
+    def as_miller_arrays(self, tol: float = 1E-6, max_index: int = 24) -> Tuple[np.ndarray, np.ndarray]:
+        """Represent as (N, 3) arrays of plane and direction Miller Indices.
+
+        Args:
+            tol: Tolerance of each index before it is rounded to an integer.
+            max_index: Largest multiplier tried while searching for integer indices.
+        """
+        matrices = self.as_matrix().reshape(-1, 3, 3)
+        return _integer_indices(matrices[:, 2], tol, max_index), _integer_indices(matrices[:, 0], tol, max_index)
 
 
 class Plane(object):
@@ -104,6 +208,17 @@ class Plane(object):
     Args:
         coplanar_points: 3 points defining the plane.
             Each point should be scaled to lattice units.
+
+    Example:
+        >>> from atompack.crystal import MillerIndex, Plane
+        >>> import numpy as np
+        >>>
+        >>> # simple cubic points stacked along the (001) plane
+        >>> points = np.array(list(np.ndindex(2, 2, 3)), dtype=float)
+        >>> plane = Plane.from_miller_index(MillerIndex((0, 0, 1)))
+        >>> labels, heights = plane.assign_layers(points)
+        >>> assert np.allclose(heights, [-1, 0, 1])
+        >>> assert np.count_nonzero(plane.select_slab(points, -0.5, 0.5)) == 4
     """
 
     def __init__(self, coplanar_points: np.ndarray) -> None:
@@ -141,3 +256,112 @@ class Plane(object):
         a, b, c = cross
         d = np.dot(cross, p2)
         return np.array([a, b, c, d])
+
+    @property
+    def normal(self) -> np.ndarray:
+        """Returns the unit normal vector."""
+        normal = self.coefficients[:3]
+        return normal / np.linalg.norm(normal)
+
+    ########################
+    #    Public Methods    #
+    ########################
+
+    def to_cartesian(self, lattice_vectors: LatticeVectors) -> 'Plane':
+        """Returns the plane with its coplanar points scaled from lattice units to cartesian coordinates."""
+        return Plane(lattice_vectors.to_cartesian(np.asarray(self.coplanar_points, dtype=float)))
+
+    def signed_distances(self, points: np.ndarray) -> np.ndarray:
+        """Returns the (N,) signed distance of each point from the plane along its normal.
+
+        Args:
+            points: (N, 3) points in the coordinates of the coplanar points.
+        """
+        coefficients = self.coefficients
+        norm = np.linalg.norm(coefficients[:3])
+        return (np.matmul(points, coefficients[:3]) - coefficients[3]) / norm
+
+    def select_slab(self, points: np.ndarray, lower: float, upper: float) -> np.ndarray:
+        """Returns a (N,) mask of the points within a slab parallel to the plane.
+
+        Args:
+            points: (N, 3) points in the coordinates of the coplanar points.
+            lower: Signed distance of the bottom of the slab which is included.
+            upper: Signed distance of the top of the slab which is excluded.
+        """
+        distances = self.signed_distances(points)
+        return (distances >= lower) & (distances < upper)
+
+    def assign_layers(self, points: np.ndarray, tol: float = 1E-3) -> Tuple[np.ndarray, np.ndarray]:
+        """Groups points into atomic layers parallel to the plane.
+
+        Points are sorted by signed distance and a new layer begins wherever the gap between
+        consecutive distances exceeds the tolerance.
+
+        Args:
+            points: (N, 3) points in the coordinates of the coplanar points.
+            tol: Largest gap between distances within a single layer.
+
+        Returns:
+            The (N,) layer index of each point in order of increasing distance
+            and the (L,) mean signed distance of each layer.
+        """
+        distances = self.signed_distances(points)
+        order = np.argsort(distances, kind="stable")
+        breaks = np.diff(distances[order]) > tol
+        labels = np.empty(len(distances), dtype=int)
+        labels[order] = np.concatenate(([0], np.cumsum(breaks))) if len(distances) > 0 else []
+        counts = np.bincount(labels)
+        return labels, np.bincount(labels, weights=distances) / np.maximum(counts, 1)
+
+
+#########################
+#    Private Helpers    #
+#########################
+
+
+def _orientation_matrices(hkl: np.ndarray, uvw: np.ndarray, tol: float = 1E-6) -> np.ndarray:
+    # rotation matrices with rows of the direction, the in-plane transverse and the normal
+    if hkl.shape != uvw.shape:
+        raise ValueError("`hkl` and `uvw` must have the same shape")
+    if not (np.all(np.any(hkl != 0, axis=1)) and np.all(np.any(uvw != 0, axis=1))):
+        raise ValueError("Miller Indices must not be zero")
+    n_hat = hkl / np.linalg.norm(hkl, axis=1)[:, np.newaxis]
+    b_hat = uvw / np.linalg.norm(uvw, axis=1)[:, np.newaxis]
+    if np.any(np.abs(np.einsum("ij,ij->i", n_hat, b_hat)) > tol):
+        raise ValueError("each direction must lie within its plane")
+    t_hat = np.cross(n_hat, b_hat)
+    return np.stack((b_hat, t_hat, n_hat), axis=1)
+
+
+def _integer_indices(vectors: np.ndarray, tol: float, max_index: int) -> np.ndarray:
+    # smallest integer multiples of each vector within tolerance
+    scaled = vectors / np.max(np.abs(vectors), axis=1)[:, np.newaxis]
+    multipliers = np.arange(1, max_index + 1)
+    candidates = scaled[:, np.newaxis, :] * multipliers[np.newaxis, :, np.newaxis]
+    errors = np.max(np.abs(candidates - np.round(candidates)), axis=-1)
+    valid = errors <= tol * multipliers
+    if not np.all(np.any(valid, axis=1)):
+        raise ValueError("orientation cannot be represented by Miller Indices within tolerance")
+    res = np.round(candidates[np.arange(len(vectors)), np.argmax(valid, axis=1)]).astype(int)
+    return res // np.gcd.reduce(res, axis=1)[:, np.newaxis]
+
+
+def _enumerate_families(indices: np.ndarray, spacegroup: Spacegroup, direction: bool) -> List[np.ndarray]:
+    # applies every distinct rotation to a batch of indices and deduplicates the images of each row
+    rotations = np.unique(spacegroup.rotations, axis=0)
+    if direction:
+        images = np.einsum("mij,nj->nmi", rotations, indices)
+    else:
+        images = np.einsum("ni,mij->nmj", indices, rotations)
+    # encode each image as an integer which preserves lexicographic order
+    offset = np.max(np.abs(images), initial=0) + 1
+    base = 2 * offset + 1
+    keys = np.sort(np.einsum("nmi,i->nm", images + offset, [base**2, base, 1]), axis=1)[:, ::-1]
+    unique = np.ones(keys.shape, dtype=bool)
+    unique[:, 1:] = keys[:, 1:] != keys[:, :-1]
+    res = []
+    for row, mask in zip(keys, unique):
+        row = row[mask]
+        res.append(np.column_stack((row // base**2, row // base % base, row % base)) - offset)
+    return res
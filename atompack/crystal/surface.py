@@ -0,0 +1,203 @@
+"""Surface slabs of crystals cut along arbitrary crystallographic planes."""
+
+import copy
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+from retworkx import PyGraph
+from scipy.spatial.transform import Rotation
+
+from atompack.crystal.components import LatticeVectors
+from atompack.crystal.crystal import Crystal
+from atompack.crystal.reduction import reduce_miller_indices, surface_matrix
+from atompack.crystal.spatial import MillerIndex, Orientation, Plane
+from atompack.crystal.transform import Transform
+
+
+class _OrientedBulk(NamedTuple):
+    # bulk crystal expressed on a unit cell whose first two vectors lie within the surface plane
+    matrix: np.ndarray
+    vectors: np.ndarray
+    fractional: np.ndarray
+    spacing: float
+    labels: np.ndarray
+    heights: np.ndarray
+
+
+class SlabGenerator(object):
+    """Builds surface slabs of a crystal for one or many facets.
+
+    The bulk is re-expressed on a unit cell spanned by the two shortest lattice vectors within
+    the surface plane and the shortest lattice vector between adjacent planes. Atomic layers of
+    that cell are detected once per facet and each distinct layer becomes the bottom termination
+    of a slab. Slabs are oriented with the surface normal along z and have orthogonal cells.
+
+    Note:
+        Bonds are not carried over to the slabs.
+
+    Args:
+        crystal: The bulk crystal.
+        min_thickness: Minimum distance between the bottom and top layers of each slab.
+        vacuum: Distance between the top layer and the periodic image of the bottom layer.
+        tol: Largest distance between atoms along the surface normal within a single layer.
+        primitive: Builds slabs from the primitive cell of the crystal to minimize their in-plane area.
+
+    Example:
+        >>> from atompack.crystal import Basis, Crystal, LatticeParameters, MillerIndex, SlabGenerator, UnitCell
+        >>> from atompack.symmetry import Spacegroup
+        >>> import numpy as np
+        >>>
+        >>> # FCC copper
+        >>> unit_cell = UnitCell(Basis.primitive("Cu"), LatticeParameters.cubic(3.6), Spacegroup(225))
+        >>> generator = SlabGenerator(Crystal(unit_cell), min_thickness=10.0, vacuum=15.0)
+        >>>
+        >>> # a single termination of the (111) facet with 6 close packed layers
+        >>> slabs = generator.slabs(MillerIndex((1, 1, 1)))
+        >>> assert len(slabs) == 1
+        >>> assert len(slabs[0].atoms) == 6
+        >>> assert np.allclose(slabs[0].lattice_vectors.vectors[2], [0, 0, 15.0 + 5 * 3.6 / np.sqrt(3)])
+    """
+
+    def __init__(self,
+                 crystal: Crystal,
+                 min_thickness: float,
+                 vacuum: float,
+                 tol: float = 1E-3,
+                 primitive: bool = True) -> None:
+        self._min_thickness = min_thickness
+        self._vacuum = vacuum
+        self._tol = tol
+        # indices transform with the inverse of the matrix which maps the bulk lattice onto the crystal lattice
+        self._index_matrix = np.identity(3, dtype=int)
+        if primitive:
+            crystal, matrix = crystal.to_primitive()
+            determinant = int(round(abs(np.linalg.det(matrix))))
+            self._index_matrix = np.round(np.linalg.inv(matrix) * determinant).astype(int)
+        self._crystal = crystal
+        # bulk arrays shared by every facet
+        self._atoms = crystal.atoms
+        self._species = crystal.species
+        self._fractional = crystal.lattice_vectors.to_fractional(crystal.positions)
+        self._oriented: Dict[Tuple[int, int, int], _OrientedBulk] = {}
+
+    ########################
+    #    Public Methods    #
+    ########################
+
+    def slabs(self, miller_index: MillerIndex) -> List[Crystal]:
+        """Returns a slab for each distinct termination of a facet.
+
+        Args:
+            miller_index: Indices of the surface plane relative to the lattice vectors of the crystal.
+        """
+        return self.slabs_many([miller_index])[reduce_miller_indices(miller_index.hkl)]
+
+    def slabs_many(self, miller_indices: Iterable[MillerIndex]) -> Dict[Tuple[int, int, int], List[Crystal]]:
+        """Returns the slabs of many facets keyed by their reduced indices.
+
+        The bulk of every facet is oriented in a single vectorized pass and cached,
+        so facets which share reduced indices are only oriented once.
+
+        Args:
+            miller_indices: Indices of each surface plane relative to the lattice vectors of the crystal.
+        """
+        keys = [reduce_miller_indices(miller_index.hkl) for miller_index in miller_indices]
+        self._orient([key for key in dict.fromkeys(keys) if key not in self._oriented])
+        return {key: self._build_slabs(self._oriented[key]) for key in keys}
+
+    def terminations(self, miller_index: MillerIndex) -> np.ndarray:
+        """Returns the index of the bottom layer of each distinct termination of a facet."""
+        key = reduce_miller_indices(miller_index.hkl)
+        if key not in self._oriented:
+            self._orient([key])
+        return self._terminations(self._oriented[key])
+
+    #########################
+    #    Private Methods    #
+    #########################
+
+    def _orient(self, keys: List[Tuple[int, int, int]]) -> None:
+        if len(keys) == 0:
+            return
+        vectors = self._crystal.lattice_vectors.vectors
+        indices = [reduce_miller_indices(np.matmul(self._index_matrix, key)) for key in keys]
+        matrices = np.array([surface_matrix(np.array(hkl), vectors) for hkl in indices])
+        # fractional coordinates of the bulk on every oriented cell at once
+        fractional = np.einsum("ni,kij->knj", self._fractional, np.linalg.inv(matrices))
+        fractional -= np.floor(fractional)
+        for key, matrix, _fractional in zip(keys, matrices, fractional):
+            oriented = np.matmul(matrix, vectors)
+            # the plane spanned by the in-plane vectors with its normal towards the stacking vector
+            plane = Plane(np.vstack((np.zeros(3), oriented[1], oriented[0])))
+            spacing = float(np.dot(oriented[2], plane.normal))
+            labels, heights = plane.assign_layers(np.matmul(_fractional, oriented), self._tol)
+            labels, heights = _merge_periodic_layers(labels, heights, spacing, self._tol)
+            self._oriented[key] = _OrientedBulk(matrix, oriented, _fractional, spacing, labels, heights)
+
+    def _terminations(self, bulk: _OrientedBulk) -> np.ndarray:
+        # layers are equivalent terminations if the stacking above them has the same species and spacings
+        n_layers = len(bulk.heights)
+        compositions = [tuple(sorted(self._species[bulk.labels == layer])) for layer in range(n_layers)]
+        gaps = np.round(np.diff(np.append(bulk.heights, bulk.heights[0] + bulk.spacing)) / self._tol).astype(int)
+        signatures: Dict[Tuple[Tuple[Tuple[str, ...], int], ...], int] = {}
+        for layer in range(n_layers):
+            order = np.roll(np.arange(n_layers), -layer)
+            signature = tuple((compositions[i], int(gaps[i])) for i in order)
+            signatures.setdefault(signature, layer)
+        return np.array(sorted(signatures.values()), dtype=int)
+
+    def _build_slabs(self, bulk: _OrientedBulk) -> List[Crystal]:
+        return [self._build_slab(bulk, layer) for layer in self._terminations(bulk)]
+
+    def _build_slab(self, bulk: _OrientedBulk, layer: int) -> Crystal:
+        # shift the stacking coordinate so that the termination layer sits at zero
+        offset = (bulk.fractional[:, 2] * bulk.spacing - bulk.heights[layer]) % bulk.spacing
+        offset[(bulk.labels == layer) & (offset > bulk.spacing / 2)] -= bulk.spacing
+        shifted = bulk.fractional.copy()
+        shifted[:, 2] = offset / bulk.spacing
+        top = np.max(offset)
+        repeats = max(1, int(np.ceil((self._min_thickness - top) / bulk.spacing - self._tol)) + 1)
+        thickness = (repeats - 1) * bulk.spacing + top
+
+        # replicate the oriented cell along the stacking vector
+        stack = np.arange(repeats)[:, np.newaxis, np.newaxis] * np.array([0, 0, 1])
+        fractional = (shifted[np.newaxis, :, :] + stack).reshape(-1, 3)
+        positions = np.matmul(fractional, bulk.vectors)
+
+        # orthogonal cell with vacuum above the top layer
+        normal = Plane(np.vstack((np.zeros(3), bulk.vectors[1], bulk.vectors[0]))).normal
+        vectors = np.vstack((bulk.vectors[:2], normal * (thickness + self._vacuum)))
+        lattice_vectors = LatticeVectors(vectors)
+        in_plane = lattice_vectors.to_fractional(positions)
+        in_plane[:, :2] -= np.floor(in_plane[:, :2] + self._tol)
+        positions = lattice_vectors.to_cartesian(in_plane)
+
+        graph = PyGraph()
+        source = np.tile(np.arange(len(self._atoms)), repeats)
+        atoms = []
+        for index, position in zip(source, positions):
+            atom = copy.deepcopy(self._atoms[index])
+            atom.position = position
+            atoms.append(atom)
+        graph.add_nodes_from(atoms)
+        slab = Crystal(self._crystal.unit_cell, lattice_vectors, graph)
+
+        # rotate the first in-plane vector onto x and the normal onto z
+        x_hat = vectors[0] / np.linalg.norm(vectors[0])
+        matrix = np.vstack((x_hat, np.cross(normal, x_hat), normal))
+        orientation = Orientation(Rotation.from_matrix(matrix).as_quat())
+        return Transform().orient(orientation).apply(slab)
+
+
+#########################
+#    Private Helpers    #
+#########################
+
+
+def _merge_periodic_layers(labels: np.ndarray, heights: np.ndarray, spacing: float,
+                           tol: float) -> Tuple[np.ndarray, np.ndarray]:
+    # the top layer is the periodic image of the bottom layer if they are within tolerance
+    if len(heights) > 1 and heights[-1] - heights[0] > spacing - tol:
+        labels = np.where(labels == len(heights) - 1, 0, labels)
+        heights = heights[:-1]
+    return labels, heights
@@ -1,11 +1,16 @@
 """Abstraction for a collection of transformations that can be applied together on any crystal."""
 
 import copy
-from typing import Optional, Tuple
+from typing import Iterator, Optional, Tuple
 
 import numpy as np
 
+from atompack.bond import Bond
+from atompack.constants import MAX_MEMORY
+from atompack.crystal.components import LatticeVectors
 from atompack.crystal.crystal import Crystal
+from atompack.crystal.mapped import MappedCrystal
+from atompack.crystal.ordering import CURVES
 from atompack.crystal.spatial import Orientation, Plane
 
 
@@ -16,9 +21,11 @@ class Transform(object):
         # initialize private attributes
         self._cut_plane: Optional[Plane] = None
         self._supercell_size: Optional[Tuple[int, int, int]] = None
+        self._supercell_directory: Optional[str] = None
         self._orientation: Optional[Orientation] = None
         self._orthogonalize: Optional[bool] = None
         self._projection_plane: Optional[Plane] = None
+        self._reorder_curve: Optional[str] = None
 
     ########################
     #    Public Methods    #
@@ -30,21 +37,31 @@ class Transform(object):
         Args:
             crystal: The initial crystal object.
             copy: Determines whether the transform is applied to the initial crystal or a copy of it.
+
+        Returns:
+            The transformed crystal, or a new `MappedCrystal` when the supercell is written out of core.
         """
         # TODO: find optimal order
         self._cut(crystal)
         self._orient(crystal)
         self._project(crystal)
+        if self._supercell_directory is not None:
+            if self._reorder_curve is not None:
+                raise ValueError("memory mapped supercells cannot be reordered")
+            return self._mapped_supercell(crystal)
         self._supercell(crystal)
+        self._reorder(crystal)
         return crystal
 
     def reset(self) -> None:
         """Resets all transform settings."""
         self._cut_plane = None
         self._supercell_size = None
+        self._supercell_directory = None
         self._orientation = None
         self._orthogonalize = None
         self._projection_plane = None
+        self._reorder_curve = None
 
     def cut(self, plane: Plane) -> 'Transform':
         """Cuts a crystal along a plane.
@@ -78,15 +95,73 @@ class Transform(object):
         self._orthogonalize = orthogonalize
         return self
 
-    def supercell(self, supercell_size: Tuple[int, int, int]) -> 'Transform':
+    def supercell(self, supercell_size: Tuple[int, int, int], directory: Optional[str] = None) -> 'Transform':
         """Creates a supercell by duplicating the crystal in 3 dimensions.
 
         Args:
             supercell_size: Number of repeat units in each direction.
+            directory: Directory of memory mapped files which receive the positions and species of the supercell
+                chunk by chunk. The crystal is then left unchanged and `apply` returns a `MappedCrystal`.
+
+        Note:
+            Bonds are not replicated into memory mapped supercells.
         """
         self._supercell_size = supercell_size
+        self._supercell_directory = directory
+        return self
+
+    def reorder(self, curve: str = "morton") -> 'Transform':
+        """Sorts the atoms along a space-filling curve as the final stage. See `Crystal.reorder`.
+
+        Args:
+            curve: Either 'morton' for the Z-order curve or 'hilbert' for the Hilbert curve.
+        """
+        if curve not in CURVES:
+            raise ValueError(f"`curve` must be one of {CURVES}")
+        self._reorder_curve = curve
         return self
 
+    @staticmethod
+    def iter_supercell(crystal: Crystal,
+                       size: Tuple[int, int, int],
+                       chunk_atoms: int = 2**16) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """Lazily yields the atoms of a supercell in blocks without modifying the crystal.
+
+        Atoms come image by image in the order of `np.ndindex(*size)` and in the order of the crystal
+        within each image, which is the order of the atoms of `supercell(size).apply(crystal)`.
+        Every block holds `chunk_atoms` atoms except for the last one, such that peak memory is
+        bounded by the chunk size regardless of the size of the supercell.
+
+        Args:
+            crystal: The crystal to replicate.
+            size: Number of repeat units in each direction.
+            chunk_atoms: Number of atoms of each block.
+
+        Yields:
+            The (M,) species, (M, 3) cartesian positions, (M,) index of the original atom in the crystal
+            and (M, 3) integer image of each atom of a block.
+
+        Example:
+            >>> from atompack.crystal import Basis, Crystal, LatticeParameters, Transform, UnitCell
+            >>> from atompack.symmetry import Spacegroup
+            >>>
+            >>> # stream a large supercell of FCC copper in blocks of 1000 atoms
+            >>> unit_cell = UnitCell(Basis.primitive("Cu"), LatticeParameters.cubic(3.6), Spacegroup(225))
+            >>> blocks = Transform.iter_supercell(Crystal(unit_cell), (20, 20, 20), chunk_atoms=1000)
+            >>> assert sum(len(species) for species, _, _, _ in blocks) == 32000
+        """
+        if chunk_atoms < 1:
+            raise ValueError("`chunk_atoms` must be positive")
+        species = crystal.species
+        positions = crystal.positions
+        vectors = np.array(crystal.lattice_vectors.vectors, dtype=float)
+        total = int(np.prod(size)) * len(positions)
+        for start in range(0, total, chunk_atoms):
+            stop = min(start + chunk_atoms, total)
+            out = np.empty((stop - start, 3))
+            indices, images, cells = _supercell_block(positions, vectors, size, start, stop, out)
+            yield species[indices], out, indices, images[cells]
+
     #########################
     #    Private Methods    #
     #########################
@@ -97,11 +172,18 @@ class Transform(object):
         if plane is None:
             return
 
-    # TODO
     def _orient(self, crystal: Crystal) -> None:
         orientation = self._orientation
         if orientation is None:
             return
+        if not orientation.single:
+            raise ValueError("a crystal can only be oriented by a single orientation")
+        # rotate every position at once and the lattice vectors along with them
+        atoms = crystal.atoms
+        if len(atoms) > 0:
+            for atom, position in zip(atoms, orientation.apply(crystal.positions)):
+                atom.position = position
+        crystal.lattice_vectors.vectors = orientation.apply(crystal.lattice_vectors.vectors)
 
     # TODO
     def _project(self, crystal: Crystal) -> None:
@@ -109,19 +191,97 @@ class Transform(object):
         if plane is None:
             return
 
+    def _reorder(self, crystal: Crystal) -> None:
+        curve = self._reorder_curve
+        if curve is None:
+            return
+        crystal.reorder(curve)
+
     def _supercell(self, crystal: Crystal) -> None:
         size = self._supercell_size
         if size is None:
             return
         existing_atoms = crystal.atoms.copy()
-        for x in range(size[0]):
-            for y in range(size[1]):
-                for z in range(size[2]):
-                    if x == y == z == 0:
-                        continue
-                    offset = np.matmul(np.array([x, y, z]), crystal.lattice_vectors.vectors)
-                    for atom in existing_atoms:
-                        _atom = copy.deepcopy(atom)
-                        _atom.position += offset
-                        crystal.insert_atoms(_atom)
-        crystal.lattice_vectors.vectors *= size
+        existing_bonds = crystal.bonds.copy()
+        existing_edges = np.array(crystal._graph.edge_list(), dtype=int).reshape(-1, 2)
+        positions = crystal._node_positions()
+
+        # replicate atoms image by image in generation order
+        cells = np.array(list(np.ndindex(*size)), dtype=int)
+        indices = np.empty((len(cells), len(existing_atoms)), dtype=int)
+        indices[0] = crystal._graph.node_indexes()
+        for n, cell in enumerate(cells[1:], start=1):
+            offset = np.matmul(cell, crystal.lattice_vectors.vectors)
+            atoms = []
+            for atom in existing_atoms:
+                _atom = copy.deepcopy(atom)
+                _atom.position += offset
+                atoms.append(_atom)
+            indices[n] = crystal.insert_atoms(*atoms)
+
+        # replicate bonds within and across the supercell boundaries
+        if len(existing_bonds) > 0:
+            images = np.array([bond.image for bond in existing_bonds], dtype=int)
+            targets = cells[:, np.newaxis, :] + images[np.newaxis, :, :]
+            target_cells = np.ravel_multi_index(np.moveaxis(targets % size, -1, 0), size)
+            target_images = np.floor_divide(targets, size)
+            sources = indices[:, positions[existing_edges[:, 0]]]
+            destinations = indices[target_cells, positions[existing_edges[np.newaxis, :, 1]]]
+            for index in crystal._graph.edge_indices():
+                crystal._graph.remove_edge_from_index(index)
+            attrs = [{k: v for k, v in bond.items() if k not in ("indices", "image")} for bond in existing_bonds]
+            # index arithmetic is vectorized above and only the Bond objects are created one by one
+            rows = zip(sources.reshape(-1).tolist(),
+                       destinations.reshape(-1).tolist(),
+                       target_images.reshape(-1, 3).tolist(),
+                       np.tile(np.arange(len(existing_bonds)), len(cells)).tolist())
+            bonds = [Bond((i, j), (image[0], image[1], image[2]), **attrs[m]) for i, j, image, m in rows]
+            crystal.insert_bonds(*bonds)
+
+        crystal.lattice_vectors.vectors *= np.array(size)[:, np.newaxis]
+
+    def _mapped_supercell(self, crystal: Crystal) -> MappedCrystal:
+        size = self._supercell_size or (1, 1, 1)
+        names, codes = np.unique(crystal.species, return_inverse=True)
+        lattice_vectors = LatticeVectors(crystal.lattice_vectors.vectors * np.array(size)[:, np.newaxis])
+        mapped = MappedCrystal.create(str(self._supercell_directory), crystal.unit_cell, lattice_vectors, names,
+                                      int(np.prod(size)) * len(codes))
+
+        # each atom of a block costs at most its flat index, image and original index, a gathered offset column,
+        # the buffer of its in-place sum and its specie code
+        chunk_atoms = max(1, MAX_MEMORY // (5 * 8 + 2))
+        codes = codes.astype(np.uint16)
+        positions = crystal.positions
+        vectors = np.array(crystal.lattice_vectors.vectors, dtype=float)
+        total = len(mapped.codes)
+        for start in range(0, total, chunk_atoms):
+            stop = min(start + chunk_atoms, total)
+            # positions are computed in place in the memory map and no temporary outlives its block
+            block = _supercell_block(positions, vectors, size, start, stop, mapped.positions[start:stop])
+            mapped.codes[start:stop] = codes[block[0]]
+            del block
+        mapped.flush()
+        return mapped
+
+
+#########################
+#    Private Helpers    #
+#########################
+
+
+def _supercell_block(positions: np.ndarray, vectors: np.ndarray, size: Tuple[int, int, int], start: int, stop: int,
+                     out: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # writes the positions of the flat supercell atoms [start, stop) into `out` and returns the original index
+    # of each atom, the images spanned by the block and the index of the image of each atom into them
+    flat = np.arange(start, stop)
+    cells, indices = np.divmod(flat, len(positions))
+    del flat
+    first = int(cells[0])
+    cells -= first
+    images = np.column_stack(np.unravel_index(np.arange(first, first + int(cells[-1]) + 1), size))
+    offsets = np.matmul(images, vectors)
+    # indices are always valid and the default mode would buffer `out`
+    np.take(positions, indices, axis=0, out=out, mode="clip")
+    for axis in range(3):
+        out[:, axis] += offsets[cells, axis]
+    return indices, images, cells
@@ -0,0 +1,4 @@
+"""Readers and writers of common atomistic file formats."""
+
+from atompack.io.readers import Frame, LAMMPSDumpFrames, XYZFrames, read_lammps_data, read_poscar
+from atompack.io.writers import iter_blocks, write_lammps_data, write_poscar, write_xyz
@@ -0,0 +1,435 @@
+"""Bulk readers of extended XYZ, VASP POSCAR and LAMMPS files."""
+
+import mmap
+import re
+from collections.abc import Sequence
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from retworkx import PyGraph
+
+from atompack.atom import Atom
+from atompack.crystal.components import Basis, LatticeParameters, LatticeVectors
+from atompack.crystal.crystal import Crystal, UnitCell
+from atompack.molecule import Molecule
+from atompack.symmetry import Spacegroup
+
+SCAN_SIZE = 2**24
+"""Number of bytes searched for line breaks at once while indexing frames."""
+
+XYZ_TYPES = {"S": str, "R": float, "I": int, "L": bool}
+"""Array type of each property type of the extended XYZ format."""
+
+
+class Frame(NamedTuple):
+    """Arrays of a single structure read from a file.
+
+    Attributes:
+        species: (N,) specie of each atom.
+        positions: (N, 3) cartesian position of each atom.
+        lattice_vectors: Row-major lattice vectors of a periodic structure.
+        properties: Further per-atom arrays such as forces or charges by name.
+    """
+    species: np.ndarray
+    positions: np.ndarray
+    lattice_vectors: Optional[np.ndarray]
+    properties: Dict[str, np.ndarray]
+
+    def to_molecule(self) -> Molecule:
+        """Returns the atoms of the frame inserted into a molecule at once."""
+        return Molecule(self._graph())
+
+    def to_crystal(self) -> Crystal:
+        """Returns the atoms of the frame inserted into a crystal at once.
+
+        Note:
+            The unit cell of the crystal is an empty P1 cell of its lattice.
+        """
+        if self.lattice_vectors is None:
+            raise ValueError("a crystal requires a frame with lattice vectors")
+        lattice_vectors = LatticeVectors(np.array(self.lattice_vectors, dtype=float))
+        unit_cell = UnitCell(Basis([]), LatticeParameters.from_lattice_vectors(lattice_vectors), Spacegroup(1),
+                             _graph=PyGraph())
+        return Crystal(unit_cell, lattice_vectors, self._graph())
+
+    def _graph(self) -> PyGraph:
+        # atoms are built in one pass and inserted with a single call
+        names = list(self.properties)
+        columns = [self.properties[name] for name in names]
+        graph = PyGraph()
+        graph.add_nodes_from([
+            Atom(str(specie), position, **dict(zip(names, values)))
+            for specie, position, *values in zip(self.species, self.positions.copy(), *columns)
+        ])
+        return graph
+
+
+class XYZFrames(Sequence):
+    """Lazy sequence of the frames of an extended XYZ file.
+
+    The byte offset of every frame is found once with vectorized line break searches, so
+    reading any frame only parses that frame. The numeric block of each frame is split and
+    converted into arrays at once following the `Properties` of its comment line.
+
+    Args:
+        path: Path of the file.
+
+    Example:
+        >>> from atompack.io import XYZFrames, iter_blocks, write_xyz
+        >>> import numpy as np
+        >>> import os, tempfile
+        >>>
+        >>> # three frames of a diatomic molecule
+        >>> path = os.path.join(tempfile.mkdtemp(), "frames.xyz")
+        >>> for n in range(3):
+        ...     _ = write_xyz(path, iter_blocks(np.array(["C", "O"]), [[0, 0, 0], [0, 0, 1.1 + n]]), append=n > 0)
+        >>>
+        >>> frames = XYZFrames(path)
+        >>> assert len(frames) == 3
+        >>> assert np.isclose(frames[-1].positions[1, 2], 3.1)
+    """
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        offsets = []
+        with open(path, "rb") as f, _map(f) as data:
+            position = 0
+            while position < len(data):
+                end = _line_end(data, position)
+                line = data[position:end].strip()
+                if not line:
+                    break
+                offsets.append(position)
+                position = _skip_lines(data, end + 1, int(line) + 1)
+        self._offsets = np.array(offsets, dtype=np.int64)
+
+    ####################
+    #    Properties    #
+    ####################
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """Returns the byte offset of each frame."""
+        return self._offsets
+
+    #################################
+    #    Sequence Implementation    #
+    #################################
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[n] for n in range(len(self))[index]]
+        offset = self._offsets[index]
+        with open(self._path, "rb") as f, _map(f) as data:
+            end = _line_end(data, offset)
+            count = int(data[offset:end])
+            start = end + 1
+            end = _line_end(data, start)
+            comment = data[start:end].decode()
+            block = data[end + 1:_skip_lines(data, end + 1, count)]
+        return _parse_xyz(comment, block, count)
+
+    def __len__(self):
+        return len(self._offsets)
+
+
+class LAMMPSDumpFrames(Sequence):
+    """Lazy sequence of the frames of a LAMMPS dump file of style `custom` or `atom`.
+
+    Frames are indexed by byte offset once and each frame is parsed in bulk on access.
+    Atoms are sorted by their `id` and positions are shifted such that the cell starts at the origin.
+
+    Args:
+        path: Path of the file.
+        species: Specie of each atom type. Types are named by their number by default.
+    """
+
+    def __init__(self, path: str, species: Optional[Dict[int, str]] = None) -> None:
+        self._path = path
+        self._species = species
+        offsets = []
+        with open(path, "rb") as f, _map(f) as data:
+            position = 0
+            while position < len(data):
+                if not data[position:_line_end(data, position)].startswith(b"ITEM: TIMESTEP"):
+                    break
+                offsets.append(position)
+                # the atom count follows the third line of every frame
+                count_line = _skip_lines(data, position, 3)
+                count = int(data[count_line:_line_end(data, count_line)])
+                position = _skip_lines(data, count_line, 6 + count)
+        self._offsets = np.array(offsets, dtype=np.int64)
+
+    ####################
+    #    Properties    #
+    ####################
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """Returns the byte offset of each frame."""
+        return self._offsets
+
+    #################################
+    #    Sequence Implementation    #
+    #################################
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[n] for n in range(len(self))[index]]
+        offset = self._offsets[index]
+        with open(self._path, "rb") as f, _map(f) as data:
+            header_end = _skip_lines(data, offset, 9)
+            header = data[offset:header_end].decode().splitlines()
+            count = int(header[3])
+            block = data[header_end:_skip_lines(data, header_end, count)]
+        return self._parse(header, block, count)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    #########################
+    #    Private Methods    #
+    #########################
+
+    def _parse(self, header: List[str], block: bytes, count: int) -> Frame:
+        vectors, origin = _lammps_cell(header[4].split()[3:], [line.split() for line in header[5:8]])
+        names = header[8].split()[2:]
+        table = _table(block, count, len(names))
+        columns = {name: table[:, n] for n, name in enumerate(names)}
+        order = np.argsort(columns["id"].astype(np.int64), kind="stable") if "id" in columns else np.arange(count)
+
+        # unscaled, scaled or unwrapped coordinates
+        if all(name in columns for name in ("x", "y", "z")):
+            positions = np.column_stack([columns[name].astype(float) for name in ("x", "y", "z")]) - origin
+        elif all(name in columns for name in ("xs", "ys", "zs")):
+            positions = np.matmul(np.column_stack([columns[name].astype(float) for name in ("xs", "ys", "zs")]),
+                                  vectors)
+        elif all(name in columns for name in ("xu", "yu", "zu")):
+            positions = np.column_stack([columns[name].astype(float) for name in ("xu", "yu", "zu")]) - origin
+        else:
+            raise ValueError("LAMMPS dump frames require `x y z`, `xs ys zs` or `xu yu zu` columns")
+        species = _lammps_species(columns.get("type", np.full(count, b"1")), self._species)
+        coordinates = {"x", "y", "z", "xs", "ys", "zs", "xu", "yu", "zu"}
+        properties = {name: _numeric(column)[order] for name, column in columns.items() if name not in coordinates}
+        return Frame(species[order], positions[order], vectors, properties)
+
+
+def read_poscar(path: str) -> Frame:
+    """Returns the structure of a VASP 5 POSCAR file.
+
+    Args:
+        path: Path of the file.
+
+    Example:
+        >>> from atompack.crystal import Basis, Crystal, LatticeParameters, UnitCell
+        >>> from atompack.io import read_poscar, write_poscar
+        >>> from atompack.symmetry import Spacegroup
+        >>> import numpy as np
+        >>> import os, tempfile
+        >>>
+        >>> # round trip of rocksalt
+        >>> basis = Basis([("Na", np.zeros(3)), ("Cl", np.full(3, 0.5))])
+        >>> crystal = Crystal(UnitCell(basis, LatticeParameters.cubic(5.64), Spacegroup(225)))
+        >>> path = os.path.join(tempfile.mkdtemp(), "POSCAR")
+        >>> _ = write_poscar(path, crystal)
+        >>> frame = read_poscar(path)
+        >>> assert np.allclose(frame.positions, crystal.positions)
+        >>> assert len(frame.to_crystal().atoms) == 8
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    lines = data.split(b"\n", 9)
+    scale = float(lines[1])
+    vectors = _table(b" ".join(lines[2:5]), 3, 3).astype(float)
+    if scale < 0:
+        # a negative scale is the volume of the cell
+        scale = (-scale / abs(np.linalg.det(vectors)))**(1 / 3)
+    vectors *= scale
+    names = lines[5].decode().split()
+    if not names or names[0].isdigit():
+        raise ValueError("POSCAR files must list their species on the sixth line")
+    counts = np.array(lines[6].split(), dtype=int)
+    header = 7
+    selective = lines[header].strip()[:1].lower() == b"s"
+    if selective:
+        header += 1
+    cartesian = lines[header].strip()[:1].lower() in (b"c", b"k")
+    body = data.split(b"\n", header + 1)[-1]
+
+    # coordinates and the optional selective dynamics flags of every atom at once
+    count = int(np.sum(counts))
+    block = body[:_skip_lines(body, 0, count)]
+    table = _table(block, count, 6 if selective else 3)
+    positions = table[:, :3].astype(float)
+    positions = positions * scale if cartesian else np.matmul(positions, vectors)
+    properties = {}
+    if selective:
+        properties["selective_dynamics"] = table[:, 3:] == b"T"
+    return Frame(np.repeat(np.array(names), counts), positions, vectors, properties)
+
+
+def read_lammps_data(path: str, species: Optional[Dict[int, str]] = None) -> Frame:
+    """Returns the structure of a LAMMPS data file of atom style `atomic`, `charge` or `full`.
+
+    Atoms are sorted by their id and positions are shifted such that the cell starts at the origin.
+
+    Args:
+        path: Path of the file.
+        species: Specie of each atom type. Types are named by their number by default.
+
+    Example:
+        >>> from atompack.crystal import Basis, Crystal, LatticeParameters, UnitCell
+        >>> from atompack.io import read_lammps_data, write_lammps_data
+        >>> from atompack.symmetry import Spacegroup
+        >>> import numpy as np
+        >>> import os, tempfile
+        >>>
+        >>> # round trip of FCC copper
+        >>> crystal = Crystal(UnitCell(Basis.primitive("Cu"), LatticeParameters.cubic(3.6), Spacegroup(225)))
+        >>> path = os.path.join(tempfile.mkdtemp(), "copper.data")
+        >>> types = write_lammps_data(path, crystal)
+        >>> frame = read_lammps_data(path, {1: "Cu"})
+        >>> assert np.allclose(frame.positions, crystal.positions)
+        >>> assert list(frame.species) == ["Cu"] * 4
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    start = data.find(b"\nAtoms")
+    if start < 0:
+        raise ValueError("LAMMPS data files must have an `Atoms` section")
+    header = data[:start].decode().splitlines()[1:]
+    style_line = data[start + 1:_line_end(data, start + 1)].decode()
+    style = style_line.split("#")[1].strip() if "#" in style_line else "atomic"
+    columns = {"atomic": ("id", "type", "x", "y", "z"), "charge": ("id", "type", "q", "x", "y", "z"),
+               "full": ("id", "molecule", "type", "q", "x", "y", "z")}
+    if style not in columns:
+        raise ValueError(f"unsupported atom style `{style}`")
+
+    # header keywords
+    count = 0
+    bounds = {}
+    tilts = ["0", "0", "0"]
+    for line in header:
+        fields = line.split("#")[0].split()
+        if line.rstrip().endswith(" atoms"):
+            count = int(fields[0])
+        elif len(fields) == 4 and fields[2] in ("xlo", "ylo", "zlo"):
+            bounds[fields[2][0]] = fields[:2]
+        elif len(fields) == 6 and fields[3:] == ["xy", "xz", "yz"]:
+            tilts = fields[:3]
+    if len(bounds) != 3:
+        raise ValueError("LAMMPS data files must define the bounds of the cell")
+    (xlo, xhi), (ylo, yhi), (zlo, zhi) = [np.array(bounds[axis], dtype=float) for axis in "xyz"]
+    xy, xz, yz = np.array(tilts, dtype=float)
+    vectors = np.array([[xhi - xlo, 0, 0], [xy, yhi - ylo, 0], [xz, yz, zhi - zlo]])
+
+    # skip the section title and the blank line which follows it
+    body = _skip_lines(data, start + 1, 2)
+    while data[body:_line_end(data, body)].strip() == b"":
+        body = _line_end(data, body) + 1
+    block = data[body:_skip_lines(data, body, count)]
+    names = columns[style]
+    table = _table(block, count, len(names))
+    values = {name: table[:, n] for n, name in enumerate(names)}
+    order = np.argsort(values["id"].astype(np.int64), kind="stable")
+    positions = np.column_stack([values[name].astype(float) for name in ("x", "y", "z")]) - [xlo, ylo, zlo]
+    properties = {name: _numeric(values[name])[order] for name in names if name not in ("x", "y", "z")}
+    return Frame(_lammps_species(values["type"], species)[order], positions[order], vectors, properties)
+
+
+#########################
+#    Private Helpers    #
+#########################
+
+
+def _map(f) -> mmap.mmap:
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _line_end(data, position: int) -> int:
+    end = data.find(b"\n", position)
+    return len(data) if end < 0 else end
+
+
+def _skip_lines(data, position: int, lines: int) -> int:
+    # offset after `lines` line breaks from `position` found in vectorized chunks which grow up to `SCAN_SIZE`
+    size = min(SCAN_SIZE, 128 * lines)
+    while lines > 0 and position < len(data):
+        chunk = np.frombuffer(data[position:position + size], dtype=np.uint8)
+        breaks = np.flatnonzero(chunk == ord("\n"))
+        if len(breaks) >= lines:
+            return position + int(breaks[lines - 1]) + 1
+        lines -= len(breaks)
+        position += len(chunk)
+        size = min(SCAN_SIZE, 2 * size)
+    return min(position, len(data))
+
+
+def _table(block: bytes, rows: int, columns: int) -> np.ndarray:
+    # (rows, columns) byte strings of a whitespace separated numeric block
+    tokens = block.split()
+    if len(tokens) == rows * columns:
+        return np.array(tokens, dtype=bytes).reshape(rows, columns)
+    # only rows which carry trailing image flags or comments are split one by one
+    lines = block.splitlines()[:rows]
+    table = [line.split(b"#")[0].split()[:columns] for line in lines]
+    if len(table) != rows or any(len(row) != columns for row in table):
+        raise ValueError(f"expected {rows} rows of {columns} columns")
+    return np.array(table, dtype=bytes)
+
+
+def _numeric(column: np.ndarray) -> np.ndarray:
+    # integers where possible and floats otherwise
+    try:
+        return column.astype(np.int64)
+    except ValueError:
+        return column.astype(float)
+
+
+def _lammps_species(types: np.ndarray, species: Optional[Dict[int, str]]) -> np.ndarray:
+    types = types.astype(np.int64)
+    if species is None:
+        return types.astype(str)
+    unique, inverse = np.unique(types, return_inverse=True)
+    return np.array([species[int(t)] for t in unique], dtype=str)[inverse.reshape(-1)]
+
+
+def _lammps_cell(flags: List[str], bounds: List[List[str]]) -> Tuple[np.ndarray, np.ndarray]:
+    # lattice vectors and origin of the bounding box of a dump frame
+    values = np.array([row[:3] if len(row) > 2 else row + ["0"] for row in bounds], dtype=float)
+    (xlo, xhi, xy), (ylo, yhi, xz), (zlo, zhi, yz) = values
+    if "xy" in flags:
+        xlo -= min(0.0, xy, xz, xy + xz)
+        xhi -= max(0.0, xy, xz, xy + xz)
+        ylo -= min(0.0, yz)
+        yhi -= max(0.0, yz)
+    else:
+        xy = xz = yz = 0.0
+    vectors = np.array([[xhi - xlo, 0, 0], [xy, yhi - ylo, 0], [xz, yz, zhi - zlo]])
+    return vectors, np.array([xlo, ylo, zlo])
+
+
+def _parse_xyz(comment: str, block: bytes, count: int) -> Frame:
+    # key value pairs of the comment line
+    info = {key: value.strip('"') for key, value in re.findall(r'(\w+)=("[^"]*"|\S+)', comment)}
+    vectors = None
+    if "Lattice" in info:
+        vectors = np.array(info["Lattice"].split(), dtype=float).reshape(3, 3)
+    specification = info.get("Properties", "species:S:1:pos:R:3").split(":")
+    properties = [(specification[n], specification[n + 1], int(specification[n + 2]))
+                  for n in range(0, len(specification), 3)]
+
+    table = _table(block, count, sum(width for _, _, width in properties))
+    arrays = {}
+    column = 0
+    for name, kind, width in properties:
+        values = table[:, column:column + width]
+        if kind == "L":
+            values = np.isin(values, (b"T", b"True", b"1"))
+        else:
+            values = values.astype(XYZ_TYPES[kind])
+        arrays[name] = values[:, 0] if width == 1 else values
+        column += width
+    species = arrays.pop("species")
+    positions = arrays.pop("pos")
+    return Frame(species, positions, vectors, arrays)
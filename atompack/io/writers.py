@@ -0,0 +1,285 @@
+"""Streaming writers of LAMMPS data, extended XYZ and VASP POSCAR files."""
+
+import os
+import shutil
+import tempfile
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from atompack.crystal.mapped import MappedCrystal
+from atompack.topology import Topology
+
+CHUNK_SIZE = 2**16
+"""Default number of atoms formatted at once."""
+
+BUFFER_SIZE = 2**22
+"""Size in bytes of the write buffer of each file."""
+
+COUNT_WIDTH = 20
+"""Width of the count fields which are written once the total number of atoms is known."""
+
+Block = Tuple[np.ndarray, np.ndarray]
+"""Species and (N, 3) cartesian positions of consecutive atoms."""
+
+Atoms = Union[Topology, Iterable[Block]]
+"""A topology or a stream of atom blocks."""
+
+
+def iter_blocks(species: np.ndarray, positions: np.ndarray, chunk_size: int = CHUNK_SIZE) -> Iterator[Block]:
+    """Yields consecutive blocks of at most `chunk_size` atoms from whole arrays.
+
+    Args:
+        species: (N,) specie of each atom.
+        positions: (N, 3) cartesian position of each atom.
+        chunk_size: Largest number of atoms of each block.
+    """
+    species = np.asarray(species)
+    positions = np.asarray(positions, dtype=float).reshape(-1, 3)
+    if len(species) != len(positions):
+        raise ValueError("`species` and `positions` must have the same length")
+    for start in range(0, len(species), chunk_size):
+        yield species[start:start + chunk_size], positions[start:start + chunk_size]
+
+
+def write_xyz(path: str,
+              atoms: Atoms,
+              lattice_vectors: Optional[np.ndarray] = None,
+              comment: str = "",
+              append: bool = False,
+              chunk_size: int = CHUNK_SIZE) -> int:
+    """Writes a frame of an extended XYZ file and returns its number of atoms.
+
+    Args:
+        path: Path of the file.
+        atoms: A topology or a stream of atom blocks.
+        lattice_vectors: Row-major lattice vectors of a periodic frame. Defaults to those of a crystal.
+        comment: Free text appended to the comment line.
+        append: Appends the frame to an existing file such as a trajectory or an ensemble.
+        chunk_size: Number of atoms formatted at once.
+
+    Example:
+        >>> from atompack.io import iter_blocks, write_xyz
+        >>> import numpy as np
+        >>> import os, tempfile
+        >>>
+        >>> # two frames of a diatomic molecule
+        >>> path = os.path.join(tempfile.mkdtemp(), "frames.xyz")
+        >>> positions = np.array([[[0, 0, 0], [0, 0, 1.1]], [[0, 0, 0], [0, 0, 1.2]]])
+        >>> for n, frame in enumerate(positions):
+        ...     _ = write_xyz(path, iter_blocks(np.array(["C", "O"]), frame), append=n > 0)
+        >>> assert len(open(path).read().splitlines()) == 8
+    """
+    lattice_vectors = _lattice_vectors(atoms, lattice_vectors)
+    properties = 'Properties=species:S:1:pos:R:3'
+    if lattice_vectors is not None:
+        lattice = " ".join(f"{value:.10f}" for value in lattice_vectors.reshape(-1))
+        properties = f'Lattice="{lattice}" {properties} pbc="T T T"'
+    header = f"{properties} {comment}".rstrip()
+
+    # append mode would ignore the seek back to the count
+    with open(path, "r+b" if append and os.path.exists(path) else "wb", buffering=BUFFER_SIZE) as f:
+        # the count is written once every block has been consumed
+        count_at = f.seek(0, os.SEEK_END)
+        f.write(f"{'':<{COUNT_WIDTH}}\n{header}\n".encode())
+        count = 0
+        for species, positions in _iter_chunks(atoms, chunk_size):
+            f.write(_format("%s %.8f %.8f %.8f\n", species, *positions.T))
+            count += len(species)
+        end = f.tell()
+        f.seek(count_at)
+        f.write(f"{count:<{COUNT_WIDTH}d}".encode())
+        f.seek(end)
+    return count
+
+
+def write_lammps_data(path: str,
+                      atoms: Atoms,
+                      lattice_vectors: Optional[np.ndarray] = None,
+                      species_order: Optional[Sequence[str]] = None,
+                      masses: Optional[Dict[str, float]] = None,
+                      comment: str = "",
+                      chunk_size: int = CHUNK_SIZE) -> Dict[str, int]:
+    """Writes a LAMMPS data file of atom style `atomic` and returns the type of each specie.
+
+    The cell is rotated into the restricted triclinic frame of LAMMPS with the first lattice
+    vector along x and the second within the xy plane, and the positions are rotated with it.
+
+    Args:
+        path: Path of the file.
+        atoms: A topology or a stream of atom blocks.
+        lattice_vectors: Row-major lattice vectors. Defaults to those of a crystal.
+        species_order: Species of types 1 to K. Defaults to the keys of `masses` or the order of first appearance.
+        masses: Atomic mass of each specie written to the `Masses` section.
+        comment: First line of the file.
+        chunk_size: Number of atoms formatted at once.
+
+    Example:
+        >>> from atompack.crystal import Basis, Crystal, LatticeParameters, UnitCell
+        >>> from atompack.io import write_lammps_data
+        >>> from atompack.symmetry import Spacegroup
+        >>> import os, tempfile
+        >>>
+        >>> # FCC copper
+        >>> unit_cell = UnitCell(Basis.primitive("Cu"), LatticeParameters.cubic(3.6), Spacegroup(225))
+        >>> path = os.path.join(tempfile.mkdtemp(), "copper.data")
+        >>> types = write_lammps_data(path, Crystal(unit_cell), masses={"Cu": 63.546})
+        >>> assert types == {"Cu": 1}
+    """
+    lattice_vectors = _lattice_vectors(atoms, lattice_vectors)
+    if lattice_vectors is None:
+        raise ValueError("LAMMPS data files require lattice vectors")
+    if species_order is None and masses is not None:
+        species_order = list(masses)
+    types: Dict[str, int] = {}
+    if species_order is not None:
+        types = {specie: n + 1 for n, specie in enumerate(species_order)}
+    box, rotation = _lammps_box(lattice_vectors)
+    lx, ly, lz, xy, xz, yz = box
+
+    with open(path, "wb", buffering=BUFFER_SIZE) as f:
+        f.write(f"{comment}\n\n".encode())
+        count_at = f.tell()
+        f.write(f"{'':<{COUNT_WIDTH}} atoms\n".encode())
+        types_at = f.tell()
+        f.write(f"{'':<{COUNT_WIDTH}} atom types\n\n".encode())
+        f.write(f"0.0 {lx:.10f} xlo xhi\n0.0 {ly:.10f} ylo yhi\n0.0 {lz:.10f} zlo zhi\n".encode())
+        if not np.allclose((xy, xz, yz), 0):
+            f.write(f"{xy:.10f} {xz:.10f} {yz:.10f} xy xz yz\n".encode())
+        if masses is not None:
+            f.write(b"\nMasses\n\n")
+            f.write("".join(f"{types[specie]} {masses[specie]:.6f}\n" for specie in types).encode())
+        f.write(b"\nAtoms # atomic\n\n")
+
+        count = 0
+        for species, positions in _iter_chunks(atoms, chunk_size):
+            # assign new types in order of first appearance unless the order is fixed
+            unique, first, inverse = np.unique(species, return_index=True, return_inverse=True)
+            for specie in unique[np.argsort(first)]:
+                if specie not in types:
+                    if species_order is not None:
+                        raise ValueError(f"specie `{specie}` is missing from `species_order`")
+                    types[str(specie)] = len(types) + 1
+            ids = np.array([types[specie] for specie in unique], dtype=int)[inverse.reshape(-1)]
+            positions = np.matmul(positions, rotation)
+            f.write(_format("%d %d %.8f %.8f %.8f\n", np.arange(count + 1, count + len(species) + 1), ids,
+                            *positions.T))
+            count += len(species)
+        end = f.tell()
+        f.seek(count_at)
+        f.write(f"{count:>{COUNT_WIDTH}d}".encode())
+        f.seek(types_at)
+        f.write(f"{len(types):>{COUNT_WIDTH}d}".encode())
+        f.seek(end)
+    return types
+
+
+def write_poscar(path: str,
+                 atoms: Atoms,
+                 lattice_vectors: Optional[np.ndarray] = None,
+                 comment: str = "",
+                 chunk_size: int = CHUNK_SIZE) -> List[Tuple[str, int]]:
+    """Writes a VASP POSCAR file in cartesian coordinates and returns the count of each specie.
+
+    POSCAR files group atoms by specie, so each block is split by specie into temporary files
+    next to `path` which are concatenated once every block has been consumed.
+
+    Args:
+        path: Path of the file.
+        atoms: A topology or a stream of atom blocks.
+        lattice_vectors: Row-major lattice vectors. Defaults to those of a crystal.
+        comment: First line of the file.
+        chunk_size: Number of atoms formatted at once.
+
+    Example:
+        >>> from atompack.crystal import Basis, Crystal, LatticeParameters, UnitCell
+        >>> from atompack.io import write_poscar
+        >>> from atompack.symmetry import Spacegroup
+        >>> import numpy as np
+        >>> import os, tempfile
+        >>>
+        >>> # rocksalt
+        >>> basis = Basis([("Na", np.zeros(3)), ("Cl", np.full(3, 0.5))])
+        >>> unit_cell = UnitCell(basis, LatticeParameters.cubic(5.64), Spacegroup(225))
+        >>> path = os.path.join(tempfile.mkdtemp(), "POSCAR")
+        >>> assert write_poscar(path, Crystal(unit_cell)) == [("Na", 4), ("Cl", 4)]
+    """
+    lattice_vectors = _lattice_vectors(atoms, lattice_vectors)
+    if lattice_vectors is None:
+        raise ValueError("POSCAR files require lattice vectors")
+    directory = os.path.dirname(os.path.abspath(path))
+    with tempfile.TemporaryDirectory(dir=directory) as scratch:
+        groups: Dict[str, IO[bytes]] = {}
+        counts: Dict[str, int] = {}
+        try:
+            for species, positions in _iter_chunks(atoms, chunk_size):
+                unique, first = np.unique(species, return_index=True)
+                for specie in unique[np.argsort(first)]:
+                    specie = str(specie)
+                    if specie not in groups:
+                        groups[specie] = open(os.path.join(scratch, str(len(groups))), "wb", buffering=BUFFER_SIZE)
+                        counts[specie] = 0
+                    mask = species == specie
+                    groups[specie].write(_format("%.10f %.10f %.10f\n", *positions[mask].T))
+                    counts[specie] += int(np.count_nonzero(mask))
+        finally:
+            for group in groups.values():
+                group.close()
+
+        with open(path, "wb", buffering=BUFFER_SIZE) as f:
+            f.write(f"{comment}\n1.0\n".encode())
+            f.write(_format("%.10f %.10f %.10f\n", *np.asarray(lattice_vectors, dtype=float).T))
+            f.write((" ".join(groups) + "\n" + " ".join(str(counts[specie]) for specie in groups) + "\n").encode())
+            f.write(b"Cartesian\n")
+            for n in range(len(groups)):
+                with open(os.path.join(scratch, str(n)), "rb") as group:
+                    shutil.copyfileobj(group, f, BUFFER_SIZE)
+    return [(specie, counts[specie]) for specie in groups]
+
+
+#########################
+#    Private Helpers    #
+#########################
+
+
+def _lattice_vectors(atoms: Atoms, lattice_vectors: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    # explicit lattice vectors take precedence over those of a crystal
+    if lattice_vectors is None and isinstance(atoms, Topology) and hasattr(atoms, "lattice_vectors"):
+        lattice_vectors = getattr(atoms, "lattice_vectors").vectors
+    if lattice_vectors is None:
+        return None
+    return np.asarray(lattice_vectors, dtype=float).reshape(3, 3)
+
+
+def _iter_chunks(atoms: Atoms, chunk_size: int) -> Iterator[Block]:
+    # splits a topology or every streamed block into chunks of at most `chunk_size` atoms
+    if isinstance(atoms, MappedCrystal):
+        atoms = atoms.iter_blocks()
+    elif isinstance(atoms, Topology):
+        yield from iter_blocks(atoms.species, atoms.positions, chunk_size)
+        return
+    for species, positions in atoms:
+        yield from iter_blocks(species, positions, chunk_size)
+
+
+def _format(row: str, *columns: np.ndarray) -> bytes:
+    # formats every row of the columns in a single operation
+    table = np.empty((len(columns[0]), len(columns)), dtype=object)
+    for n, column in enumerate(columns):
+        table[:, n] = column
+    return ((row * len(table)) % tuple(table.reshape(-1).tolist())).encode()
+
+
+def _lammps_box(lattice_vectors: np.ndarray) -> Tuple[Tuple[float, float, float, float, float, float], np.ndarray]:
+    # restricted triclinic box parameters and the rotation of row vectors into its frame
+    a, b, c = lattice_vectors
+    lx = np.linalg.norm(a)
+    xy = np.dot(b, a) / lx
+    ly = np.sqrt(np.dot(b, b) - xy**2)
+    xz = np.dot(c, a) / lx
+    yz = (np.dot(b, c) - xy * xz) / ly
+    lz = np.sqrt(np.dot(c, c) - xz**2 - yz**2)
+    if np.linalg.det(lattice_vectors) < 0:
+        raise ValueError("LAMMPS requires right-handed lattice vectors")
+    box = np.array([[lx, 0, 0], [xy, ly, 0], [xz, yz, lz]])
+    return (float(lx), float(ly), float(lz), float(xy), float(xz), float(yz)), np.linalg.solve(lattice_vectors, box)
@@ -1,10 +1,14 @@
 """A simple abstraction for covalently bonded chemical compounds."""
 
+from typing import Optional
+
+from retworkx import PyGraph
+
 from atompack.topology import Topology
 
 
 class Molecule(Topology):
     """Minimal representation of a chemical compound."""
 
-    def __init__(self) -> None:
-        super().__init__()
+    def __init__(self, graph: Optional[PyGraph] = None) -> None:
+        super().__init__(graph)
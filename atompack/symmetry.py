@@ -1,11 +1,18 @@
 """An abstraction for crystallographic spacegroups."""
 
-from typing import List, Union
+import re
+from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 import orjson
 import pkg_resources
 
 SPACEGROUPS = None
+OPERATORS: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+WYCKOFF: Dict[int, List['WyckoffPosition']] = {}
+
+# integer lattice offsets searched when locating a site on a Wyckoff position
+_LATTICE_OFFSETS = np.array(list(np.ndindex(5, 5, 5))) - 2
 
 
 def _load_spacegroups():
@@ -15,6 +22,121 @@ def _load_spacegroups():
     return SPACEGROUPS
 
 
+def _compile_genpos(genpos: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    # converts general position expressions into rotation matrices and translation vectors
+    rotations = np.zeros((len(genpos), 3, 3), dtype=int)
+    translations = np.zeros((len(genpos), 3))
+    basis = np.vstack((np.zeros(3), np.identity(3)))
+    for i, expression in enumerate(genpos):
+        # implicit multiplication such as `2x` appears in special positions
+        expression = "[{}]".format(re.sub(r"(\d)([xyz])", r"\1*\2", expression))
+        # x, y, and z are evaluated at the origin and at each unit vector
+        values = np.array([eval(expression, {}, {"x": x, "y": y, "z": z}) for x, y, z in basis], dtype=float)
+        translations[i] = values[0]
+        rotations[i] = np.round(values[1:] - values[0]).astype(int).T
+    return rotations, translations
+
+
+class WyckoffPosition(object):
+    """Representation of a Wyckoff position.
+
+    The equivalent sites of a Wyckoff position are compiled into operator arrays which map
+    free parameters `(x, y, z)` onto fractional coordinates as `rotations @ parameters + translations`.
+
+    Note:
+        End users should access Wyckoff positions through `Spacegroup.wyckoff_positions`.
+
+    Args:
+        letter: Wyckoff letter.
+        multiplicity: Number of equivalent sites in the conventional cell.
+        site_symmetry: Point group symbol of the site symmetry.
+        representative: Coordinate expression of the first equivalent site.
+        rotations: (M, 3, 3) linear part of each equivalent site.
+        translations: (M, 3) constant part of each equivalent site.
+    """
+
+    def __init__(self, letter: str, multiplicity: int, site_symmetry: str, representative: str,
+                 rotations: np.ndarray, translations: np.ndarray) -> None:
+        self._letter = letter
+        self._multiplicity = multiplicity
+        self._site_symmetry = site_symmetry
+        self._representative = representative
+        self._rotations = rotations
+        self._translations = translations
+        self._inverses = np.linalg.pinv(rotations)
+
+    ####################
+    #    Properties    #
+    ####################
+
+    @property
+    def letter(self) -> str:
+        """Returns the Wyckoff letter."""
+        return self._letter
+
+    @property
+    def multiplicity(self) -> int:
+        """Returns the number of equivalent sites in the conventional cell."""
+        return self._multiplicity
+
+    @property
+    def site_symmetry(self) -> str:
+        """Returns the point group symbol of the site symmetry."""
+        return self._site_symmetry
+
+    @property
+    def representative(self) -> str:
+        """Returns the coordinate expression of the first equivalent site."""
+        return self._representative
+
+    @property
+    def rotations(self) -> np.ndarray:
+        """Returns the (M, 3, 3) linear part of each equivalent site."""
+        return self._rotations
+
+    @property
+    def translations(self) -> np.ndarray:
+        """Returns the (M, 3) constant part of each equivalent site."""
+        return self._translations
+
+    @property
+    def degrees_of_freedom(self) -> int:
+        """Returns the number of free parameters."""
+        return int(np.linalg.matrix_rank(self._rotations[0]))
+
+    ########################
+    #    Public Methods    #
+    ########################
+
+    def positions(self, parameters: np.ndarray) -> np.ndarray:
+        """Returns the (M, 3) fractional coordinates of the equivalent sites generated by free parameters.
+
+        Args:
+            parameters: Values of the free parameters `(x, y, z)`.
+        """
+        res = np.matmul(self._rotations, np.asarray(parameters, dtype=float)) + self._translations
+        res %= 1
+        res[np.isclose(res, 1)] = 0
+        return res
+
+    def parameters(self, site: np.ndarray, tolerance: float = 1E-6) -> Optional[np.ndarray]:
+        """Returns the free parameters which generate a site or None if the site is not on this position.
+
+        Args:
+            site: Fractional coordinates of the site.
+            tolerance: Fractional distance within which the site is considered to lie on the position.
+        """
+        site = np.asarray(site, dtype=float) % 1
+        # displacements of the site from each equivalent site under each lattice offset
+        offsets = site - self._translations[:, np.newaxis, :] - _LATTICE_OFFSETS[np.newaxis, :, :]
+        parameters = np.einsum("mij,mnj->mni", self._inverses, offsets)
+        residuals = offsets - np.einsum("mij,mnj->mni", self._rotations, parameters)
+        matches = np.argwhere(np.linalg.norm(residuals, axis=-1) <= tolerance)
+        if len(matches) == 0:
+            return None
+        return parameters[matches[0, 0], matches[0, 1]]
+
+
 class Spacegroup(object):
     """Representation of a spacegroup.
 
@@ -43,6 +165,7 @@ class Spacegroup(object):
         self._international_number = group["international_number"]
         self._hermann_mauguin = group["hermann_mauguin"]
         self._genpos = group["genpos"]
+        self._wyckoff = group["wyckoff"]
 
     ######################
     #    Constructors    #
@@ -86,10 +209,74 @@ class Spacegroup(object):
         """Returns the general position expressions."""
         return self._genpos
 
+    @property
+    def rotations(self) -> np.ndarray:
+        """Returns the (N, 3, 3) rotation matrices of the general positions in fractional coordinates."""
+        return self._operators()[0]
+
+    @property
+    def translations(self) -> np.ndarray:
+        """Returns the (N, 3) translation vectors of the general positions in fractional coordinates."""
+        return self._operators()[1]
+
+    @property
+    def centering(self) -> np.ndarray:
+        """Returns the (M, 3) lattice centering vectors including the origin."""
+        rotations, translations = self._operators()
+        mask = np.all(rotations == np.identity(3, dtype=int), axis=(1, 2))
+        return translations[mask] % 1
+
+    @property
+    def wyckoff_positions(self) -> List[WyckoffPosition]:
+        """Returns the Wyckoff positions in alphabetical order of their letters."""
+        if self._international_number not in WYCKOFF:
+            WYCKOFF[self._international_number] = self._compile_wyckoff()
+        return WYCKOFF[self._international_number]
+
     ########################
     #    Public Methods    #
     ########################
 
+    def wyckoff_position(self, letter: str) -> WyckoffPosition:
+        """Returns the Wyckoff position with a given letter."""
+        for position in self.wyckoff_positions:
+            if position.letter == letter:
+                return position
+        raise ValueError(f"spacegroup {self._international_number} has no Wyckoff position `{letter}`")
+
+    def find_wyckoff(self, site: np.ndarray, tolerance: float = 1E-6) -> Tuple[WyckoffPosition, np.ndarray]:
+        """Returns the Wyckoff position of a site and the free parameters which generate it.
+
+        Args:
+            site: Fractional coordinates of the site.
+            tolerance: Fractional distance within which the site is considered to lie on a special position.
+
+        Example:
+            >>> from atompack.symmetry import Spacegroup
+            >>> import numpy as np
+            >>>
+            >>> # the body center of a cubic cell
+            >>> spg = Spacegroup("P m -3 m")
+            >>> wyckoff, parameters = spg.find_wyckoff(np.array([0.5, 0.5, 0.5]))
+            >>> assert wyckoff.letter == "b"
+            >>> assert wyckoff.site_symmetry == "m-3m"
+            >>> assert np.allclose(wyckoff.positions(parameters), 0.5)
+        """
+        # the number of operations which fix the site determines its multiplicity
+        rotations, translations = self._operators()
+        site = np.asarray(site, dtype=float) % 1
+        displacements = np.matmul(rotations, site) + translations - site
+        fixed = np.all(np.abs(displacements - np.round(displacements)) <= tolerance, axis=1)
+        multiplicity = len(rotations) // max(1, np.count_nonzero(fixed))
+        for position in self.wyckoff_positions:
+            if position.multiplicity < multiplicity:
+                continue
+            parameters = position.parameters(site, tolerance)
+            if parameters is not None:
+                return position, parameters
+        # the general position contains every site
+        return self.wyckoff_positions[-1], site
+
     def to_json(self) -> str:
         """Returns the JSON serialized representation."""
         return orjson.dumps({
@@ -108,3 +295,31 @@ class Spacegroup(object):
         if not isinstance(other, Spacegroup):
             return NotImplemented
         return self.international_number == other.international_number
+
+    #########################
+    #    Private Methods    #
+    #########################
+
+    def _operators(self) -> Tuple[np.ndarray, np.ndarray]:
+        # compile the general positions once per spacegroup
+        if self._international_number not in OPERATORS:
+            OPERATORS[self._international_number] = _compile_genpos(self._genpos)
+        return OPERATORS[self._international_number]
+
+    def _compile_wyckoff(self) -> List[WyckoffPosition]:
+        # expand each representative into the distinct equivalent sites in order of the general positions
+        rotations, translations = self._operators()
+        res = []
+        for data in self._wyckoff:
+            representative_rotations, representative_translations = _compile_genpos([data["representative"]])
+            _rotations = np.matmul(rotations, representative_rotations[0])
+            _translations = (np.matmul(rotations, representative_translations[0]) + translations) % 1
+            keys = np.column_stack((_rotations.reshape(-1, 9), np.round(_translations * 24) % 24))
+            _, first = np.unique(keys, axis=0, return_index=True)
+            first = np.sort(first)
+            if len(first) != data["multiplicity"]:
+                raise RuntimeError(f"inconsistent Wyckoff position `{data['letter']}` in spacegroup data")
+            res.append(
+                WyckoffPosition(data["letter"], data["multiplicity"], data["site_symmetry"], data["representative"],
+                                _rotations[first], _translations[first]))
+        return res
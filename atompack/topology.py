@@ -1,13 +1,18 @@
 """The internal abstraction for a network of optionally bonded atoms."""
 
-from typing import List, Optional, Tuple
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
+import numpy as np
 import orjson
+import retworkx
 from retworkx import PyGraph
 
 from atompack.atom import Atom
 from atompack.bond import Bond
 
+if TYPE_CHECKING:
+    from atompack.molecule import Molecule
+
 
 class Topology(object):
     """Internal abstraction for a collection of atoms and bonds.
@@ -20,6 +25,7 @@ class Topology(object):
         if graph is None:
             graph = PyGraph()
         self._graph = graph
+        self._fragment_ids: Optional[np.ndarray] = None
 
     ######################
     #    Constructors    #
@@ -65,18 +71,49 @@ class Topology(object):
         """Returns a list of all bonds in the topology."""
         return self._graph.edges()
 
+    @property
+    def positions(self) -> np.ndarray:
+        """Returns the position of each atom as an (N, 3) array."""
+        return np.array([atom.position for atom in self.atoms], dtype=float).reshape(-1, 3)
+
+    @property
+    def species(self) -> np.ndarray:
+        """Returns the specie of each atom as an (N,) array."""
+        return np.array([atom.specie for atom in self.atoms], dtype=str)
+
+    @property
+    def fragment_ids(self) -> np.ndarray:
+        """Returns the connected fragment id of each atom in the topology.
+
+        Fragments are numbered in order of their lowest atom index.
+        The result is cached until the next atom or bond mutation.
+        """
+        if self._fragment_ids is None:
+            self._fragment_ids = self._label_fragments()
+        return self._fragment_ids
+
+    @property
+    def fragment_count(self) -> int:
+        """Returns the number of connected fragments in the topology."""
+        fragment_ids = self.fragment_ids
+        if len(fragment_ids) == 0:
+            return 0
+        return int(fragment_ids.max()) + 1
+
     ########################
     #    Public Methods    #
     ########################
 
     def insert_atoms(self, *atoms: Atom) -> List[int]:
         """Inserts one or more atoms and returns their indices."""
+        self._fragment_ids = None
         return self._graph.add_nodes_from(atoms)
 
     def remove_atoms(self, *indices: int) -> List[Atom]:
         """Removes and returns one or more atoms."""
         res = [self._graph.get_node_data(index) for index in indices]
         self._graph.remove_nodes_from(indices)
+        self._fragment_ids = None
         return res
 
     def select_atoms(self, *indices: int) -> List[Atom]:
@@ -88,17 +125,68 @@ class Topology(object):
     def insert_bond(self, bond: Bond) -> None:
         """Inserts a bond."""
         self._graph.add_edge(*bond.indices, edge=bond)
+        self._fragment_ids = None
+
+    def insert_bonds(self, *bonds: Bond) -> None:
+        """Inserts one or more bonds in bulk."""
+        self._graph.add_edges_from([(bond.indices[0], bond.indices[1], bond) for bond in bonds])
+        self._fragment_ids = None
 
     def remove_bond(self, indices: Tuple[int, int]) -> Bond:
         """Removes and returns bonds."""
         res = self._graph.get_edge_data(*indices)
         self._graph.remove_edge(*indices)
+        self._fragment_ids = None
         return res
 
     def select_bond(self, indices: Tuple[int, int]) -> Bond:
         """Returns a mutable reference to a bond."""
         return self._graph.get_edge_data(*indices)
 
+    def extract_fragments(self) -> List['Molecule']:
+        """Returns each connected fragment as its own molecule.
+
+        Note:
+            Atoms are shared by reference with this topology rather than copied.
+            Bonds are reindexed to the local atom indices of each fragment.
+        """
+        # avoid a circular import
+        from atompack.molecule import Molecule
+
+        fragment_ids = self.fragment_ids
+        atoms = self.atoms
+        if len(atoms) == 0:
+            return []
+
+        # sort atoms by fragment and find the local index of each atom within its fragment
+        order = np.argsort(fragment_ids, kind="stable")
+        counts = np.bincount(fragment_ids)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        local_indices = np.empty(len(atoms), dtype=int)
+        local_indices[order] = np.arange(len(atoms)) - starts[fragment_ids[order]]
+
+        # map bond endpoints onto fragments and local indices
+        positions = self._node_positions()
+        edges = np.array(self._graph.edge_list(), dtype=int).reshape(-1, 2)
+        edge_positions = positions[edges]
+        edge_fragment_ids = fragment_ids[edge_positions[:, 0]]
+        edge_local_indices = local_indices[edge_positions]
+        edge_order = np.argsort(edge_fragment_ids, kind="stable")
+        edge_bounds = np.searchsorted(edge_fragment_ids[edge_order], np.arange(len(counts) + 1))
+        bonds = self.bonds
+
+        res = []
+        for fragment_id, (start, count) in enumerate(zip(starts, counts)):
+            graph = PyGraph()
+            graph.add_nodes_from([atoms[index] for index in order[start:start + count]])
+            for edge_index in edge_order[edge_bounds[fragment_id]:edge_bounds[fragment_id + 1]]:
+                bond = bonds[edge_index]
+                indices = (int(edge_local_indices[edge_index, 0]), int(edge_local_indices[edge_index, 1]))
+                attrs = {k: v for k, v in bond.items() if k != "indices"}
+                graph.add_edge(indices[0], indices[1], Bond(indices, **attrs))
+            res.append(Molecule(graph))
+        return res
+
     def to_json(self) -> str:
         """Returns the JSON serialized representation."""
         return orjson.dumps(
@@ -108,3 +196,28 @@ class Topology(object):
                 "bonds": [orjson.loads(bond.to_json()) for bond in self.bonds],
             },
             option=orjson.OPT_SERIALIZE_NUMPY)
+
+    #########################
+    #    Private Methods    #
+    #########################
+
+    def _node_positions(self) -> np.ndarray:
+        # maps graph node indices onto positions in the `atoms` list
+        node_indices = np.array(self._graph.node_indexes(), dtype=int)
+        size = node_indices.max() + 1 if len(node_indices) > 0 else 0
+        res = np.full(size, -1, dtype=int)
+        res[node_indices] = np.arange(len(node_indices))
+        return res
+
+    def _label_fragments(self) -> np.ndarray:
+        positions = self._node_positions()
+        res = np.empty(len(self._graph), dtype=int)
+        for label, component in enumerate(retworkx.connected_components(self._graph)):
+            res[positions[np.fromiter(component, dtype=int, count=len(component))]] = label
+        if len(res) == 0:
+            return res
+        # renumber fragments in order of their lowest atom index
+        _, first, inverse = np.unique(res, return_index=True, return_inverse=True)
+        rank = np.empty(len(first), dtype=int)
+        rank[np.argsort(first)] = np.arange(len(first))
+        return rank[inverse.reshape(-1)]
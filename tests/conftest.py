@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from atompack.crystal.components import Basis, LatticeParameters
+from atompack.crystal.crystal import Crystal, UnitCell
+from atompack.crystal.transform import Transform
+from atompack.symmetry import Spacegroup
+
+#######################
+#    Test Fixtures    #
+#######################
+
+
+@pytest.fixture
+def rutile_sites():
+    """Returns the specie/site pairs of a rutile-like structure."""
+    return [
+        ("Ti", np.array([0.0, 0.0, 0.0])),
+        ("Ti", np.array([0.5, 0.5, 0.5])),
+        ("O", np.array([0.3, 0.3, 0.0])),
+        ("O", np.array([0.7, 0.7, 0.0])),
+        ("O", np.array([0.8, 0.2, 0.5])),
+        ("O", np.array([0.2, 0.8, 0.5])),
+    ]
+
+
+@pytest.fixture
+def build_rutile():
+    """Returns a factory of rutile-like crystals from a list of specie/site pairs."""
+
+    def build(sites):
+        lattparams = LatticeParameters.tetragonal(4.6, 3.0)
+        unit_cell = UnitCell(Basis(sites), lattparams, Spacegroup(1))
+        return Crystal(unit_cell)
+
+    return build
+
+
+@pytest.fixture
+def copper():
+    """Returns a factory of FCC copper crystals which are optionally repeated into a supercell."""
+
+    def build(size=None):
+        unit_cell = UnitCell(Basis.primitive("Cu"), LatticeParameters.cubic(3.6), Spacegroup("F m -3 m"))
+        crystal = Crystal(unit_cell)
+        if size is None:
+            return crystal
+        return Transform().supercell(size).apply(crystal)
+
+    return build
+
+
+@pytest.fixture
+def rocksalt():
+    """Returns a factory of rocksalt NaCl crystals which are optionally repeated into a supercell."""
+
+    def build(size=None):
+        basis = Basis([("Na", np.zeros(3)), ("Cl", np.full(3, 0.5))])
+        unit_cell = UnitCell(basis, LatticeParameters.cubic(5.64), Spacegroup("F m -3 m"))
+        crystal = Crystal(unit_cell)
+        if size is None:
+            return crystal
+        return Transform().supercell(size).apply(crystal)
+
+    return build
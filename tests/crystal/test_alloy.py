@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from atompack.crystal.alloy import AlloyDecorator
+
+# first and second neighbor shells of FCC copper
+SHELLS = [2.6, 3.7]
+
+
+@pytest.mark.parametrize("composition,expected", [
+    ({"Cu": 0.5, "Ni": 0.5}, {"Cu": 128, "Ni": 128}),
+    ({"Cu": 0.7, "Ni": 0.2, "Au": 0.1}, {"Cu": 179, "Ni": 51, "Au": 26}),
+])
+def test_alloy_decorator_composition(composition, expected, copper):
+    crystal = copper((4, 4, 4))
+    decorator = AlloyDecorator(composition, seed=7)
+    species = decorator.decorate(crystal)
+    assert {specie: np.count_nonzero(species == specie) for specie in expected} == expected
+    # seeded draws are reproducible and leave the crystal untouched
+    assert np.all(species == decorator.decorate(crystal))
+    assert np.all(crystal.species == "Cu")
+    assert not np.all(species == AlloyDecorator(composition, seed=8).decorate(crystal))
+
+
+def test_alloy_decorator_sublattice(rocksalt):
+    crystal = rocksalt((2, 2, 2))
+    decorated = AlloyDecorator({"Na": 0.75, "K": 0.25}, sublattice="Na", seed=0).apply(crystal)
+    species = decorated.species
+    assert np.count_nonzero(species == "Cl") == 32
+    assert np.count_nonzero(species == "K") == 8
+    # a mask selects the same sublattice
+    mask = np.isin(rocksalt((2, 2, 2)).species, ["Na"])
+    masked = AlloyDecorator({"Na": 0.75, "K": 0.25}, sublattice=mask, seed=0).decorate(rocksalt((2, 2, 2)))
+    assert np.all(masked == species)
+    with pytest.raises(ValueError):
+        _ = AlloyDecorator({"Na": 0.75, "K": 0.5})
+    with pytest.raises(ValueError):
+        _ = AlloyDecorator({"Na": 1.0}, sublattice=np.ones(3, dtype=bool)).decorate(crystal)
+
+
+def test_alloy_decorator_quasirandom(copper):
+    crystal = copper((4, 4, 4))
+    decorator = AlloyDecorator({"Cu": 0.5, "Ni": 0.5}, seed=3)
+    random = copper((4, 4, 4))
+    for atom, specie in zip(random.atoms, decorator.decorate(random)):
+        atom.specie = specie
+    decorator.apply(crystal, cutoffs=SHELLS, steps=5000)
+    assert np.count_nonzero(crystal.species == "Ni") == 128
+    # the swaps drive the short range order of both shells towards the random alloy
+    initial = np.abs(decorator.short_range_order(random, SHELLS))
+    optimized = np.abs(decorator.short_range_order(crystal, SHELLS))
+    assert np.max(optimized) < np.max(initial)
+    assert np.max(optimized) < 1E-2
+    # the parameters of a binary alloy are antisymmetric in the species
+    assert np.allclose(optimized[:, 0, 0], -optimized[:, 0, 1])
@@ -0,0 +1,66 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from atompack.crystal.analysis import (coordination_numbers, neighbor_counts, radial_distribution)
+from atompack.crystal.components import Basis, LatticeParameters
+from atompack.crystal.crystal import Crystal, UnitCell
+from atompack.symmetry import Spacegroup
+
+#######################
+#    Test Fixtures    #
+#######################
+
+
+@pytest.fixture
+def crystal():
+    """Returns a cesium chloride structure."""
+    basis = Basis([("Cs", np.array([0.0, 0.0, 0.0])), ("Cl", np.array([0.5, 0.5, 0.5]))])
+    lattparams = LatticeParameters.cubic(4.0)
+    spg = Spacegroup(1)
+    unit_cell = UnitCell(basis, lattparams, spg)
+    return Crystal(unit_cell)
+
+
+########################
+#    Analysis Tests    #
+########################
+
+
+def test_coordination_numbers(crystal):
+    # 8 unlike neighbors in the first shell
+    assert np.array_equal(coordination_numbers(crystal, 3.5), [8, 8])
+    # 6 like neighbors in the second shell
+    assert np.array_equal(coordination_numbers(crystal, 4.5), [14, 14])
+
+
+def test_neighbor_counts(crystal):
+    # species are sorted as ("Cl", "Cs")
+    res = neighbor_counts(crystal, 4.5, chunk_size=1)
+    assert np.array_equal(res, [[8, 6], [6, 8]])
+
+
+def test_radial_distribution(crystal):
+    cutoff = 4.5
+    radii, total, partial = radial_distribution(crystal, cutoff, bins=90)
+    assert radii.shape == total.shape == (90,)
+    assert partial.shape == (2, 2, 90)
+    # integrating the density recovers the coordination number
+    edges = np.linspace(0, cutoff, 91)
+    shells = 4 / 3 * np.pi * (edges[1:]**3 - edges[:-1]**3)
+    density = len(crystal.atoms) / 4.0**3
+    assert np.isclose(np.sum(total * shells) * density, 14)
+    # like pairs only appear in the second shell
+    first_shell = radii < 3.6
+    assert np.all(partial[0, 0][first_shell] == 0)
+    assert np.any(partial[0, 1][first_shell] > 0)
+    assert np.allclose(partial[0, 1], partial[1, 0])
+
+
+def test_radial_distribution_executor(crystal):
+    serial = radial_distribution(crystal, 6.0, chunk_size=1)
+    with ThreadPoolExecutor(2) as executor:
+        parallel = radial_distribution(crystal, 6.0, chunk_size=1, executor=executor)
+    for a, b in zip(serial, parallel):
+        assert np.allclose(a, b)
@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+from scipy.spatial import cKDTree
+from scipy.spatial.transform import Rotation
+
+from atompack.crystal.boundary import BicrystalBuilder
+from atompack.crystal.spatial import MillerIndex, Orientation, Plane
+
+
+def _twist(angle):
+    # rotation about the boundary normal
+    c, s = np.cos(angle), np.sin(angle)
+    return Orientation(Rotation.from_matrix(np.array([[c, -s, 0], [s, c, 0], [0, 0, 1]])).as_quat())
+
+
+def _closest_across(bicrystal, size):
+    # smallest periodic distance between atoms of different grains
+    grains = np.array([atom["grain"] for atom in bicrystal.atoms])
+    positions = bicrystal.positions
+    tree = cKDTree(positions[grains == 1], boxsize=size)
+    distances, _ = tree.query(positions[grains == 0])
+    return np.min(distances)
+
+
+def test_bicrystal_builder_perfect(copper):
+    size = (10.8, 10.8, 21.6)
+    builder = BicrystalBuilder(copper(), size, cutoff=1.0)
+    orientation = Orientation.from_miller_indices(MillerIndex((0, 0, 1)), MillerIndex((1, 0, 0)))
+    bicrystal = builder.build(orientation, orientation)
+    assert len(bicrystal.atoms) == 4 * 3 * 3 * 6
+    assert np.allclose(bicrystal.lattice_vectors.vectors, np.diag(size))
+    # the grains meet at the center of the cell
+    grains = np.array([atom["grain"] for atom in bicrystal.atoms])
+    assert np.all(bicrystal.positions[grains == 0, 2] < 10.8)
+    assert np.all(bicrystal.positions[grains == 1, 2] >= 10.8)
+    assert np.count_nonzero(grains == 0) == np.count_nonzero(grains == 1)
+
+
+@pytest.mark.parametrize("policy", ["first", "second", "average"])
+def test_bicrystal_builder_policies(policy, copper):
+    # a box which is not a period of the rotated grain has seams within the grain
+    size = (20.0, 20.0, 30.0)
+    cutoff = 1.5
+    first = Orientation.from_miller_indices(MillerIndex((0, 0, 1)), MillerIndex((1, 0, 0)))
+    second = _twist(np.radians(36.87))
+    overlapping = BicrystalBuilder(copper(), size, cutoff=1E-3).build(first, second, translation=[0, 0, -1.0])
+    bicrystal = BicrystalBuilder(copper(), size, cutoff=cutoff, policy=policy).build(
+        first, second, translation=[0, 0, -1.0])
+    assert len(bicrystal.atoms) < len(overlapping.atoms)
+    positions = bicrystal.positions
+    assert np.all((positions >= 0) & (positions < size))
+    if policy != "average":
+        # no pair within or across the grains is closer than the cutoff
+        distances, _ = cKDTree(positions, boxsize=size).query(positions, k=2)
+        assert np.min(distances[:, 1]) >= cutoff
+        assert _closest_across(bicrystal, size) >= cutoff
+
+
+def test_bicrystal_builder_average(copper):
+    size = (10.8, 10.8, 21.6)
+    orientation = Orientation.from_miller_indices(MillerIndex((0, 0, 1)), MillerIndex((1, 0, 0)))
+    # the top layer of the second grain sits 0.3 below the periodic image of the bottom layer of the first grain
+    translation = [0, 0, -0.3]
+    separate = BicrystalBuilder(copper(), size, cutoff=1E-3).build(orientation, orientation, translation=translation)
+    first = BicrystalBuilder(copper(), size, cutoff=0.5).build(orientation, orientation, translation=translation)
+    average = BicrystalBuilder(copper(), size, cutoff=0.5, policy="average").build(orientation,
+                                                                                    orientation,
+                                                                                    translation=translation)
+    # each layer holds 18 atoms and only one pair of layers overlaps
+    assert len(first.atoms) == len(average.atoms) == len(separate.atoms) - 18
+    heights = first.positions[:, 2]
+    assert np.count_nonzero(np.isclose(heights, 0)) == 18
+    assert not np.any(np.isclose(heights, 21.3))
+    # merged atoms sit halfway between both layers across the periodic boundary
+    heights = average.positions[:, 2]
+    assert np.count_nonzero(np.isclose(heights, 21.45)) == 18
+    assert not np.any(np.isclose(heights, 0) | np.isclose(heights, 21.3))
+    grains = np.array([atom["grain"] for atom in average.atoms])
+    assert np.all(grains[np.isclose(heights, 21.45)] == 0)
+
+
+def test_bicrystal_builder_plane(copper):
+    size = (10.8, 10.8, 10.8)
+    builder = BicrystalBuilder(copper(), size, cutoff=1.0)
+    orientation = Orientation.from_miller_indices(MillerIndex((0, 0, 1)), MillerIndex((1, 0, 0)))
+    # boundary normal to x through the center of the cell
+    plane = Plane(np.array([[5.0, 0, 0], [5.0, 0, 1], [5.0, 1, 0]]))
+    bicrystal = builder.build(orientation, orientation, plane)
+    grains = np.array([atom["grain"] for atom in bicrystal.atoms])
+    assert np.all(bicrystal.positions[grains == 0, 0] < 5.0)
+    assert np.all(bicrystal.positions[grains == 1, 0] >= 5.0)
+    with pytest.raises(ValueError):
+        _ = BicrystalBuilder(copper(), size, cutoff=1.0, policy="invalid")
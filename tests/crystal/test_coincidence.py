@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from atompack.crystal.coincidence import enumerate_csl
+from atompack.crystal.components import LatticeParameters, LatticeVectors
+
+
+@pytest.mark.parametrize("axis,expected", [
+    ((0, 0, 1), {5: 36.87, 13: 22.62, 17: 28.07, 25: 16.26}),
+    ((1, 1, 1), {3: 60.0, 7: 38.21, 13: 27.8, 19: 46.83, 21: 21.79}),
+    ((1, 1, 0), {3: 70.53, 9: 38.94, 11: 50.48, 19: 26.53}),
+])
+def test_enumerate_csl_cubic(axis, expected):
+    lattice_vectors = LatticeVectors(np.identity(3) * 3.6)
+    res = enumerate_csl(lattice_vectors, [axis], max_sigma=25)
+    for sigma, angle in expected.items():
+        angles = [np.degrees(csl.angle) for csl in res if csl.sigma == sigma]
+        assert np.any(np.isclose(angles, angle, atol=1E-2))
+    for csl in res:
+        # the cell holds sigma lattice points and is shared by both lattices
+        assert np.isclose(csl.volume, csl.sigma * 3.6**3)
+        assert np.allclose(np.matmul(csl.matrix, lattice_vectors.vectors), csl.vectors)
+        fractional = lattice_vectors.to_fractional(csl.orientation.inv().apply(csl.vectors))
+        assert np.allclose(fractional, np.round(fractional), atol=1E-6)
+        assert np.all(csl.axis == axis)
+    # sorted by cell size
+    sigmas = [csl.sigma for csl in res]
+    assert sigmas == sorted(sigmas)
+    assert all(csl.sigma > 1 for csl in res)
+
+
+def test_enumerate_csl_bounds():
+    lattice_vectors = LatticeVectors.from_lattice_parameters(LatticeParameters.hexagonal(2.5, 4.06))
+    res = enumerate_csl(lattice_vectors, [(0, 0, 1), (0, 0, 2)], max_sigma=19)
+    assert sorted(set(csl.sigma for csl in res)) == [7, 13, 19]
+    # parallel axes are only enumerated once
+    assert len(res) == 18
+    short = enumerate_csl(lattice_vectors, [(0, 0, 1)], max_sigma=19, max_length=10.0)
+    assert 0 < len(short) < len(res)
+    assert all(np.max(np.linalg.norm(csl.vectors, axis=1)) <= 10.0 for csl in short)
+    with pytest.raises(ValueError):
+        _ = enumerate_csl(lattice_vectors, [(0, 0, 0)], max_sigma=19)
@@ -2,6 +2,7 @@ import numpy as np
 import pytest
 
 from atompack.crystal.components import (Basis, LatticeParameters, LatticeVectors)
+from atompack.crystal.reduction import reduce_lattice
 from atompack.symmetry import Spacegroup
 
 #####################
@@ -59,6 +60,21 @@ def test_basis_apply_spacegroup_complex_monoclinic():
         assert np.allclose(target_site, res_site)
 
 
+def test_basis_apply_spacegroup_wyckoff():
+    # rock salt structure with both sites on special positions
+    basis = Basis([("Na", np.zeros(3)), ("Cl", np.full(3, 0.5))])
+    res = basis.apply_spacegroup(Spacegroup("F m -3 m"))
+    assert [specie for specie, _ in res] == ["Na"] * 4 + ["Cl"] * 4
+    sites = np.array([site for _, site in res])
+    assert np.all((sites >= 0) & (sites < 1))
+    assert len(np.unique(np.round(sites, 6), axis=0)) == 8
+    # the given site comes first
+    assert np.allclose(res[4][1], 0.5)
+    # sites generated by a previous site are skipped
+    basis = Basis([("Na", np.zeros(3)), ("Na", np.array([0.5, 0.5, 0.0]))])
+    assert len(basis.apply_spacegroup(Spacegroup("F m -3 m"))) == 4
+
+
 def test_basis_to_from_json():
     basis = Basis.primitive("X")
     json_data = basis.to_json()
@@ -113,8 +129,62 @@ def test_lattice_vectors_wrap(test_input, expectation):
     assert np.allclose(res, expectation)
 
 
+@pytest.mark.parametrize("test_input,expectation", [
+    (np.array([0.4, 0.0, 0.0]), np.array([0.4, 0.0, 0.0])),
+    (np.array([0.6, 0.0, 0.0]), np.array([-0.4, 0.0, 0.0])),
+    (np.array([2.6, -1.3, 0.9]), np.array([-0.4, -0.3, -0.1])),
+])
+def test_lattice_vectors_minimum_image_orthogonal(test_input, expectation):
+    vectors = LatticeVectors(np.identity(3))
+    assert np.allclose(vectors.minimum_image(test_input), expectation)
+
+
+@pytest.mark.parametrize("matrix", [
+    np.array([[1.0, 0.0, 0.0], [0.9, 1.0, 0.0], [0.0, 0.0, 1.0]]),
+    np.array([[1.0, 0.0, 0.0], [7.3, 1.0, 0.0], [0.0, 0.0, 1.0]]),
+    np.array([[1.0, 0.0, 0.0], [5.2, 0.8, 0.0], [-3.1, 4.4, 0.7]]),
+])
+def test_lattice_vectors_minimum_image_triclinic(matrix):
+    vectors = LatticeVectors(matrix)
+    assert not vectors.is_orthogonal()
+    displacements = np.random.default_rng(0).uniform(-1, 1, size=(100, 3))
+    res = vectors.minimum_image(displacements)
+    # results differ from the inputs by lattice translations
+    shifts = vectors.to_fractional(res - displacements)
+    assert np.allclose(shifts, np.round(shifts))
+    # no image within a brute force search over the reduced lattice is shorter
+    reduced, _ = reduce_lattice(vectors.vectors)
+    images = np.matmul(np.array(list(np.ndindex(7, 7, 7))) - 3, reduced)
+    brute_force = np.min(np.linalg.norm(displacements[:, np.newaxis, :] + images, axis=-1), axis=-1)
+    assert np.allclose(np.linalg.norm(res, axis=-1), brute_force)
+
+
+def test_lattice_vectors_minimum_image_skewed():
+    # the short periodicity along y is only visible on the reduced lattice
+    vectors = LatticeVectors(np.array([[1.0, 0.0, 0.0], [7.3, 1.0, 0.0], [0.0, 0.0, 1.0]]))
+    assert np.allclose(vectors.minimum_image(np.array([0.0, 0.5, 0.0])), [0.0, 0.5, 0.0])
+    assert np.allclose(vectors.minimum_image(np.array([0.3, 0.9, 0.0])), [0.0, -0.1, 0.0])
+
+
 def test_lattice_vectors_to_from_json():
     vectors = LatticeVectors(np.identity(3))
     json_data = vectors.to_json()
     res = LatticeVectors.from_json(json_data)
     assert np.allclose(res.vectors, vectors.vectors)
+
+
+def test_lattice_vectors_niggli_delaunay_reduce():
+    vectors = LatticeVectors(2 * np.array([[1.0, 0.0, 0.0], [3.0, 1.0, 0.0], [1.0, -3.0, 1.0]]))
+    for method in (vectors.niggli_reduce, vectors.delaunay_reduce):
+        res, matrix = method()
+        assert np.allclose(res.vectors, np.matmul(matrix, vectors.vectors))
+        assert np.allclose(np.matmul(res.vectors, res.vectors.T), 4 * np.identity(3))
+
+
+def test_lattice_vectors_from_lattice_parameters_hexagonal():
+    lattparams = LatticeParameters.hexagonal(3.0, 5.0)
+    vectors = LatticeVectors.from_lattice_parameters(lattparams).vectors
+    assert np.allclose(np.linalg.norm(vectors, axis=1), [3.0, 3.0, 5.0])
+    # round trip through the lengths and angles
+    res = LatticeParameters.from_lattice_vectors(LatticeVectors(vectors))
+    assert np.allclose([res.alpha, res.beta, res.gamma], [lattparams.alpha, lattparams.beta, lattparams.gamma])
@@ -1,7 +1,12 @@
 import numpy as np
+import pytest
+from retworkx import PyGraph
 
-from atompack.crystal.components import Basis, LatticeParameters
+from atompack.atom import Atom
+from atompack.crystal.components import Basis, LatticeParameters, LatticeVectors
 from atompack.crystal.crystal import Crystal, UnitCell
+from atompack.crystal.transform import Transform
+from atompack.topology import Bond
 from atompack.crystal.spatial import MillerIndex
 from atompack.symmetry import Spacegroup
 
@@ -78,6 +83,129 @@ def test_unit_cell_to_from_json():
 #######################
 
 
+def test_crystal_distances():
+    basis = Basis.primitive("Fe")
+    lattparams = LatticeParameters.cubic(2.85)
+    spg = Spacegroup("I m -3 m")
+    unit_cell = UnitCell(basis, lattparams, spg)
+    crystal = Crystal(unit_cell)
+    target = 2.85 * np.sqrt(3) / 2
+    assert np.allclose(crystal.distances([0, 1], [1, 0]), target)
+    assert np.allclose(crystal.distances([0], [0]), 0)
+    # mismatched index arrays are rejected
+    with pytest.raises(ValueError):
+        _ = crystal.distances([0, 1], [1])
+
+
+def test_crystal_distances_skewed():
+    # a strongly skewed description of a simple cubic lattice
+    vectors = LatticeVectors(np.array([[1.0, 0.0, 0.0], [7.3, 1.0, 0.0], [0.0, 0.0, 1.0]]))
+    unit_cell = UnitCell(Basis.primitive("X"), LatticeParameters.cubic(1.0), Spacegroup(1))
+    graph = PyGraph()
+    graph.add_nodes_from([Atom("X", np.zeros(3)), Atom("X", np.array([0.0, 0.5, 0.0]))])
+    crystal = Crystal(unit_cell, vectors, graph)
+    assert np.allclose(crystal.distances([0], [1]), 0.5)
+    assert np.allclose(crystal.distance_matrix(), [[0, 0.5], [0.5, 0]])
+
+
+def test_crystal_distance_matrix_blocks():
+    basis = Basis([("X", np.array([0.1, 0.2, 0.3])), ("Y", np.array([0.7, 0.1, 0.9]))])
+    lattparams = LatticeParameters.cubic(4.0)
+    spg = Spacegroup("F m -3 m")
+    unit_cell = UnitCell(basis, lattparams, spg)
+    crystal = Crystal(unit_cell)
+    size = len(crystal.atoms)
+    # a tiny memory ceiling forces one row per block
+    blocks = list(crystal.iter_distance_matrix(max_memory=1))
+    assert len(blocks) == size
+    res = crystal.distance_matrix(max_memory=1)
+    assert np.allclose(res, crystal.distance_matrix())
+    assert np.allclose(res, res.T)
+    assert np.allclose(np.diag(res), 0)
+    i, j = np.triu_indices(size)
+    assert np.allclose(res[i, j], crystal.distances(i, j))
+    # subsets select rows and columns
+    subset = np.array([0, 3, 5])
+    assert np.allclose(crystal.distance_matrix(subset), res[np.ix_(subset, subset)])
+
+
+def test_crystal_angles():
+    basis = Basis.primitive("X")
+    lattparams = LatticeParameters.cubic(2.0)
+    spg = Spacegroup("F m -3 m")
+    unit_cell = UnitCell(basis, lattparams, spg)
+    crystal = Crystal(unit_cell)
+    # nearest neighbors around the origin across periodic boundaries
+    res = crystal.angles(np.array([[1, 0, 2], [1, 0, 1]]), max_memory=1)
+    assert np.allclose(res, [np.pi / 3, 0], atol=1E-6)
+
+
+def test_crystal_to_primitive():
+    basis = Basis.primitive("Fe")
+    lattparams = LatticeParameters.cubic(2.85)
+    spg = Spacegroup("I m -3 m")
+    unit_cell = UnitCell(basis, lattparams, spg)
+    crystal = Transform().supercell((2, 3, 1)).apply(Crystal(unit_cell))
+    primitive, matrix = crystal.to_primitive()
+    assert len(primitive.atoms) == 1
+    assert round(np.linalg.det(matrix)) == len(crystal.atoms)
+    assert np.allclose(np.matmul(matrix, primitive.lattice_vectors.vectors), crystal.lattice_vectors.vectors)
+    # every primitive vector is a nearest neighbor vector of BCC
+    assert np.allclose(np.linalg.norm(primitive.lattice_vectors.vectors, axis=1), 2.85 * np.sqrt(3) / 2)
+
+
+def test_crystal_to_primitive_periodic_bonds():
+    # periodic chain of alternating species along x
+    basis = Basis([("X", np.array([0.0, 0.0, 0.0])), ("Y", np.array([0.5, 0.0, 0.0]))])
+    lattparams = LatticeParameters.cubic(2.0)
+    spg = Spacegroup(1)
+    unit_cell = UnitCell(basis, lattparams, spg)
+    crystal = Crystal(unit_cell)
+    crystal.insert_bonds(Bond((0, 1)), Bond((1, 0), (1, 0, 0), order=1))
+    crystal = Transform().supercell((3, 1, 2)).apply(crystal)
+    primitive, _ = crystal.to_primitive()
+    assert len(primitive.atoms) == 2
+    assert sorted(primitive.species) == ["X", "Y"]
+    # the translated copies of both bonds collapse onto the primitive cell
+    assert len(primitive.bonds) == 2
+    for bond in primitive.bonds:
+        i, j = bond.indices
+        offset = np.matmul(bond.image, primitive.lattice_vectors.vectors)
+        distance = np.linalg.norm(primitive.atoms[j].position + offset - primitive.atoms[i].position)
+        assert np.isclose(distance, 1.0)
+    assert sum(1 for bond in primitive.bonds if bond.get("order") == 1) == 1
+
+
+def _bonded_positions(crystal):
+    # bonds identified by the positions of their atoms instead of their indices
+    positions = [tuple(position) for position in crystal.positions]
+    return {(positions[bond.indices[0]], positions[bond.indices[1]], bond.image) for bond in crystal.bonds}
+
+
+def test_crystal_reorder():
+    # periodic chain of alternating species along x
+    basis = Basis([("X", np.array([0.0, 0.0, 0.0])), ("Y", np.array([0.5, 0.0, 0.0]))])
+    unit_cell = UnitCell(basis, LatticeParameters.cubic(2.0), Spacegroup(1))
+    crystal = Crystal(unit_cell)
+    crystal.insert_bonds(Bond((0, 1)), Bond((1, 0), (1, 0, 0), order=1))
+    crystal = Transform().supercell((4, 4, 2)).apply(crystal)
+    positions, species = crystal.positions, crystal.species
+    pairs = _bonded_positions(crystal)
+    for curve in ("morton", "hilbert"):
+        permutation = crystal.reorder(curve)
+        assert np.array_equal(np.sort(permutation), np.arange(64))
+        assert np.allclose(crystal.positions, positions[permutation])
+        assert np.array_equal(crystal.species, species[permutation])
+        positions, species = crystal.positions, crystal.species
+        # bonds connect the same atoms with the same images after renumbering
+        bonds = crystal.bonds
+        assert len(bonds) == 64
+        assert _bonded_positions(crystal) == pairs
+        assert np.all(np.bincount(np.array([bond.indices for bond in bonds]).ravel()) == 2)
+    with pytest.raises(ValueError):
+        crystal.reorder("peano")
+
+
 def test_crystal_to_from_json():
     basis = Basis.primitive("Fe")
     lattparams = LatticeParameters.cubic(2.85)
@@ -0,0 +1,92 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from atompack.crystal.decomposition import DomainDecomposition
+from atompack.io.readers import XYZFrames
+
+
+def _brute_force_ghosts(crystal, owned, cutoff):
+    # every image within one cell of each owned atom
+    positions = crystal.positions
+    vectors = crystal.lattice_vectors.vectors
+    ghosts = set()
+    for image in np.ndindex(3, 3, 3):
+        image = np.array(image) - 1
+        shifted = positions + image @ vectors
+        distances = np.linalg.norm(shifted[np.newaxis, :, :] - positions[owned, np.newaxis, :], axis=-1)
+        for j in np.flatnonzero(np.any((distances <= cutoff) & (distances > 0), axis=0)):
+            if np.any(image != 0) or j not in owned:
+                ghosts.add((int(j), *map(int, image)))
+    return ghosts
+
+
+def test_decomposition_owned(copper):
+    crystal = copper((4, 4, 4))
+    decomposition = DomainDecomposition(crystal, (2, 3, 1), cutoff=2.6)
+    assert len(decomposition) == 6
+    owned = [decomposition.owned(domain) for domain in range(len(decomposition))]
+    # every atom is owned by exactly one subdomain
+    assert np.array_equal(np.sort(np.concatenate(owned)), np.arange(len(crystal.atoms)))
+    fractional = crystal.lattice_vectors.to_fractional(crystal.positions)
+    for domain, indices in enumerate(owned):
+        lower = np.array(np.unravel_index(domain, (2, 3, 1))) / np.array([2, 3, 1])
+        upper = lower + 1 / np.array([2, 3, 1])
+        assert np.all((fractional[indices] >= lower - 1E-9) & (fractional[indices] < upper + 1E-9))
+        assert np.all(decomposition.domain_ids[indices] == domain)
+
+
+def test_decomposition_ghosts(copper):
+    crystal = copper((3, 3, 3))
+    decomposition = DomainDecomposition(crystal, (3, 1, 2), cutoff=3.7, chunk_size=17)
+    for domain in range(len(decomposition)):
+        indices, images = decomposition.ghosts(domain)
+        expected = _brute_force_ghosts(crystal, decomposition.owned(domain), 3.7)
+        assert {(int(j), *map(int, image)) for j, image in zip(indices, images)} == expected
+        assert len(indices) == len(expected)
+
+
+def test_decomposition_single_domain_ghosts_are_images(copper):
+    crystal = copper((2, 2, 2))
+    decomposition = DomainDecomposition(crystal, (1, 1, 1), cutoff=2.6)
+    indices, images = decomposition.ghosts(0)
+    assert len(indices) > 0
+    assert np.all(np.any(images != 0, axis=1))
+    species, positions = decomposition.domain_atoms(0)
+    assert len(species) == len(positions) == 32 + len(indices)
+
+
+def test_decomposition_executor(copper):
+    crystal = copper((3, 3, 3))
+    decomposition = DomainDecomposition(crystal, (2, 2, 2), cutoff=2.6)
+    with ThreadPoolExecutor(2) as executor:
+        parallel = DomainDecomposition(crystal, (2, 2, 2), cutoff=2.6, chunk_size=10, executor=executor)
+    for domain in range(len(decomposition)):
+        assert np.array_equal(parallel.owned(domain), decomposition.owned(domain))
+        for a, b in zip(parallel.ghosts(domain), decomposition.ghosts(domain)):
+            assert np.array_equal(a, b)
+
+
+def test_decomposition_export(tmp_path, copper):
+    crystal = copper((3, 3, 3))
+    decomposition = DomainDecomposition(crystal, (1, 2, 2), cutoff=2.6)
+    with ThreadPoolExecutor(2) as executor:
+        paths = decomposition.export(str(tmp_path), executor=executor)
+    assert len(paths) == 4
+    for domain, path in enumerate(paths):
+        frame = XYZFrames(path)[0]
+        species, positions = decomposition.domain_atoms(domain)
+        assert f"owned={len(decomposition.owned(domain))}" in open(path).read().splitlines()[1]
+        assert np.allclose(frame.positions, positions, atol=1E-6)
+        assert np.allclose(frame.lattice_vectors, crystal.lattice_vectors.vectors)
+    paths = decomposition.export(os.path.join(tmp_path, "lammps"), file_format="lammps")
+    assert all(path.endswith(".data") and os.path.exists(path) for path in paths)
+    with pytest.raises(ValueError):
+        decomposition.export(str(tmp_path), file_format="pdb")
+
+
+def test_decomposition_invalid_grid(copper):
+    with pytest.raises(ValueError):
+        DomainDecomposition(copper((1, 1, 1)), (0, 1, 1), cutoff=1.0)
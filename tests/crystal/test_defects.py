@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from atompack.bond import Bond
+from atompack.crystal.components import Basis, LatticeParameters
+from atompack.crystal.crystal import Crystal, UnitCell
+from atompack.crystal.defects import DefectGenerator
+from atompack.crystal.spatial import MillerIndex, Orientation
+from atompack.crystal.transform import Transform
+from atompack.symmetry import Spacegroup
+
+# octahedral and tetrahedral voids of a conventional FCC cell in lattice units
+VOIDS = np.array([[0.5, 0.5, 0.5], [0, 0, 0.5], [0.5, 0, 0], [0, 0.5, 0], [0.25, 0.25, 0.25], [0.75, 0.75, 0.75],
+                  [0.25, 0.75, 0.25], [0.75, 0.25, 0.25]])
+
+
+def _perovskite(size):
+    basis = Basis([("Sr", np.zeros(3)), ("Ti", np.full(3, 0.5)), ("O", np.array([0.5, 0.5, 0]))])
+    unit_cell = UnitCell(basis, LatticeParameters.cubic(3.9), Spacegroup("P m -3 m"))
+    return Transform().supercell(size).apply(Crystal(unit_cell))
+
+
+@pytest.mark.parametrize("size,expected", [
+    ((1, 1, 1), ["Sr", "Ti", "O"]),
+    ((2, 2, 2), ["Sr", "Ti", "O"]),
+    # the tetragonal supercell splits the oxygen sites into two orbits
+    ((1, 1, 2), ["Sr", "Ti", "O", "O"]),
+])
+def test_defect_generator_distinct_sites(size, expected):
+    generator = DefectGenerator(_perovskite(size))
+    assert list(generator.species[generator.distinct_sites]) == expected
+    assert list(generator.site_labels[generator.distinct_sites]) == list(range(len(expected)))
+    vacancies = generator.vacancies(species=["O"])
+    assert len(vacancies) == expected.count("O")
+    assert all(vacancy.kind == "vacancy" for vacancy in vacancies)
+
+
+def test_defect_generator_shared_base(copper):
+    crystal = copper((3, 3, 3))
+    generator = DefectGenerator(crystal)
+    assert not generator.positions.flags.writeable
+    assert not generator.species.flags.writeable
+    defects = generator.substitutions(["Ni", "Cu"]) + generator.vacancies()
+    assert len(defects) == 2
+    # each variant only stores its delta
+    assert all(defect.nbytes < 64 for defect in defects)
+    substituted = generator.materialize(defects[0])
+    assert len(substituted.atoms) == 108
+    assert list(substituted.species).count("Ni") == 1
+    # the base crystal is untouched
+    assert np.all(crystal.species == "Cu")
+    assert substituted.lattice_vectors is not crystal.lattice_vectors
+
+
+def test_defect_generator_interstitials(copper):
+    generator = DefectGenerator(copper((2, 2, 2)))
+    interstitials = generator.interstitials("H", VOIDS * 3.6)
+    assert len(interstitials) == 2
+    crystals = list(generator.iter_materialize(interstitials))
+    assert all(len(crystal.atoms) == 33 for crystal in crystals)
+    assert all(crystal.species[-1] == "H" for crystal in crystals)
+
+    # each Frenkel pair moves the atom to the nearest image of a void
+    pairs = generator.frenkel_pairs(VOIDS * 3.6)
+    distances = [np.linalg.norm(pair.added_positions[0] - generator.positions[pair.removed[0]]) for pair in pairs]
+    assert np.allclose(sorted(distances), [3.6 * np.sqrt(3) / 4, 1.8])
+    assert len(generator.frenkel_pairs(VOIDS * 3.6, max_distance=1.7)) == 1
+    frenkel = generator.materialize(pairs[0])
+    assert len(frenkel.atoms) == 32
+    assert np.all(frenkel.species == "Cu")
+
+
+def test_defect_generator_bonds(copper):
+    crystal = copper((1, 1, 1))
+    crystal.insert_bond(Bond((0, 1)))
+    crystal.insert_bond(Bond((2, 3), (0, 0, 1)))
+    generator = DefectGenerator(crystal)
+    res = generator.materialize(generator.vacancies()[0])
+    # bonds to the removed atom are dropped and the rest are reindexed
+    assert [(bond.indices, bond.image) for bond in res.bonds] == [((1, 2), (0, 0, 1))]
+
+
+def test_defect_generator_setting(copper):
+    crystal = copper((1, 1, 1))
+    orientation = Orientation.from_miller_indices(MillerIndex((1, 1, 1)), MillerIndex((1, -1, 0)))
+    crystal = Transform().orient(orientation).apply(crystal)
+    with pytest.raises(ValueError):
+        _ = DefectGenerator(crystal)
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from atompack.crystal.components import Basis, LatticeParameters
+from atompack.crystal.crystal import Crystal, UnitCell
+from atompack.crystal.detection import SymmetryAnalyzer
+from atompack.crystal.transform import Transform
+from atompack.symmetry import Spacegroup
+
+###############
+#    Setup    #
+###############
+
+
+def build_crystal(sites, lattparams, spg=1):
+    """Returns a crystal from a list of specie/site pairs."""
+    unit_cell = UnitCell(Basis(sites), lattparams, Spacegroup(spg))
+    return Crystal(unit_cell)
+
+
+def rutile(u=0.305, origin=np.zeros(3)):
+    sites = [
+        ("Ti", np.array([0.0, 0.0, 0.0])),
+        ("Ti", np.array([0.5, 0.5, 0.5])),
+        ("O", np.array([u, u, 0.0])),
+        ("O", np.array([1 - u, 1 - u, 0.0])),
+        ("O", np.array([0.5 + u, 0.5 - u, 0.5])),
+        ("O", np.array([0.5 - u, 0.5 + u, 0.5])),
+    ]
+    return build_crystal([(specie, (site + origin) % 1) for specie, site in sites],
+                         LatticeParameters.tetragonal(4.59, 2.96))
+
+
+################################
+#    SymmetryAnalyzer Tests    #
+################################
+
+
+def test_symmetry_analyzer_bcc_supercell():
+    crystal = build_crystal(Basis.primitive("Fe"), LatticeParameters.cubic(2.85), 229)
+    crystal = Transform().supercell((4, 3, 2)).apply(crystal)
+    analyzer = SymmetryAnalyzer(crystal)
+    assert analyzer.spacegroup == Spacegroup("I m -3 m")
+    assert len(analyzer.asymmetric_unit) == 1
+    specie, site = analyzer.asymmetric_unit[0]
+    assert specie == "Fe"
+    assert np.allclose(site, 0)
+    # primitive cell of BCC holds a single atom
+    assert np.isclose(abs(np.linalg.det(analyzer.primitive_vectors.vectors)), 2.85**3 / 2)
+    assert np.allclose(np.linalg.norm(analyzer.conventional_vectors.vectors, axis=1), 2.85)
+
+
+def test_symmetry_analyzer_fcc_explicit_basis():
+    sites = [("Cu", np.array(site)) for site in ([0, 0, 0], [0.5, 0.5, 0], [0.5, 0, 0.5], [0, 0.5, 0.5])]
+    crystal = build_crystal(sites, LatticeParameters.cubic(3.6))
+    analyzer = SymmetryAnalyzer(crystal)
+    assert analyzer.spacegroup.international_number == 225
+    assert len(analyzer.asymmetric_unit) == 1
+
+
+def test_symmetry_analyzer_shifted_origin():
+    analyzer = SymmetryAnalyzer(rutile(origin=np.array([0.13, 0.27, 0.41])))
+    assert analyzer.spacegroup == Spacegroup("P 42/m n m")
+    species = sorted(specie for specie, _ in analyzer.asymmetric_unit)
+    assert species == ["O", "Ti"]
+    # the oxygen site lies on the (x, x, 0) mirror line at the standard origin
+    site = [site for specie, site in analyzer.asymmetric_unit if specie == "O"][0]
+    assert np.isclose(site[0], site[1]) or np.isclose(site[0], 1 - site[1])
+
+
+def test_symmetry_analyzer_broken_symmetry():
+    # displacing a single oxygen removes all symmetry but the identity
+    crystal = rutile()
+    crystal.atoms[2].position = crystal.atoms[2].position + np.array([0.1, -0.05, 0.2])
+    analyzer = SymmetryAnalyzer(crystal)
+    assert analyzer.spacegroup.international_number == 1
+    assert len(analyzer.asymmetric_unit) == 6
+
+
+def test_symmetry_analyzer_hexagonal():
+    sites = [("Mg", np.array([1 / 3, 2 / 3, 0.25])), ("Mg", np.array([2 / 3, 1 / 3, 0.75]))]
+    crystal = build_crystal(sites, LatticeParameters.hexagonal(3.21, 5.21))
+    crystal = Transform().supercell((2, 2, 1)).apply(crystal)
+    analyzer = SymmetryAnalyzer(crystal)
+    assert analyzer.spacegroup == Spacegroup("P 63/m m c")
+    assert len(analyzer.asymmetric_unit) == 1
+    params = analyzer.lattice_parameters
+    assert np.isclose(params.a, 3.21)
+    assert np.isclose(params.c, 5.21)
+    assert np.isclose(params.gamma, 2 * np.pi / 3)
+
+
+def test_symmetry_analyzer_rhombohedral_setting():
+    # diamond described by its primitive rhombohedral cell
+    sites = [("C", np.zeros(3)), ("C", np.full(3, 0.25))]
+    crystal = build_crystal(sites, LatticeParameters.rhombohedral(2.52, np.pi / 3))
+    analyzer = SymmetryAnalyzer(crystal)
+    assert analyzer.spacegroup == Spacegroup("F d -3 m")
+    assert np.allclose(analyzer.lattice_parameters.a, 2.52 * np.sqrt(2))
+
+
+def test_symmetry_analyzer_tolerance():
+    crystal = Transform().supercell((3, 3, 3)).apply(rutile())
+    rng = np.random.default_rng(0)
+    for atom in crystal.atoms:
+        atom.position = atom.position + rng.uniform(-1E-3, 1E-3, 3)
+    assert SymmetryAnalyzer(crystal, symprec=1E-2).spacegroup.international_number == 136
+    assert SymmetryAnalyzer(crystal, symprec=1E-5).spacegroup.international_number == 1
+
+
+def test_symmetry_analyzer_empty():
+    crystal = build_crystal([], LatticeParameters.cubic(1))
+    with pytest.raises(ValueError):
+        _ = SymmetryAnalyzer(crystal)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from atompack.crystal.ensemble import PerturbationEnsemble, thermal_amplitudes
+
+
+def test_perturbation_ensemble_displacements(rocksalt):
+    crystal = rocksalt((2, 2, 2))
+    ensemble = PerturbationEnsemble(crystal, amplitudes={"Na": 0.1, "Cl": 0.02}, seed=0)
+    positions, vectors = ensemble.generate(200)
+    assert positions.shape == (200, 64, 3)
+    assert np.allclose(vectors, crystal.lattice_vectors.vectors)
+    # the spread of the displacements of each specie follows its amplitude
+    displacements = positions - crystal.positions
+    for specie, amplitude in [("Na", 0.1), ("Cl", 0.02)]:
+        assert np.isclose(np.std(displacements[:, crystal.species == specie]), amplitude, rtol=0.05)
+    # the crystal is untouched
+    assert np.allclose(crystal.positions, rocksalt((2, 2, 2)).positions)
+    with pytest.raises(ValueError):
+        _ = PerturbationEnsemble(crystal, amplitudes={"Na": 0.1})
+
+
+def test_perturbation_ensemble_strain(rocksalt):
+    crystal = rocksalt((1, 1, 1))
+    positions, vectors = PerturbationEnsemble(crystal, strain=0.01, seed=1).generate(50)
+    deformations = np.linalg.solve(crystal.lattice_vectors.vectors, vectors)
+    # homogeneous symmetric strains keep the fractional coordinates
+    assert np.allclose(deformations, np.transpose(deformations, (0, 2, 1)))
+    assert 0.001 < np.std(deformations - np.identity(3)) < 0.02
+    fractional = np.matmul(positions, np.linalg.inv(vectors))
+    assert np.allclose(fractional, crystal.lattice_vectors.to_fractional(crystal.positions))
+
+
+def test_perturbation_ensemble_streaming(rocksalt):
+    crystal = rocksalt((2, 2, 2))
+    ensemble = PerturbationEnsemble(crystal, amplitudes=0.05, strain=0.01, seed=2)
+    positions, vectors = ensemble.generate(10)
+    # blocks of any size reproduce the same members
+    blocks = list(ensemble.iter_members(10, max_memory=3 * 64 * 3 * 8))
+    assert [len(block) for block, _ in blocks] == [3, 3, 3, 1]
+    assert np.allclose(np.concatenate([block for block, _ in blocks]), positions)
+    assert np.allclose(np.concatenate([block for _, block in blocks]), vectors)
+
+
+def test_thermal_amplitudes():
+    amplitudes = thermal_amplitudes(300, {"Cu": 63.546, "O": 15.999}, frequency=5.0)
+    assert np.isclose(amplitudes["Cu"], 0.0631, atol=1E-4)
+    assert np.isclose(amplitudes["O"] / amplitudes["Cu"], np.sqrt(63.546 / 15.999))
+    assert thermal_amplitudes(0, {"Cu": 63.546}, frequency=5.0)["Cu"] == 0
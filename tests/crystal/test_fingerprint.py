@@ -0,0 +1,130 @@
+import numpy as np
+from scipy.spatial.transform import Rotation
+
+from atompack.crystal.components import Basis, LatticeParameters
+from atompack.crystal.crystal import Crystal, UnitCell
+from atompack.crystal.fingerprint import Fingerprint, StructureIndex
+from atompack.crystal.transform import Transform
+from atompack.symmetry import Spacegroup
+
+###########################
+#    Fingerprint Tests    #
+###########################
+
+
+def test_fingerprint_invariance(rutile_sites, build_rutile):
+    reference = Fingerprint.from_crystal(build_rutile(rutile_sites))
+    assert reference.species == ("O", "Ti")
+    assert reference.composition == (2, 1)
+    # atom ordering
+    order = [3, 0, 5, 1, 4, 2]
+    permuted = build_rutile([rutile_sites[i] for i in order])
+    # translation
+    translated = build_rutile([(specie, (site + 0.15) % 1) for specie, site in rutile_sites])
+    # rotation
+    rotated = build_rutile(rutile_sites)
+    matrix = Rotation.from_euler("xyz", [10, 20, 30], degrees=True).as_matrix()
+    for atom in rotated.atoms:
+        atom.position = np.matmul(matrix, atom.position)
+    rotated.lattice_vectors.vectors = np.matmul(rotated.lattice_vectors.vectors, matrix.T)
+    # cell choice
+    supercell = Transform().supercell((1, 2, 2)).apply(build_rutile(rutile_sites))
+    for crystal in (permuted, translated, rotated, supercell):
+        res = Fingerprint.from_crystal(crystal)
+        assert res.key == reference.key
+        assert res.isclose(reference)
+
+
+def test_fingerprint_distinct(rutile_sites, build_rutile):
+    reference = Fingerprint.from_crystal(build_rutile(rutile_sites))
+    # displace the oxygen sublattice
+    distorted = build_rutile([(specie, site + (0.05 if specie == "O" else 0)) for specie, site in rutile_sites])
+    assert not Fingerprint.from_crystal(distorted).isclose(reference)
+    # change the composition
+    substituted = build_rutile([("Sn", site) if specie == "Ti" else (specie, site) for specie, site in rutile_sites])
+    assert not Fingerprint.from_crystal(substituted).isclose(reference)
+
+
+def test_fingerprint_grid_neighbors(rutile_sites, build_rutile):
+    rng = np.random.default_rng(0)
+    reference = Fingerprint.from_crystal(build_rutile(rutile_sites))
+    assert reference.grid_key() in reference.grid_neighbors()
+    # every fingerprint within tolerance lies in one of the probed cells
+    for _ in range(200):
+        vector = reference.vector + rng.uniform(-0.1, 0.1, reference.vector.shape)
+        volume = reference.volume * rng.uniform(0.98, 1.02)
+        other = Fingerprint(reference.species, reference.composition, volume, vector)
+        assert other.isclose(reference)
+        assert other.grid_key() in reference.grid_neighbors()
+
+
+##############################
+#    StructureIndex Tests    #
+##############################
+
+
+def test_structure_index_deduplicate(rutile_sites, build_rutile):
+    crystals = [
+        build_rutile(rutile_sites),
+        build_rutile(rutile_sites[::-1]),
+        build_rutile([(specie, site + (0.05 if specie == "O" else 0)) for specie, site in rutile_sites]),
+        Transform().supercell((2, 1, 1)).apply(build_rutile(rutile_sites)),
+    ]
+    index = StructureIndex()
+    res = list(index.deduplicate(crystals))
+    assert len(res) == len(index) == 2
+    assert res[0] is crystals[0]
+    assert res[1] is crystals[2]
+    assert crystals[3] in index
+    assert index.find(crystals[1]) is crystals[0]
+    assert set(map(id, index)) == {id(crystals[0]), id(crystals[2])}
+
+
+def test_structure_index_comparator(rutile_sites, build_rutile):
+    calls = []
+
+    def comparator(a, b):
+        calls.append((a, b))
+        return False
+
+    index = StructureIndex(comparator)
+    assert index.add(build_rutile(rutile_sites))
+    # the exact comparison overrides matching fingerprints
+    assert index.add(build_rutile(rutile_sites))
+    assert len(calls) == 1
+    assert len(index) == 2
+
+
+def test_structure_index_tolerance():
+    basis = Basis([("Cs", np.zeros(3)), ("Cl", np.full(3, 0.5))])
+    build = lambda a: Crystal(UnitCell(basis, LatticeParameters.cubic(a), Spacegroup(1)))
+    # lattice constants which straddle any quantization boundary are still compared
+    index = StructureIndex()
+    constants = np.linspace(4.0, 4.2, 41)
+    for a in constants:
+        index.add(build(a))
+    assert len(index) < len(constants)
+    assert build(4.1001) in index
+    fingerprints = [Fingerprint.from_crystal(build(a)) for a in (4.1, 4.1001)]
+    assert fingerprints[0].isclose(fingerprints[1])
+    index = StructureIndex()
+    assert index.add(build(4.1))
+    assert not index.add(build(4.1001))
+
+
+def test_structure_index_scaling(build_rutile, monkeypatch):
+    # distinct random structures which share species, composition and cell
+    rng = np.random.default_rng(0)
+    crystals = [build_rutile([(specie, rng.random(3)) for specie in ("Ti", "Ti", "O", "O")]) for _ in range(300)]
+    calls = []
+    isclose = Fingerprint.isclose
+
+    def counted(self, *args, **kwargs):
+        calls.append(None)
+        return isclose(self, *args, **kwargs)
+
+    monkeypatch.setattr(Fingerprint, "isclose", counted)
+    index = StructureIndex(lambda a, b: True)
+    assert len(list(index.deduplicate(crystals))) == 300
+    # far fewer fingerprint comparisons than the n(n - 1) / 2 of a linear scan
+    assert len(calls) < 300
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from atompack.crystal.components import LatticeParameters, LatticeVectors
+from atompack.crystal.interface import InterfaceMatcher
+from atompack.crystal.reduction import reduce_miller_indices, surface_matrix
+from atompack.crystal.spatial import MillerIndex
+
+
+def test_interface_matcher_square():
+    film = LatticeVectors.from_lattice_parameters(LatticeParameters.cubic(3.0))
+    substrate = LatticeVectors.from_lattice_parameters(LatticeParameters.cubic(2.0))
+    index = MillerIndex((0, 0, 1))
+    res = InterfaceMatcher(max_area=40).match(film, index, substrate, index)
+    assert len(res) > 0
+    assert np.isclose(res[0].area, 36)
+    assert res[0].max_strain < 1E-9
+    assert round(np.linalg.det(res[0].film_matrix[:2, :2])) == 4
+    assert round(np.linalg.det(res[0].substrate_matrix[:2, :2])) == 9
+    # sorted by area and then by strain
+    keys = [(round(match.area, 6), match.max_strain) for match in res]
+    assert keys == sorted(keys)
+
+
+def test_interface_matcher_handedness():
+    film = LatticeVectors.from_lattice_parameters(LatticeParameters.hexagonal(3.19, 5.19))
+    substrate = LatticeVectors(np.diag([4.76, 4.76 * np.sqrt(3) * 0.99, 13.0]))
+    index = MillerIndex((0, 0, 1))
+    res = InterfaceMatcher(max_area=200).match(film, index, substrate, index)
+    assert len(res) > 0
+    for match in res:
+        # mirror images of the film are never paired with the substrate
+        assert np.linalg.det(match.film_matrix) * np.linalg.det(match.substrate_matrix) > 0
+        film_cell = match.film_orientation.apply(np.matmul(match.film_matrix, film.vectors))
+        substrate_cell = match.substrate_orientation.apply(np.matmul(match.substrate_matrix, substrate.vectors))
+        # both supercells lie in the xy plane with their stacking vectors along +z
+        assert np.allclose(film_cell[:2, 2], 0) and np.allclose(substrate_cell[:2, 2], 0)
+        assert film_cell[2, 2] > 0 and substrate_cell[2, 2] > 0
+        assert np.allclose(film_cell[:2, :2], substrate_cell[:2, :2], rtol=0.05, atol=0.5)
+
+
+def test_surface_matrix():
+    vectors = LatticeVectors.from_lattice_parameters(LatticeParameters.cubic(3.6)).vectors
+    hkl = np.array(reduce_miller_indices((2, 2, 0)))
+    assert tuple(hkl) == (1, 1, 0)
+    matrix = surface_matrix(hkl, vectors)
+    assert np.all(np.matmul(matrix[:2], hkl) == 0)
+    assert np.matmul(matrix[2], hkl) == 1
+    assert round(np.linalg.det(matrix)) == 1
+    with pytest.raises(ValueError):
+        _ = reduce_miller_indices((0, 0, 0))
@@ -0,0 +1,100 @@
+import os
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from atompack.crystal import transform
+from atompack.crystal.mapped import MappedCrystal
+from atompack.crystal.transform import Transform
+from atompack.io.readers import XYZFrames
+from atompack.io.writers import write_lammps_data, write_xyz
+
+
+def test_mapped_supercell_matches_in_memory(tmp_path, rocksalt):
+    size = (3, 2, 4)
+    mapped = Transform().supercell(size, directory=str(tmp_path)).apply(rocksalt())
+    crystal = rocksalt(size)
+    assert isinstance(mapped, MappedCrystal)
+    assert isinstance(mapped.positions, np.memmap)
+    assert np.allclose(mapped.positions, crystal.positions)
+    assert np.all(mapped.species == crystal.species)
+    assert np.allclose(mapped.lattice_vectors.vectors, crystal.lattice_vectors.vectors)
+    # distances only need the memory mapped positions
+    assert np.allclose(mapped.distances(np.arange(10), np.arange(10, 20)),
+                       crystal.distances(np.arange(10), np.arange(10, 20)))
+
+
+def test_mapped_supercell_leaves_crystal_unchanged(tmp_path, rocksalt):
+    crystal = rocksalt()
+    vectors = crystal.lattice_vectors.vectors.copy()
+    Transform().supercell((2, 2, 2), directory=str(tmp_path)).apply(crystal)
+    assert len(crystal.atoms) == 8
+    assert np.allclose(crystal.lattice_vectors.vectors, vectors)
+
+
+def test_mapped_crystal_reopen(tmp_path, rocksalt):
+    Transform().supercell((2, 2, 2), directory=str(tmp_path)).apply(rocksalt())
+    mapped = MappedCrystal(str(tmp_path))
+    assert mapped.positions.shape == (64, 3)
+    assert set(mapped.species_names) == {"Na", "Cl"}
+    assert mapped.unit_cell.spacegroup.international_number == 225
+    with pytest.raises(ValueError):
+        mapped.positions[0] = 0
+
+
+def test_mapped_crystal_graph_accessors(tmp_path, rocksalt):
+    mapped = Transform().supercell((2, 2, 1), directory=str(tmp_path)).apply(rocksalt())
+    # accessors of the empty graph would silently drop every atom
+    for accessor in (lambda: mapped.atoms, lambda: mapped.bonds, lambda: mapped.fragment_ids,
+                     lambda: mapped.fragment_count, mapped.extract_fragments, mapped.to_json):
+        with pytest.raises(TypeError):
+            accessor()
+    # distance matrices only need the memory mapped positions
+    crystal = rocksalt((2, 2, 1))
+    res = mapped.distance_matrix()
+    assert res.shape == (32, 32)
+    assert np.allclose(res, crystal.distance_matrix())
+
+
+def test_mapped_crystal_select_region(tmp_path, rocksalt):
+    mapped = Transform().supercell((4, 4, 4), directory=str(tmp_path)).apply(rocksalt())
+    lower, upper = np.array([0, 0, 5.64]), np.array([5.64, 11.28, 11.28])
+    indices = mapped.select_region(lower, upper, max_memory=1000)
+    positions = np.array(mapped.positions)
+    inside = np.all((positions >= lower) & (positions < upper), axis=1)
+    assert np.array_equal(indices, np.flatnonzero(inside))
+    assert len(indices) == 16
+    region = mapped.load(indices)
+    assert len(region.atoms) == 16
+    assert np.allclose(region.positions, positions[indices])
+    assert np.all(region.species == mapped.species[indices])
+
+
+def test_mapped_crystal_export(tmp_path, rocksalt):
+    mapped = Transform().supercell((3, 3, 3), directory=os.path.join(tmp_path, "supercell")).apply(rocksalt())
+    path = os.path.join(tmp_path, "supercell.xyz")
+    assert write_xyz(path, mapped, chunk_size=50) == 216
+    frame = XYZFrames(path)[0]
+    assert np.allclose(frame.positions, mapped.positions, atol=1E-6)
+    assert np.all(frame.species == mapped.species)
+    assert np.allclose(frame.lattice_vectors, mapped.lattice_vectors.vectors)
+    counts = write_lammps_data(os.path.join(tmp_path, "supercell.data"), mapped)
+    assert counts == {"Na": 1, "Cl": 2}
+
+
+def test_mapped_supercell_memory_ceiling(tmp_path, monkeypatch, rocksalt):
+    # a small ceiling forces many blocks whose temporaries must stay within it
+    monkeypatch.setattr(transform, "MAX_MEMORY", 2**20)
+    crystal = rocksalt()
+    tracemalloc.start()
+    try:
+        mapped = Transform().supercell((20, 20, 20), directory=str(tmp_path)).apply(crystal)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(mapped.positions) == 64000
+    assert peak < 2**20
+    reference = Transform.iter_supercell(crystal, (20, 20, 20), chunk_atoms=64000)
+    _, positions, _, _ = next(reference)
+    assert np.array_equal(mapped.positions, positions)
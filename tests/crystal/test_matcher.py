@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+from scipy.spatial.transform import Rotation
+
+from atompack.crystal.components import Basis, LatticeParameters
+from atompack.crystal.crystal import Crystal, UnitCell
+from atompack.crystal.matcher import StructureMatcher
+from atompack.crystal.transform import Transform
+from atompack.symmetry import Spacegroup
+
+#######################
+#    Test Fixtures    #
+#######################
+
+
+@pytest.fixture
+def displace_oxygen(rutile_sites, build_rutile):
+    """Returns a factory of rutile-like crystals with a rigidly displaced oxygen sublattice."""
+
+    def build(displacement):
+        return build_rutile([(specie, site + displacement * (specie == "O")) for specie, site in rutile_sites])
+
+    return build
+
+
+################################
+#    StructureMatcher Tests    #
+################################
+
+
+def test_structure_matcher_fit_equivalent(rutile_sites, build_rutile):
+    reference = build_rutile(rutile_sites)
+    # permuted and translated
+    shifted = build_rutile([(specie, (site + 0.13) % 1) for specie, site in rutile_sites[::-1]])
+    # rotated
+    rotated = build_rutile(rutile_sites)
+    matrix = Rotation.from_euler("xyz", [10, 20, 30], degrees=True).as_matrix()
+    for atom in rotated.atoms:
+        atom.position = np.matmul(matrix, atom.position)
+    rotated.lattice_vectors.vectors = np.matmul(rotated.lattice_vectors.vectors, matrix.T)
+    # sheared choice of lattice vectors
+    sheared = build_rutile(rutile_sites)
+    sheared.lattice_vectors.vectors = np.array([[4.6, 0.0, 0.0], [0.0, 4.6, 0.0], [4.6, 0.0, 3.0]])
+    # supercell
+    supercell = Transform().supercell((2, 1, 3)).apply(build_rutile(rutile_sites))
+    matcher = StructureMatcher()
+    for crystal in (shifted, rotated, sheared, supercell):
+        assert matcher.fit(reference, crystal)
+        assert matcher.fit(crystal, reference)
+
+
+def test_structure_matcher_fit_supercells():
+    basis = Basis([("Cs", np.zeros(3)), ("Cl", np.full(3, 0.5))])
+    build = lambda: Crystal(UnitCell(basis, LatticeParameters.cubic(4.1), Spacegroup(1)))
+    # supercells whose atom counts do not divide each other
+    a = Transform().supercell((3, 1, 1)).apply(build())
+    b = Transform().supercell((2, 1, 1)).apply(build())
+    c = Transform().supercell((2, 3, 1)).apply(build())
+    matcher = StructureMatcher()
+    assert matcher.fit(a, b)
+    assert matcher.fit(b, c)
+    assert matcher.fit(build(), c)
+    # a substituted supercell no longer reduces to the same primitive cell
+    for atom in a.atoms[:1]:
+        atom["specie"] = "Br"
+    assert not matcher.fit(a, b)
+
+
+def test_structure_matcher_fit_distinct(rutile_sites, build_rutile, displace_oxygen):
+    reference = build_rutile(rutile_sites)
+    matcher = StructureMatcher()
+    # small distortions are within tolerance but large ones are not
+    assert matcher.fit(reference, displace_oxygen(np.array([0.05, 0.0, 0.0])))
+    assert not matcher.fit(reference, displace_oxygen(np.array([0.2, 0.0, 0.0])))
+    # a stricter site tolerance rejects small distortions
+    assert not StructureMatcher(stol=0.05).fit(reference, displace_oxygen(np.array([0.05, 0.0, 0.0])))
+    # different lattices
+    stretched = build_rutile(rutile_sites)
+    stretched.lattice_vectors.vectors = np.diag([4.6, 4.6, 4.5])
+    assert not matcher.fit(reference, stretched)
+
+
+def test_structure_matcher_fit_many(rutile_sites, build_rutile, displace_oxygen):
+    reference = build_rutile(rutile_sites)
+    candidates = [
+        displace_oxygen(np.array([0.2, 0.0, 0.0])),
+        Transform().supercell((2, 2, 1)).apply(build_rutile(rutile_sites)),
+        build_rutile([("Sn", site) if specie == "Ti" else (specie, site) for specie, site in rutile_sites]),
+        build_rutile(rutile_sites[::-1]),
+    ]
+    res = StructureMatcher().fit_many(reference, candidates)
+    assert np.array_equal(res, [False, True, False, True])
+
+
+def test_structure_matcher_group(rutile_sites, build_rutile, displace_oxygen):
+    crystals = [
+        build_rutile(rutile_sites),
+        displace_oxygen(np.array([0.2, 0.0, 0.0])),
+        build_rutile(rutile_sites[::-1]),
+        displace_oxygen(np.array([0.2, 0.0, 0.0])),
+    ]
+    assert StructureMatcher().group(crystals) == [[0, 2], [1, 3]]
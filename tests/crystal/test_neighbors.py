@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from atompack.crystal.components import LatticeVectors
+from atompack.crystal.neighbors import NeighborSearch
+
+##############################
+#    NeighborSearch Tests    #
+##############################
+
+
+def test_neighbor_search_invalid_cutoff():
+    with pytest.raises(ValueError):
+        _ = NeighborSearch(np.zeros((1, 3)), LatticeVectors(np.identity(3)), 0)
+
+
+def test_neighbor_search_pairs_triclinic():
+    vectors = LatticeVectors(np.array([[3.0, 0.0, 0.0], [1.2, 2.8, 0.0], [0.5, -0.7, 3.1]]))
+    # include positions outside of the cell
+    positions = np.random.default_rng(0).uniform(-2, 5, size=(20, 3))
+    cutoff = 4.0
+    search = NeighborSearch(positions, vectors, cutoff)
+    i, j, distances, images = search.pairs()
+    # displacements are consistent with the reported images
+    displacements = positions[j] + vectors.to_cartesian(images) - positions[i]
+    assert np.allclose(np.linalg.norm(displacements, axis=1), distances)
+    assert np.all(distances <= cutoff)
+    # brute force search over a large block of images
+    shifts = np.array(list(np.ndindex(13, 13, 13))) - 6
+    count = 0
+    for a in range(len(positions)):
+        for b in range(len(positions)):
+            norms = np.linalg.norm(positions[b] + vectors.to_cartesian(shifts) - positions[a], axis=1)
+            count += np.sum((norms <= cutoff) & (norms > 0))
+    assert len(i) == count
+    # chunks reproduce the full search
+    chunks = list(search.iter_pairs(chunk_size=3))
+    assert len(chunks) == 7
+    assert np.array_equal(np.concatenate([chunk[0] for chunk in chunks]), i)
+    assert np.array_equal(np.concatenate([chunk[3] for chunk in chunks]), images)
+
+
+def test_neighbor_search_query():
+    vectors = LatticeVectors(np.identity(3) * 2)
+    positions = np.array([[0.0, 0.0, 0.0], [1.0, 1.0, 1.0]])
+    search = NeighborSearch(positions, vectors, 1.0)
+    point, j, distances, images = search.query(np.array([[1.9, 0.0, 0.0], [5.0, 5.0, 5.0]]), cutoff=0.5)
+    assert np.array_equal(point, [0, 1])
+    assert np.array_equal(j, [0, 1])
+    assert np.allclose(distances, [0.1, 0.0])
+    assert np.array_equal(images, [[1, 0, 0], [2, 2, 2]])
+    # the query radius is bounded by the index radius
+    with pytest.raises(ValueError):
+        _ = search.query(positions, cutoff=2.0)
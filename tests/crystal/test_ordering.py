@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from atompack.crystal.ordering import curve_keys
+
+
+def _grid(bits):
+    cells = np.array(list(np.ndindex(2**bits, 2**bits, 2**bits)))
+    return cells, (cells + 0.5) / 2**bits
+
+
+def test_morton_keys():
+    cells, fractional = _grid(2)
+    keys = curve_keys(fractional, "morton", bits=2)
+    assert np.array_equal(np.sort(keys), np.arange(64))
+    # bits are interleaved with the first axis leading
+    assert curve_keys(np.array([[0.5, 0.0, 0.0]]), "morton", bits=2)[0] == 0b100000
+    assert curve_keys(np.array([[0.0, 0.0, 0.25]]), "morton", bits=2)[0] == 0b000001
+
+
+def test_hilbert_keys():
+    cells, fractional = _grid(3)
+    keys = curve_keys(fractional, "hilbert", bits=3)
+    assert np.array_equal(np.sort(keys), np.arange(512))
+    # consecutive cells along the curve are face neighbors
+    steps = np.abs(np.diff(cells[np.argsort(keys)], axis=0)).sum(axis=1)
+    assert np.all(steps == 1)
+
+
+def test_curve_keys_wrap():
+    fractional = np.array([[0.1, 0.2, 0.3], [1.1, -0.8, 2.3]])
+    for curve in ("morton", "hilbert"):
+        keys = curve_keys(fractional, curve)
+        assert keys.dtype == np.uint64
+        assert keys[0] == keys[1]
+    with pytest.raises(ValueError):
+        curve_keys(fractional, "peano")
+    with pytest.raises(ValueError):
+        curve_keys(fractional, bits=22)
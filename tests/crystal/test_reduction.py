@@ -0,0 +1,52 @@
+import numpy as np
+
+from atompack.crystal.reduction import delaunay_reduce, lattice_points, niggli_reduce, reduce_lattice
+
+#########################
+#    Reduction Tests    #
+#########################
+
+
+def test_reduce_lattice_skewed():
+    vectors = np.diag([3.0, 4.0, 5.0])
+    skew = np.array([[1, 0, 0], [3, 1, 0], [-2, 4, 1]])
+    reduced, matrix = reduce_lattice(np.matmul(skew, vectors))
+    assert np.allclose(np.sort(np.linalg.norm(reduced, axis=1)), [3.0, 4.0, 5.0])
+    assert np.allclose(reduced, np.matmul(matrix, np.matmul(skew, vectors)))
+    assert round(np.linalg.det(matrix)) == 1
+
+
+def test_niggli_reduce_unique():
+    # face centered cubic lattice on a primitive basis
+    vectors = np.array([[0.0, 1.0, 1.0], [1.0, 0.0, 1.0], [1.0, 1.0, 0.0]])
+    target, _ = niggli_reduce(vectors)
+    target_metric = np.matmul(target, target.T)
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        # random unimodular transformations reduce onto the same metric
+        skew = np.identity(3, dtype=int)
+        for _ in range(4):
+            i, j = rng.choice(3, 2, replace=False)
+            skew[i] += rng.integers(-2, 3) * skew[j]
+        reduced, matrix = niggli_reduce(np.matmul(skew, vectors))
+        assert np.allclose(np.matmul(reduced, reduced.T), target_metric)
+        assert np.allclose(reduced, np.matmul(matrix, np.matmul(skew, vectors)))
+        assert round(np.linalg.det(matrix)) == 1
+
+
+def test_delaunay_reduce():
+    vectors = np.diag([3.0, 4.0, 5.0])
+    skew = np.array([[1, 2, 0], [0, 1, 0], [3, -1, 1]])
+    reduced, matrix = delaunay_reduce(np.matmul(skew, vectors))
+    assert np.allclose(np.linalg.norm(reduced, axis=1), [3.0, 4.0, 5.0])
+    assert np.allclose(reduced, np.matmul(matrix, np.matmul(skew, vectors)))
+    assert round(np.linalg.det(matrix)) == 1
+
+
+def test_lattice_points():
+    # face centered supercell of a primitive lattice
+    matrix = np.array([[-1, 1, 1], [1, -1, 1], [1, 1, -1]])
+    points = lattice_points(matrix)
+    assert len(points) == 4
+    assert np.allclose(points[0], 0)
+    assert np.allclose(np.sort(points.sum(axis=1)), [0, 1, 1, 1])
@@ -1,7 +1,10 @@
 import numpy as np
 import pytest
 
-from atompack.crystal.spatial import MillerIndex, Orientation, Plane
+from atompack.crystal.components import LatticeParameters, LatticeVectors
+from atompack.crystal.spatial import (FAMILIES, MillerIndex, Orientation, Plane, miller_families,
+                                     unique_miller_indices)
+from atompack.symmetry import Spacegroup
 
 ###########################
 #    MillerIndex Tests    #
@@ -49,6 +52,40 @@ def test_miller_index_equality():
     assert MillerIndex(hkl) != hkl
 
 
+@pytest.mark.parametrize("spg,hkl,size", [
+    (225, (1, 0, 0), 6),
+    (225, (1, 1, 0), 12),
+    (225, (1, 1, 1), 8),
+    (225, (1, 2, 3), 48),
+    (1, (1, 2, 3), 1),
+    (2, (1, 2, 3), 2),
+    (194, (1, 0, 0), 6),
+    (194, (0, 0, 1), 2),
+])
+def test_miller_index_family(spg, hkl, size):
+    family = MillerIndex(hkl).family(Spacegroup(spg))
+    assert len(family) == size
+    assert len({index.hkl for index in family}) == size
+    # every member shares the same family
+    assert MillerIndex(family[-1].hkl).family(Spacegroup(spg)) == family
+
+
+def test_miller_families_batch():
+    spg = Spacegroup("P 63/m m c")
+    indices = np.array([[1, 0, 0], [0, 1, 0], [1, 1, 0], [1, 0, 0]])
+    planes = miller_families(indices, spg)
+    directions = miller_families(indices, spg, direction=True)
+    # planes and directions transform differently in a hexagonal lattice
+    assert np.array_equal(planes[0], planes[1])
+    assert not np.array_equal(planes[0], planes[2])
+    assert np.array_equal(directions[0], directions[2])
+    # families are cached per spacegroup and index
+    assert planes[0] is planes[3]
+    assert (194, (1, 0, 0), False) in FAMILIES
+    res = unique_miller_indices(indices, spg)
+    assert res.tolist() == [[1, 0, 0], [2, -1, 0]]
+
+
 ###########################
 #    Orientation Tests    #
 ###########################
@@ -56,11 +93,34 @@ def test_miller_index_equality():
 
 def test_orientation_miller_indices():
     plane = MillerIndex((1, 0, 0))
-    direction = MillerIndex((1, 2, 0))
+    direction = MillerIndex((0, 1, 2))
     orientation = Orientation.from_miller_indices(plane, direction)
+    assert isinstance(orientation, Orientation)
     res_plane, res_direction = orientation.as_miller_indices()
     assert res_plane == plane
     assert res_direction == direction
+    # the direction is rotated onto x and the plane normal onto z
+    assert np.allclose(orientation.apply([0, 1, 2]), [np.sqrt(5), 0, 0])
+    assert np.allclose(orientation.apply([1, 0, 0]), [0, 0, 1])
+    # directions outside of the plane are rejected
+    with pytest.raises(ValueError):
+        _ = Orientation.from_miller_indices(plane, MillerIndex((1, 2, 0)))
+
+
+def test_orientation_miller_arrays():
+    hkl = np.array([[1, 1, 1], [1, 1, 1], [0, 0, 2], [-1, 2, 3]])
+    uvw = np.array([[1, -1, 0], [-2, 1, 1], [3, 1, 0], [3, 0, 1]])
+    orientations = Orientation.from_miller_arrays(hkl, uvw)
+    assert len(orientations) == 4
+    res_hkl, res_uvw = orientations.as_miller_arrays()
+    assert np.array_equal(res_hkl, [[1, 1, 1], [1, 1, 1], [0, 0, 1], [-1, 2, 3]])
+    assert np.array_equal(res_uvw, uvw)
+    # each orientation matches the single pair constructor
+    single = Orientation.from_miller_indices(MillerIndex((-1, 2, 3)), MillerIndex((3, 0, 1)))
+    assert np.allclose(orientations.as_matrix()[3], single.as_matrix())
+    # indices beyond the largest multiplier cannot be recovered
+    with pytest.raises(ValueError):
+        _ = orientations.as_miller_arrays(max_index=2)
 
 
 #####################
@@ -84,3 +144,45 @@ def test_plane_coefficients():
         [12, 11, 9],
     ]))
     assert np.allclose(plane.coefficients, np.array([30, -48, 17, -15]))
+
+
+def test_plane_signed_distances():
+    plane = Plane.from_miller_index(MillerIndex((1, 1, 1)))
+    points = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 1], [1 / 3, 1 / 3, 1 / 3]])
+    res = plane.signed_distances(points)
+    assert np.allclose(np.abs(plane.normal), 1 / np.sqrt(3))
+    assert np.allclose(np.abs(res), [1 / np.sqrt(3), 0, 2 / np.sqrt(3), 0])
+    # points on opposite sides of the plane have opposite signs
+    assert np.sign(res[0]) == -np.sign(res[2])
+
+
+def test_plane_select_slab():
+    plane = Plane.from_miller_index(MillerIndex((0, 0, 1)))
+    points = np.column_stack((np.zeros(5), np.zeros(5), np.linspace(0, 2, 5)))
+    # the normal of the plane through z = 1 points towards the origin
+    assert np.allclose(plane.normal, [0, 0, -1])
+    mask = plane.select_slab(points, 0.5, 1.5)
+    assert np.array_equal(mask, [True, True, False, False, False])
+    # planes in lattice units are scaled by the lattice vectors
+    lattice_vectors = LatticeVectors.from_lattice_parameters(LatticeParameters.tetragonal(1.0, 2.0))
+    mask = plane.to_cartesian(lattice_vectors).select_slab(points, 0.5, 1.5)
+    assert np.array_equal(mask, [False, False, True, True, False])
+
+
+def test_plane_assign_layers():
+    rng = np.random.default_rng(0)
+    # noisy layers along the (110) direction in shuffled order
+    heights = np.repeat(np.arange(4), 25) * 0.5
+    offsets = rng.uniform(-1, 1, (100, 1)) * np.array([[1, -1, 0]]) + rng.uniform(-1, 1, (100, 1)) * [[0, 0, 1]]
+    points = heights[:, np.newaxis] * np.array([[1, 1, 0]]) / np.sqrt(2) + offsets
+    points += rng.normal(0, 1E-4, points.shape)
+    order = rng.permutation(100)
+    plane = Plane(np.array([[0, 0, 0], [0, 0, 1], [1, -1, 0]]))
+    labels, res = plane.assign_layers(points[order], tol=1E-2)
+    # the normal points away from the layers
+    assert np.allclose(plane.normal, [-1 / np.sqrt(2), -1 / np.sqrt(2), 0])
+    assert np.allclose(res, [-1.5, -1, -0.5, 0], atol=1E-3)
+    assert np.array_equal(labels, 3 - np.repeat(np.arange(4), 25)[order])
+    # empty input
+    labels, res = plane.assign_layers(np.zeros((0, 3)))
+    assert len(labels) == len(res) == 0
@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+from atompack.crystal.components import Basis, LatticeParameters
+from atompack.crystal.crystal import Crystal, UnitCell
+from atompack.crystal.spatial import MillerIndex, Orientation
+from atompack.crystal.surface import SlabGenerator
+from atompack.crystal.transform import Transform
+from atompack.symmetry import Spacegroup
+
+##########################
+#    Transform Tests    #
+##########################
+
+
+def test_transform_orient():
+    basis = Basis([("X", np.zeros(3)), ("Y", np.array([0.5, 0.0, 0.0]))])
+    crystal = Crystal(UnitCell(basis, LatticeParameters.cubic(2.0), Spacegroup(1)))
+    orientation = Orientation.from_miller_indices(MillerIndex((0, 0, 1)), MillerIndex((0, 1, 0)))
+    crystal = Transform().orient(orientation).apply(crystal)
+    # the y axis is rotated onto x
+    assert np.allclose(crystal.positions[1], [0, -1, 0])
+    assert np.allclose(crystal.lattice_vectors.vectors[1], [2, 0, 0])
+    # stacks of orientations are rejected
+    stack = Orientation.from_miller_arrays(np.array([[0, 0, 1]] * 2), np.array([[1, 0, 0]] * 2))
+    with pytest.raises(ValueError):
+        _ = Transform().orient(stack).apply(crystal)
+
+
+#############################
+#    SlabGenerator Tests    #
+#############################
+
+
+def _rutile():
+    basis = Basis([("Ti", np.zeros(3)), ("O", np.array([0.305, 0.305, 0.0]))])
+    return Crystal(UnitCell(basis, LatticeParameters.tetragonal(4.59, 2.96), Spacegroup("P 42/m n m")))
+
+
+@pytest.mark.parametrize("hkl,spacing", [
+    ((1, 0, 0), 1.8),
+    ((1, 1, 0), 3.6 / np.sqrt(8)),
+    ((1, 1, 1), 3.6 / np.sqrt(3)),
+])
+def test_slab_generator_fcc(hkl, spacing):
+    unit_cell = UnitCell(Basis.primitive("Cu"), LatticeParameters.cubic(3.6), Spacegroup("F m -3 m"))
+    generator = SlabGenerator(Crystal(unit_cell), min_thickness=8.0, vacuum=12.0)
+    slabs = generator.slabs(MillerIndex(hkl))
+    assert len(slabs) == 1
+    slab = slabs[0]
+    vectors = slab.lattice_vectors.vectors
+    # orthogonal cell with the surface normal along z
+    assert np.allclose(vectors[:2, 2], 0)
+    assert np.allclose(vectors[2, :2], 0)
+    heights = np.unique(np.round(slab.positions[:, 2], 6))
+    assert np.allclose(np.diff(heights), spacing)
+    assert heights[0] == 0
+    assert heights[-1] >= 8.0
+    assert np.isclose(vectors[2, 2] - heights[-1], 12.0)
+    # one atom per layer in the primitive surface cell
+    assert len(slab.atoms) == len(heights)
+    # atoms lie within the in-plane cell
+    fractional = slab.lattice_vectors.to_fractional(slab.positions)
+    assert np.all((fractional[:, :2] > -1E-6) & (fractional[:, :2] < 1))
+
+
+def test_slab_generator_terminations():
+    generator = SlabGenerator(_rutile(), min_thickness=6.0, vacuum=10.0)
+    # the (001) facet has a single mixed layer while (110) has a mixed layer between two oxygen layers
+    assert len(generator.terminations(MillerIndex((0, 0, 1)))) == 1
+    assert len(generator.terminations(MillerIndex((1, 1, 0)))) == 3
+    for slab in generator.slabs(MillerIndex((1, 1, 0))):
+        # stoichiometry is preserved by stacking whole oriented cells
+        species = list(slab.species)
+        assert species.count("O") == 2 * species.count("Ti")
+        assert np.isclose(np.min(slab.positions[:, 2]), 0, atol=1E-3)
+
+
+def test_slab_generator_batch():
+    generator = SlabGenerator(_rutile(), min_thickness=6.0, vacuum=10.0, primitive=False)
+    indices = [MillerIndex((1, 1, 0)), MillerIndex((0, 0, 1)), MillerIndex((2, 2, 0))]
+    res = generator.slabs_many(indices)
+    # equivalent indices share the same oriented bulk
+    assert sorted(res) == [(0, 0, 1), (1, 1, 0)]
+    assert len(res[(1, 1, 0)]) == 3
+    single = generator.slabs(MillerIndex((1, 1, 0)))
+    assert np.allclose(single[0].positions, res[(1, 1, 0)][0].positions)
+    with pytest.raises(ValueError):
+        _ = generator.slabs(MillerIndex((0, 0, 0)))
@@ -1,5 +1,7 @@
 import numpy as np
+import pytest
 
+from atompack.bond import Bond
 from atompack.crystal import (Basis, Crystal, LatticeParameters, Transform, UnitCell)
 from atompack.symmetry import Spacegroup
 
@@ -30,3 +32,65 @@ def test_transform_supercell():
     transform.apply(crystal)
     assert len(crystal.atoms) == 72
     assert np.allclose(crystal.lattice_vectors.vectors, target_vectors * np.array(supercell_size)**2, atol=1E-6)
+
+
+def test_transform_supercell_periodic_bonds():
+    # periodic chain of alternating species along x
+    basis = Basis([("X", np.array([0.0, 0.0, 0.0])), ("Y", np.array([0.5, 0.0, 0.0]))])
+    lattparams = LatticeParameters.cubic(2.0)
+    spg = Spacegroup(1)
+    unit_cell = UnitCell(basis, lattparams, spg)
+    crystal = Crystal(unit_cell)
+    crystal.insert_bonds(Bond((0, 1)), Bond((1, 0), (1, 0, 0), order=1))
+    # generate supercell transform
+    supercell_size = (3, 2, 1)
+    crystal = Transform().supercell(supercell_size).apply(crystal)
+    assert len(crystal.atoms) == 12
+    assert len(crystal.bonds) == 12
+    # every atom is bonded to exactly two neighbors
+    degrees = np.bincount(np.array([bond.indices for bond in crystal.bonds]).ravel())
+    assert np.all(degrees == 2)
+    # only the bonds leaving the last cell along x cross the boundary
+    images = [bond.image for bond in crystal.bonds if bond.is_periodic]
+    assert images == [(1, 0, 0), (1, 0, 0)]
+    # bonded atoms are one bond length apart after accounting for the image
+    for bond in crystal.bonds:
+        i, j = bond.indices
+        offset = np.matmul(bond.image, crystal.lattice_vectors.vectors)
+        distance = np.linalg.norm(crystal.atoms[j].position + offset - crystal.atoms[i].position)
+        assert np.isclose(distance, 1.0)
+    # extra attributes are replicated
+    assert sum(1 for bond in crystal.bonds if bond.get("order") == 1) == 6
+    # each chain along x forms its own fragment
+    assert crystal.fragment_count == 2
+
+
+def test_transform_iter_supercell(rocksalt):
+    crystal = rocksalt()
+    size = (2, 3, 2)
+    blocks = list(Transform.iter_supercell(crystal, size, chunk_atoms=7))
+    # every block except the last holds exactly the chunk size
+    assert [len(block[0]) for block in blocks[:-1]] == [7] * (len(blocks) - 1)
+    species, positions, indices, images = [np.concatenate(columns) for columns in zip(*blocks)]
+    # the crystal is left unchanged
+    assert len(crystal.atoms) == 8
+    # the stream matches the in-memory supercell of a separate unit cell atom by atom
+    supercell = rocksalt(size)
+    assert np.array_equal(species, supercell.species)
+    assert np.allclose(positions, supercell.positions)
+    assert np.array_equal(species, crystal.species[indices])
+    assert np.allclose(positions, crystal.positions[indices] + images @ crystal.lattice_vectors.vectors)
+    assert np.array_equal(np.unique(images, axis=0), np.array(list(np.ndindex(*size))))
+
+
+def test_transform_reorder(tmp_path, copper):
+    crystal = Transform().supercell((4, 4, 4)).reorder("hilbert").apply(copper())
+    # consecutive atoms are nearer on average than in generation order
+    generated = copper((4, 4, 4))
+    steps = np.arange(len(crystal.atoms) - 1)
+    assert np.mean(crystal.distances(steps, steps + 1)) < np.mean(generated.distances(steps, steps + 1))
+    assert np.allclose(np.sort(crystal.positions, axis=0), np.sort(generated.positions, axis=0))
+    with pytest.raises(ValueError):
+        Transform().reorder("peano")
+    with pytest.raises(ValueError):
+        Transform().supercell((2, 2, 2), directory=str(tmp_path)).reorder().apply(copper())
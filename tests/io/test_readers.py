@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+import pytest
+
+from atompack.io.readers import LAMMPSDumpFrames, XYZFrames, read_lammps_data, read_poscar
+from atompack.io.writers import iter_blocks, write_lammps_data, write_poscar, write_xyz
+
+DUMP = """ITEM: TIMESTEP
+{step}
+ITEM: NUMBER OF ATOMS
+3
+ITEM: BOX BOUNDS xy xz yz pp pp pp
+-1.0 5.0 1.0
+0.0 4.0 0.0
+0.0 4.0 0.0
+ITEM: ATOMS id type xs ys zs fx
+3 2 0.5 0.5 0.5 0.3
+1 1 0.0 0.0 0.0 0.1
+2 1 0.25 0.5 0.0 0.2
+"""
+
+
+def test_xyz_frames(tmp_path, rocksalt):
+    path = os.path.join(tmp_path, "frames.xyz")
+    crystal = rocksalt((2, 1, 1))
+    for n in range(4):
+        write_xyz(path, iter_blocks(crystal.species, crystal.positions + n), crystal.lattice_vectors.vectors,
+                  append=n > 0)
+    frames = XYZFrames(path)
+    assert len(frames) == 4
+    assert frames.offsets[0] == 0 and np.all(np.diff(frames.offsets) > 0)
+    # random access parses a single frame
+    frame = frames[2]
+    assert np.allclose(frame.positions, crystal.positions + 2)
+    assert list(frame.species) == list(crystal.species)
+    assert np.allclose(frame.lattice_vectors, crystal.lattice_vectors.vectors)
+    assert len(frames[1:3]) == 2
+    with pytest.raises(IndexError):
+        _ = frames[4]
+    # the frame becomes a crystal in one bulk insertion
+    assert np.allclose(frame.to_crystal().positions, frame.positions)
+
+
+def test_xyz_frames_properties(tmp_path):
+    path = os.path.join(tmp_path, "forces.xyz")
+    with open(path, "w") as f:
+        f.write('2\nProperties=species:S:1:pos:R:3:forces:R:3:fixed:L:1 energy=-1.5\n'
+                'H 0 0 0 0.1 0.2 0.3 T\nH 0 0 0.74 -0.1 -0.2 -0.3 F\n')
+    frame = XYZFrames(path)[0]
+    assert frame.lattice_vectors is None
+    assert np.allclose(frame.properties["forces"][1], [-0.1, -0.2, -0.3])
+    assert list(frame.properties["fixed"]) == [True, False]
+    molecule = frame.to_molecule()
+    assert np.allclose(molecule.atoms[0]["forces"], [0.1, 0.2, 0.3])
+    with pytest.raises(ValueError):
+        _ = frame.to_crystal()
+
+
+def test_lammps_dump_frames(tmp_path):
+    path = os.path.join(tmp_path, "dump.lammpstrj")
+    with open(path, "w") as f:
+        f.write("".join(DUMP.format(step=step) for step in (0, 100, 200)))
+    frames = LAMMPSDumpFrames(path, species={1: "Ga", 2: "N"})
+    assert len(frames) == 3
+    frame = frames[-1]
+    # triclinic bounds are converted into lattice vectors and atoms are sorted by id
+    assert np.allclose(frame.lattice_vectors, [[5, 0, 0], [1, 4, 0], [0, 0, 4]])
+    assert list(frame.species) == ["Ga", "Ga", "N"]
+    assert np.allclose(frame.positions, [[0, 0, 0], [1.75, 2, 0], [3, 2, 2]])
+    assert np.allclose(frame.properties["fx"], [0.1, 0.2, 0.3])
+    assert list(frame.properties["id"]) == [1, 2, 3]
+
+
+def test_read_lammps_data(tmp_path, rocksalt):
+    crystal = rocksalt((2, 2, 2))
+    path = os.path.join(tmp_path, "rocksalt.data")
+    types = write_lammps_data(path, crystal, masses={"Na": 22.99, "Cl": 35.45})
+    frame = read_lammps_data(path, {number: specie for specie, number in types.items()})
+    assert np.allclose(frame.positions, crystal.positions)
+    assert list(frame.species) == list(crystal.species)
+    assert np.allclose(frame.lattice_vectors, crystal.lattice_vectors.vectors)
+
+    # full style with shifted bounds, shuffled ids and image flags
+    path = os.path.join(tmp_path, "full.data")
+    with open(path, "w") as f:
+        f.write("water\n\n2 atoms\n2 atom types\n\n-1.0 9.0 xlo xhi\n0.0 10.0 ylo yhi\n0.0 10.0 zlo zhi\n\n"
+                "Atoms # full\n\n2 1 2 0.4 1.0 2.0 3.0 0 0 1\n1 1 1 -0.8 0.0 0.0 0.0 0 0 0\n")
+    frame = read_lammps_data(path)
+    assert list(frame.species) == ["1", "2"]
+    assert np.allclose(frame.positions, [[1, 0, 0], [2, 2, 3]])
+    assert np.allclose(frame.properties["q"], [-0.8, 0.4])
+
+
+def test_read_poscar(tmp_path, rocksalt):
+    crystal = rocksalt((1, 1, 1))
+    path = os.path.join(tmp_path, "POSCAR")
+    write_poscar(path, crystal)
+    frame = read_poscar(path)
+    assert np.allclose(frame.positions, crystal.positions)
+    assert list(frame.species) == list(crystal.species)
+
+    # direct coordinates with selective dynamics and a scale factor
+    with open(path, "w") as f:
+        f.write("scaled\n2.0\n1 0 0\n0 1 0\n0 0 1\nSi\n2\nSelective dynamics\nDirect\n"
+                "0.0 0.0 0.0 T T T\n0.25 0.25 0.25 F F T\n")
+    frame = read_poscar(path)
+    assert np.allclose(frame.lattice_vectors, 2 * np.identity(3))
+    assert np.allclose(frame.positions, [[0, 0, 0], [0.5, 0.5, 0.5]])
+    assert frame.properties["selective_dynamics"].tolist() == [[True] * 3, [False, False, True]]
@@ -0,0 +1,93 @@
+import os
+
+import numpy as np
+import pytest
+
+from atompack.crystal.components import LatticeVectors
+from atompack.crystal.ensemble import PerturbationEnsemble
+from atompack.io.writers import iter_blocks, write_lammps_data, write_poscar, write_xyz
+
+
+def _random_blocks(n_blocks, size, seed=0):
+    # a stream of blocks which is never held in memory at once
+    rng = np.random.default_rng(seed)
+    for _ in range(n_blocks):
+        yield np.where(rng.random(size) < 0.3, "Ni", "Cu"), 10 * rng.random((size, 3))
+
+
+def test_write_xyz(tmp_path, rocksalt):
+    crystal = rocksalt((2, 2, 2))
+    path = os.path.join(tmp_path, "crystal.xyz")
+    assert write_xyz(path, crystal, comment="rocksalt", chunk_size=10) == 64
+    lines = open(path).read().splitlines()
+    assert int(lines[0]) == 64
+    assert 'pbc="T T T"' in lines[1] and lines[1].endswith("rocksalt")
+    lattice = np.array(lines[1].split('"')[1].split(), dtype=float).reshape(3, 3)
+    assert np.allclose(lattice, crystal.lattice_vectors.vectors)
+    assert [line.split()[0] for line in lines[2:]] == list(crystal.species)
+    assert np.allclose(np.array([line.split()[1:] for line in lines[2:]], dtype=float), crystal.positions)
+
+
+def test_write_xyz_ensemble(tmp_path, rocksalt):
+    crystal = rocksalt((1, 1, 1))
+    ensemble = PerturbationEnsemble(crystal, amplitudes=0.05, strain=0.01, seed=0)
+    path = os.path.join(tmp_path, "ensemble.xyz")
+    positions, vectors = ensemble.generate(5)
+    for n in range(5):
+        write_xyz(path, iter_blocks(ensemble.species, positions[n]), vectors[n], append=n > 0)
+    lines = open(path).read().splitlines()
+    assert len(lines) == 5 * (8 + 2)
+    frame = np.array([line.split()[1:] for line in lines[-8:]], dtype=float)
+    assert np.allclose(frame, positions[-1])
+
+
+def test_write_lammps_data(tmp_path):
+    # a triclinic cell is rotated into the restricted frame of LAMMPS
+    vectors = np.array([[3.0, 1.0, 0.5], [0.2, 4.0, 0.3], [0.1, 0.4, 5.0]])
+    species = np.array(["O", "H", "H", "O"])
+    positions = np.matmul(np.array([[0.1, 0.2, 0.3], [0.5, 0.5, 0.5], [0.9, 0.1, 0.4], [0.0, 0.7, 0.2]]), vectors)
+    path = os.path.join(tmp_path, "water.data")
+    masses = {"H": 1.008, "O": 16}
+    types = write_lammps_data(path, iter_blocks(species, positions, chunk_size=3), vectors, masses=masses)
+    assert types == {"H": 1, "O": 2}
+    lines = open(path).read().splitlines()
+    assert int(lines[2].split()[0]) == 4 and int(lines[3].split()[0]) == 2
+    lx, ly, lz = [float(line.split()[1]) for line in lines[5:8]]
+    xy, xz, yz = [float(value) for value in lines[8].split()[:3]]
+    box = np.array([[lx, 0, 0], [xy, ly, 0], [xz, yz, lz]])
+    assert np.allclose(np.matmul(box, box.T), np.matmul(vectors, vectors.T))
+    atoms = np.array([line.split() for line in lines[lines.index("Atoms # atomic") + 2:]], dtype=float)
+    assert np.all(atoms[:, 0] == np.arange(1, 5))
+    assert np.all(atoms[:, 1] == [2, 1, 1, 2])
+    assert np.allclose(np.matmul(atoms[:, 2:], np.linalg.inv(box)), LatticeVectors(vectors).to_fractional(positions))
+    with pytest.raises(ValueError):
+        _ = write_lammps_data(path, iter_blocks(species, positions), vectors, species_order=["O"])
+    with pytest.raises(ValueError):
+        _ = write_lammps_data(path, iter_blocks(species, positions))
+
+
+def test_write_lammps_data_stream(tmp_path):
+    path = os.path.join(tmp_path, "stream.data")
+    types = write_lammps_data(path, _random_blocks(4, 1000), np.diag([10.0, 10.0, 10.0]), chunk_size=300)
+    assert types == {"Cu": 1, "Ni": 2} or types == {"Ni": 1, "Cu": 2}
+    lines = open(path).read().splitlines()
+    assert int(lines[2].split()[0]) == 4000
+    assert len(lines) == lines.index("Atoms # atomic") + 2 + 4000
+
+
+def test_write_poscar(tmp_path):
+    path = os.path.join(tmp_path, "POSCAR")
+    counts = write_poscar(path, _random_blocks(3, 100), np.diag([10.0, 10.0, 10.0]), comment="alloy")
+    species = np.concatenate([block for block, _ in _random_blocks(3, 100)])
+    positions = np.concatenate([block for _, block in _random_blocks(3, 100)])
+    assert dict(counts) == {"Cu": np.count_nonzero(species == "Cu"), "Ni": np.count_nonzero(species == "Ni")}
+    lines = open(path).read().splitlines()
+    assert lines[0] == "alloy"
+    assert lines[5].split() == [specie for specie, _ in counts]
+    assert lines[7] == "Cartesian"
+    # atoms are grouped by specie in their original order
+    written = np.array([line.split() for line in lines[8:]], dtype=float)
+    expected = np.concatenate([positions[species == specie] for specie, _ in counts])
+    assert np.allclose(written, expected)
+    # no temporary files are left behind
+    assert os.listdir(tmp_path) == ["POSCAR"]
@@ -15,3 +15,15 @@ def test_bond_to_from_json():
     res = Bond.from_json(json_data)
     assert res.indices == bond.indices
     assert res["test_value"] == bond["test_value"]
+
+
+def test_bond_image():
+    # bonds are not periodic by default
+    bond = Bond((0, 1))
+    assert bond.image == (0, 0, 0)
+    assert not bond.is_periodic
+    # periodic images survive serialization
+    bond = Bond((0, 1), (1, 0, -1))
+    assert bond.is_periodic
+    res = Bond.from_json(bond.to_json())
+    assert res.image == bond.image
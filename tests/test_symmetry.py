@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 
 from atompack.symmetry import Spacegroup
@@ -49,3 +50,68 @@ def test_spacegroup_equality():
     assert Spacegroup(international_number) != Spacegroup(international_number + 1)
     # invalid comparison
     assert Spacegroup(international_number) != international_number
+
+
+def test_spacegroup_operators():
+    spg = Spacegroup("P 1 21/c 1")
+    assert spg.rotations.shape == (len(spg.genpos), 3, 3)
+    assert spg.translations.shape == (len(spg.genpos), 3)
+    # the screw axis is parallel to b
+    screw = spg.rotations[1]
+    assert np.array_equal(screw, np.diag([-1, 1, -1]))
+    assert np.allclose(spg.translations[1], [0, 0.5, 0.5])
+
+
+def test_spacegroup_operators_closed():
+    for spg in (Spacegroup(166), Spacegroup(227)):
+        rotations, translations = spg.rotations, spg.translations
+        keys = {(r.tobytes(), tuple(np.round(t % 1, 6) % 1)) for r, t in zip(rotations, translations)}
+        # the product of any two operations is another operation
+        for r1, t1 in zip(rotations[::7], translations[::7]):
+            for r2, t2 in zip(rotations, translations):
+                t = np.round((np.matmul(r1, t2) + t1) % 1, 6) % 1
+                assert (np.matmul(r1, r2).tobytes(), tuple(t)) in keys
+
+
+def test_spacegroup_centering():
+    assert len(Spacegroup("P 1").centering) == 1
+    assert len(Spacegroup("I m -3 m").centering) == 2
+    assert len(Spacegroup("F m -3 m").centering) == 4
+    assert len(Spacegroup("R -3 m").centering) == 3
+
+
+def test_spacegroup_wyckoff_positions():
+    # total number of Wyckoff positions over every spacegroup
+    assert sum(len(Spacegroup(i).wyckoff_positions) for i in range(1, 231)) == 1731
+    spg = Spacegroup("F m -3 m")
+    positions = spg.wyckoff_positions
+    assert [wyckoff.letter for wyckoff in positions] == list("abcdefghijkl")
+    assert [wyckoff.multiplicity for wyckoff in positions][:4] == [4, 4, 8, 24]
+    assert positions[-1].multiplicity == len(spg.genpos)
+    assert positions[-1].degrees_of_freedom == 3
+    # the equivalent sites of each position are distinct
+    for wyckoff in positions:
+        sites = wyckoff.positions(np.array([0.11, 0.23, 0.37]))
+        assert len(sites) == wyckoff.multiplicity
+        assert len(np.unique(np.round(sites, 6), axis=0)) == wyckoff.multiplicity
+    wyckoff = spg.wyckoff_position("f")
+    assert wyckoff.site_symmetry == "3m"
+    assert wyckoff.degrees_of_freedom == 1
+    with pytest.raises(ValueError):
+        _ = spg.wyckoff_position("z")
+
+
+def test_spacegroup_find_wyckoff():
+    spg = Spacegroup("P 63/m m c")
+    # every equivalent site of every position is located on that position
+    for wyckoff in spg.wyckoff_positions:
+        for site in wyckoff.positions(np.array([0.11, 0.23, 0.37])):
+            res, parameters = spg.find_wyckoff(site)
+            assert res.letter == wyckoff.letter
+            assert np.min(np.linalg.norm(res.positions(parameters) - site, axis=1)) < 1E-6
+    # sites within tolerance of a special position are symmetrized onto it
+    res, parameters = spg.find_wyckoff(np.array([0.3333, 0.6667, 0.25]), tolerance=1E-3)
+    assert res.letter == "c"
+    assert np.allclose(res.positions(parameters)[0], [1 / 3, 2 / 3, 0.25])
+    res, _ = spg.find_wyckoff(np.array([0.3333, 0.6667, 0.25]))
+    assert res.letter == "h"
@@ -3,6 +3,7 @@ import pytest
 
 from atompack.atom import Atom
 from atompack.bond import Bond
+from atompack.molecule import Molecule
 from atompack.topology import Topology
 
 N_ATOMS = 10
@@ -94,4 +95,40 @@ def test_topology_to_from_json(topology):
         assert new_topology.bonds[i].indices == topology.bonds[i].indices
 
 
+def test_topology_fragment_ids(topology):
+    # the bonded atoms form one fragment and every other atom is isolated
+    fragment_ids = topology.fragment_ids
+    assert len(fragment_ids) == N_ATOMS
+    assert np.all(fragment_ids[:N_BONDS + 1] == 0)
+    assert np.array_equal(fragment_ids[N_BONDS + 1:], np.arange(1, N_ATOMS - N_BONDS))
+    assert topology.fragment_count == N_ATOMS - N_BONDS
+
+
+def test_topology_fragment_ids_cache_invalidation(topology):
+    count = topology.fragment_count
+    # bonding two isolated atoms merges their fragments
+    topology.insert_bond(Bond((N_ATOMS - 2, N_ATOMS - 1)))
+    assert topology.fragment_count == count - 1
+    # breaking the bond splits them again
+    topology.remove_bond((N_ATOMS - 2, N_ATOMS - 1))
+    assert topology.fragment_count == count
+    # removing the central atom breaks the largest fragment apart
+    topology.remove_atoms(0)
+    assert topology.fragment_count == N_ATOMS - 1
+
+
+def test_topology_extract_fragments(topology):
+    fragments = topology.extract_fragments()
+    assert len(fragments) == topology.fragment_count
+    assert all(isinstance(fragment, Molecule) for fragment in fragments)
+    # the first fragment contains all of the bonds
+    assert len(fragments[0].atoms) == N_BONDS + 1
+    assert len(fragments[0].bonds) == N_BONDS
+    for bond in fragments[0].bonds:
+        assert bond.indices[0] == 0
+    # atoms are shared rather than copied
+    assert fragments[0].atoms[0] is topology.atoms[0]
+    assert all(len(fragment.atoms) == 1 for fragment in fragments[1:])
+
+
 # TODO: tests for bond operations will be added after the retworkx update